@@ -1,7 +1,7 @@
 from ._version import __version__
 from .utils.utils import check_package
-from .io.carto import read_carto, to_carto, has_table, delete_table, rename_table, \
-                      copy_table, create_table_from_query, describe_table, update_privacy_table
+from .io.carto import read_carto, to_carto, estimate_read_carto, estimate_to_carto, has_table, delete_table, \
+                      rename_table, copy_table, create_table_from_query, describe_table, update_privacy_table
 
 
 # Check installed packages versions
@@ -14,6 +14,8 @@ __all__ = [
     '__version__',
     'read_carto',
     'to_carto',
+    'estimate_read_carto',
+    'estimate_to_carto',
     'has_table',
     'delete_table',
     'rename_table',
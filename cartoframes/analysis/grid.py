@@ -1,36 +1,734 @@
-from pandas import DataFrame, concat
+import numpy as np
+
+from collections import deque
+from multiprocessing import Pool
+from pandas import DataFrame, MultiIndex, concat
+from pandas.api.types import is_integer_dtype
 from geopandas import GeoDataFrame
-from shapely.geometry import box
+from shapely.prepared import prep
+
+from .tiles import lnglat_to_tile, bbox_to_tile_range, tile_polygons, tile_quadkeys, quadkeys_to_tiles, \
+    tile_quadints, quadints_to_tiles, check_quadint_zoom
+
+# Number of chunks processed and waiting to be consumed per worker
+CHUNKS_PER_WORKER = 4
+# Maximum zoom level used to index the geometries in a spatial join
+MAX_SJOIN_ZOOM_LEVEL = 20
+# Number of candidate pairs tested per task in a spatial join
+SJOIN_CHUNKSIZE = 50000
+QUADKEY_TYPES = ['string', 'int']
+# Maximum zoom level of the tiles encoded in 64-bit integer keys
+MAX_ZOOM_LEVEL = 31
+# Aggregations of a pyramid, the partial aggregations needed to compute them
+# and the aggregation of each partial aggregation to roll it up to a parent tile
+PYRAMID_AGGREGATIONS = ['count', 'sum', 'mean', 'min', 'max']
+PARTIAL_AGGREGATIONS = {'count': ['count'], 'sum': ['sum'], 'mean': ['sum', 'count'], 'min': ['min'], 'max': ['max']}
+ROLLUP_AGGREGATIONS = {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'}
+SJOIN_PREDICATES = ['intersects', 'contains', 'within']
+SJOIN_CONVERSE = {'intersects': 'intersects', 'contains': 'within', 'within': 'contains'}
 
-from ..utils.utils import check_package
+# Geometries shared with the processes of a spatial join
+_worker_data = {}
 
 
 class QuadGrid:
 
-    def polyfill(self, input_gdf, zoom_level):
-        check_package('mercantile', is_optional=True)
-        import mercantile
+    def polyfill(self, input_gdf, zoom_level, workers=None, chunksize=None, compact=False, quadkey_type='string'):
+        """Fill the geometries of a GeoDataFrame with the tiles of a zoom level.
+
+        The result contains a row per geometry and intersected tile, with the attributes
+        of the geometry, the polygon of the tile and its `quadkey`.
+
+        Args:
+            input_gdf (geopandas.GeoDataFrame): data with the geometries to be filled.
+            zoom_level (int): zoom level of the tiles.
+            workers (int, optional): number of processes filling the geometries in parallel.
+                By default, the geometries are filled in the current process.
+            chunksize (int, optional): number of input geometries per chunk. If provided,
+                a generator of GeoDataFrames, one per chunk, is returned instead of a single
+                GeoDataFrame, so the whole result is not kept in memory.
+            compact (bool, optional): if True, the tiles fully contained in a geometry are
+                merged into their largest contained parent tile, so the result has tiles of
+                different zoom levels, up to `zoom_level`, in the boundary. It can be expanded
+                with :py:meth:`uncompact <cartoframes.analysis.grid.QuadGrid.uncompact>`.
+                Default is False.
+            quadkey_type (str, optional): type of the `quadkey` column: 'string', or 'int' for
+                uint64 integer quadkeys up to zoom level 29 (see :py:func:`tile_quadints
+                <cartoframes.analysis.tiles.tile_quadints>`). Default is 'string'.
+
+        Returns:
+            geopandas.GeoDataFrame, or a generator of geopandas.GeoDataFrame if `chunksize`
+            is provided. The chunks are yielded in the order of the input geometries and
+            their concatenation is equal to the result without `chunksize`.
 
+        Raises:
+            ValueError: if the dataframe has no valid geometry, or the workers, chunksize
+                or quadkey_type params are not valid, or the zoom level is higher than 29
+                with 'int' quadkeys.
+
+        """
         if not hasattr(input_gdf, 'geometry'):
             raise ValueError('This dataframe has no valid geometry.')
 
-        geometry_name = input_gdf.geometry.name
-
-        dfs = []
-        for _, row in input_gdf.iterrows():
-            input_geometry = row[geometry_name]
-            bounds = input_geometry.bounds
-            tiles = mercantile.tiles(bounds[0], bounds[1], bounds[2], bounds[3], zoom_level)
-            new_rows = []
-            for tile in tiles:
-                new_row = row.copy()
-                new_geometry = box(*mercantile.bounds(tile))
-                if new_geometry.intersects(input_geometry):
-                    new_row[geometry_name] = new_geometry
-                    new_row['quadkey'] = mercantile.quadkey(tile)
-                    new_rows.append(new_row)
-            dfs.append(DataFrame(new_rows))
-
-        df = concat(dfs).reset_index(drop=True)
-
-        return GeoDataFrame(df, geometry=geometry_name, crs='epsg:4326')
+        _check_quadkey_type(quadkey_type, zoom_level)
+
+        if workers is not None and (not isinstance(workers, int) or workers < 1):
+            raise ValueError('Wrong number of workers. You should provide an integer >= 1.')
+
+        if chunksize is not None and (not isinstance(chunksize, int) or chunksize < 1):
+            raise ValueError('Wrong chunksize. You should provide an integer >= 1.')
+
+        if chunksize is not None:
+            return self._polyfill_chunks(input_gdf, zoom_level, workers, chunksize, compact, quadkey_type)
+
+        if workers is not None and workers > 1:
+            chunksize = max(1, int(np.ceil(len(input_gdf) / (workers * CHUNKS_PER_WORKER))))
+            chunks = list(self._polyfill_chunks(input_gdf, zoom_level, workers, chunksize, compact, quadkey_type))
+            if chunks:
+                return concat(chunks)
+
+        return _polyfill(input_gdf, zoom_level, compact, quadkey_type)
+
+    def uncompact(self, input_gdf, zoom_level):
+        """Expand the tiles of a compact polyfill into the tiles of a zoom level.
+
+        Args:
+            input_gdf (geopandas.GeoDataFrame): result of `polyfill(..., compact=True)`,
+                with the tiles in the `quadkey` column, as strings or integer quadkeys.
+            zoom_level (int): zoom level of the tiles. It must not be lower than the zoom
+                level of any tile.
+
+        Returns:
+            geopandas.GeoDataFrame with the same columns and a row per tile of the zoom level,
+            in the order of the input tiles. The quadkeys have the same type as the input.
+
+        Raises:
+            ValueError: if the dataframe has no valid geometry or quadkey column, or the
+                zoom level is not valid.
+
+        """
+        if not hasattr(input_gdf, 'geometry') or 'quadkey' not in input_gdf:
+            raise ValueError('This dataframe has no valid geometry and quadkey columns.')
+
+        if is_integer_dtype(input_gdf['quadkey']):
+            quadkey_type = 'int'
+            tiles_x, tiles_y, tiles_z = quadints_to_tiles(input_gdf['quadkey'].values)
+        else:
+            quadkey_type = 'string'
+            tiles_x, tiles_y, tiles_z = quadkeys_to_tiles(input_gdf['quadkey'].values)
+
+        if len(tiles_z) and tiles_z.max() > zoom_level:
+            raise ValueError('Wrong zoom level. You should provide a zoom level >= {}.'.format(tiles_z.max()))
+
+        index, tiles_x, tiles_y = _expand_tiles(np.arange(len(input_gdf)), tiles_x, tiles_y, tiles_z, zoom_level)
+
+        return _build_tiles_gdf(input_gdf, index, tiles_x, tiles_y, zoom_level, quadkey_type)
+
+    def aggregate(self, input_df, zoom_level, aggs=None, lng_col=None, lat_col=None, quadkey_type='string'):
+        """Aggregate the points of a DataFrame into the tiles of a zoom level.
+
+        The tiles of the points are computed with vectorized Web Mercator math on the arrays
+        of longitudes and latitudes, and the points are grouped by tile.
+
+        Args:
+            input_df (geopandas.GeoDataFrame, pandas.DataFrame): data with point geometries,
+                or with longitude and latitude columns.
+            zoom_level (int): zoom level of the tiles.
+            aggs (dict, optional): aggregations per column, as a function or a list of functions
+                accepted by `pandas.DataFrame.agg`. E.g., `{'speed': ['mean', 'max'], 'id': 'count'}`.
+            lng_col (str, optional): name of the longitude column. If provided with `lat_col`,
+                the coordinates are read from these columns instead of the geometry, which
+                is faster for large datasets.
+            lat_col (str, optional): name of the latitude column.
+            quadkey_type (str, optional): type of the `quadkey` column: 'string', or 'int' for
+                uint64 integer quadkeys up to zoom level 29. Default is 'string'.
+
+        Returns:
+            geopandas.GeoDataFrame with a row per tile with points, sorted by tile x and y
+            (not by quadkey) with both quadkey types, with the `quadkey` of the tile, the number
+            of points in `count`, a `{column}_{function}` column per aggregation and the polygon
+            of the tile in `geometry`.
+
+        Raises:
+            ValueError: if the dataframe has no valid geometry or coordinate columns,
+                the geometries are not points or the aggregations or quadkey_type are not valid,
+                or the zoom level is higher than 29 with 'int' quadkeys.
+
+        """
+        _check_quadkey_type(quadkey_type, zoom_level)
+
+        aggs = aggs or {}
+        if not isinstance(aggs, dict) or any(column not in input_df for column in aggs):
+            raise ValueError('Wrong aggregations. You should provide a dict of existing columns and functions.')
+
+        valid, keys = _point_tile_keys(input_df, zoom_level, lng_col, lat_col)
+
+        df = DataFrame({column: input_df[column].values[valid] for column in aggs}, index=np.arange(len(keys)))
+        groups = df.groupby(keys, sort=True)
+        result = DataFrame({'count': groups.size()})
+
+        if aggs:
+            stats = groups.agg({column: _to_list(funcs) for column, funcs in aggs.items()})
+            stats.columns = ['{}_{}'.format(column, func) for column, func in stats.columns]
+            result = result.join(stats)
+
+        keys = result.index.values
+        tiles_x, tiles_y = keys >> zoom_level, keys & ((1 << zoom_level) - 1)
+        result = result.reset_index(drop=True)
+        result.insert(0, 'quadkey', _encode_quadkeys(tiles_x, tiles_y, zoom_level, quadkey_type))
+        result['geometry'] = tile_polygons(tiles_x, tiles_y, zoom_level)
+
+        return GeoDataFrame(result, geometry='geometry', crs='epsg:4326')
+
+    def pyramid(self, input_df, zoom_levels, aggs=None, lng_col=None, lat_col=None):
+        """Aggregate the points of a DataFrame into the tiles of several zoom levels.
+
+        The points are aggregated once, at the finest zoom level, and the partial aggregations
+        are rolled up to the coarser zoom levels by truncating the tiles.
+
+        Args:
+            input_df (geopandas.GeoDataFrame, pandas.DataFrame): data with point geometries,
+                or with longitude and latitude columns.
+            zoom_levels (list): zoom levels of the pyramid.
+            aggs (dict, optional): aggregations per column, as a function name or a list of
+                function names. The supported functions are 'count', 'sum', 'mean', 'min' and 'max'.
+            lng_col (str, optional): name of the longitude column. If provided with `lat_col`,
+                the coordinates are read from these columns instead of the geometry.
+            lat_col (str, optional): name of the latitude column.
+
+        Returns:
+            :py:class:`QuadPyramid <cartoframes.analysis.grid.QuadPyramid>` with the aggregations
+            indexed by (zoom, quadkey), with the same columns as
+            :py:meth:`aggregate <cartoframes.analysis.grid.QuadGrid.aggregate>`.
+
+        Raises:
+            ValueError: if the dataframe has no valid geometry or coordinate columns,
+                or the zoom levels or aggregations are not valid.
+
+        """
+        if not zoom_levels or any(not isinstance(zoom, int) or not 0 <= zoom <= MAX_ZOOM_LEVEL
+                                  for zoom in zoom_levels):
+            raise ValueError('Wrong zoom levels. You should provide a list of integers between 0 and {}.'.format(
+                MAX_ZOOM_LEVEL))
+
+        aggs = {column: _to_list(funcs) for column, funcs in (aggs or {}).items()}
+        if any(column not in input_df for column in aggs) or \
+           any(func not in PYRAMID_AGGREGATIONS for funcs in aggs.values() for func in funcs):
+            raise ValueError('Wrong aggregations. You should provide a dict of existing columns and {}.'.format(
+                PYRAMID_AGGREGATIONS))
+
+        zoom_levels = sorted(set(zoom_levels), reverse=True)
+        valid, keys = _point_tile_keys(input_df, zoom_levels[0], lng_col, lat_col)
+
+        # Partial aggregations that can be rolled up
+        partials = {column: sorted(set(partial for func in funcs for partial in PARTIAL_AGGREGATIONS[func]))
+                    for column, funcs in aggs.items()}
+        df = DataFrame({column: input_df[column].values[valid] for column in aggs}, index=np.arange(len(keys)))
+        groups = df.groupby(keys, sort=True)
+        stats = DataFrame({('', 'count'): groups.size()})
+        if partials:
+            stats = stats.join(groups.agg(partials))
+
+        levels = []
+        zoom = zoom_levels[0]
+        for level in zoom_levels:
+            if level != zoom:
+                shift = zoom - level
+                keys = stats.index.values
+                parent_keys = _tile_key(keys >> zoom >> shift, (keys & ((1 << zoom) - 1)) >> shift, level)
+                stats = stats.groupby(parent_keys, sort=True).agg(
+                    {column: ROLLUP_AGGREGATIONS[column[1]] for column in stats.columns})
+                zoom = level
+            levels.append(_pyramid_level(stats, zoom, aggs))
+
+        # Ascending zoom levels, keeping the tiles of each level sorted by tile like `aggregate`
+        return QuadPyramid(concat(levels[::-1]))
+
+    def sjoin(self, left_gdf, right_gdf, zoom_level=None, op='intersects', workers=None,
+              lsuffix='left', rsuffix='right'):
+        """Spatial join of two GeoDataFrames through a quadkey index.
+
+        Each geometry is indexed by the tiles covering its bounding box, at `zoom_level` or
+        at a coarser zoom level for large geometries, so each geometry has up to 4 tiles.
+        The candidate pairs are the geometries with the same tile, or a tile and its parent,
+        and the predicate is only tested on them. The geometries with a lot of candidates
+        are prepared, and the candidates can be tested in parallel processes.
+
+        Args:
+            left_gdf (geopandas.GeoDataFrame): left data.
+            right_gdf (geopandas.GeoDataFrame): right data.
+            zoom_level (int, optional): zoom level of the index. By default, it is computed
+                from the median size of the geometries.
+            op (str, optional): predicate tested on each pair of left and right geometries:
+                'intersects', 'contains' or 'within'. Default is 'intersects'.
+            workers (int, optional): number of processes testing the candidate pairs.
+            lsuffix (str, optional): suffix of the left columns with the same name in both dataframes.
+            rsuffix (str, optional): suffix of the right columns with the same name in both dataframes.
+
+        Returns:
+            geopandas.GeoDataFrame with a row per matching pair, like `geopandas.sjoin(..., how='inner')`:
+            the left columns and index, the index of the right row in `index_right` and the
+            right columns, without the right geometry. The rows are sorted by left and right position.
+
+        Raises:
+            ValueError: if the dataframes have no valid geometry, or the op or workers params are not valid.
+
+        """
+        if not hasattr(left_gdf, 'geometry') or not hasattr(right_gdf, 'geometry'):
+            raise ValueError('This dataframe has no valid geometry.')
+
+        if op not in SJOIN_PREDICATES:
+            raise ValueError('Wrong op. You should provide one of {}.'.format(SJOIN_PREDICATES))
+
+        if workers is not None and (not isinstance(workers, int) or workers < 1):
+            raise ValueError('Wrong number of workers. You should provide an integer >= 1.')
+
+        left_bounds = left_gdf.geometry.bounds.values
+        right_bounds = right_gdf.geometry.bounds.values
+
+        if zoom_level is None:
+            zoom_level = _sjoin_zoom_level(left_bounds, right_bounds)
+
+        left_positions, right_positions = _candidate_pairs(
+            _index_tiles(left_bounds, zoom_level), _index_tiles(right_bounds, zoom_level), len(right_gdf))
+
+        # Discard the pairs with disjoint bounding boxes before testing the geometries
+        overlap = _bounds_overlap(left_bounds[left_positions], right_bounds[right_positions])
+        left_positions, right_positions = left_positions[overlap], right_positions[overlap]
+
+        if len(np.unique(right_positions)) < len(np.unique(left_positions)):
+            # Test the pairs from the right geometries, so fewer geometries are prepared
+            order = np.lexsort((left_positions, right_positions))
+            matches = np.empty(len(order), dtype=bool)
+            matches[order] = _test_pairs(list(right_gdf.geometry), list(left_gdf.geometry),
+                                         right_positions[order], left_positions[order], SJOIN_CONVERSE[op], workers)
+        else:
+            matches = _test_pairs(list(left_gdf.geometry), list(right_gdf.geometry),
+                                  left_positions, right_positions, op, workers)
+        left_positions, right_positions = left_positions[matches], right_positions[matches]
+
+        left_df = DataFrame(left_gdf).take(left_positions)
+        right_df = DataFrame(right_gdf).drop(columns=[right_gdf.geometry.name]).take(right_positions)
+        right_df.insert(0, 'index_right', right_df.index)
+
+        common = left_df.columns.intersection(right_df.columns)
+        left_df = left_df.rename(columns={column: '{}_{}'.format(column, lsuffix) for column in common})
+        right_df = right_df.rename(columns={column: '{}_{}'.format(column, rsuffix) for column in common})
+
+        for column in right_df.columns:
+            left_df[column] = right_df[column].values
+
+        return GeoDataFrame(left_df, geometry=left_gdf.geometry.name, crs=left_gdf.crs)
+
+    def _polyfill_chunks(self, input_gdf, zoom_level, workers, chunksize, compact, quadkey_type):
+        chunks = (input_gdf.iloc[start:start + chunksize] for start in range(0, len(input_gdf), chunksize))
+
+        if workers is None or workers == 1:
+            results = (_polyfill(chunk, zoom_level, compact, quadkey_type) for chunk in chunks)
+        else:
+            results = _imap_bounded(_polyfill_chunk, ((chunk, zoom_level, compact, quadkey_type) for chunk in chunks),
+                                    workers)
+
+        offset = 0
+        for result in results:
+            # Continue the index of the previous chunk
+            result.index += offset
+            offset += len(result)
+            yield result
+
+
+class QuadPyramid:
+    """Aggregations of points into the tiles of several zoom levels.
+
+    It is created with :py:meth:`pyramid <cartoframes.analysis.grid.QuadGrid.pyramid>`.
+
+    Args:
+        data (pandas.DataFrame): aggregations indexed by (zoom, quadkey).
+
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @property
+    def zoom_levels(self):
+        """List of zoom levels of the pyramid."""
+        return self.data.index.get_level_values('zoom').unique().tolist()
+
+    def query(self, zoom_level, bbox=None):
+        """Get the tiles of a zoom level, optionally within a bounding box.
+
+        Args:
+            zoom_level (int): zoom level of the pyramid.
+            bbox (tuple, optional): (west, south, east, north) bounds. By default,
+                all the tiles of the zoom level are returned.
+
+        Returns:
+            geopandas.GeoDataFrame with a row per tile with points, sorted by tile like
+            :py:meth:`aggregate <cartoframes.analysis.grid.QuadGrid.aggregate>`, with the
+            `quadkey` of the tile, the aggregations and the polygon of the tile in `geometry`.
+
+        Raises:
+            ValueError: if the zoom level is not in the pyramid.
+
+        """
+        if zoom_level not in self.zoom_levels:
+            raise ValueError('Wrong zoom level. You should provide one of {}.'.format(self.zoom_levels))
+
+        result = self.data.xs(zoom_level, level='zoom')
+
+        if bbox is not None:
+            min_x, min_y, max_x, max_y = [int(value[0]) for value in bbox_to_tile_range([bbox], zoom_level)]
+            size = (max_x - min_x + 1) * (max_y - min_y + 1)
+
+            if size < len(result):
+                # Look up the tiles of the bounding box
+                tiles_x, tiles_y = np.meshgrid(np.arange(min_x, max_x + 1), np.arange(min_y, max_y + 1),
+                                               indexing='ij')
+                quadkeys = tile_quadkeys(tiles_x.ravel(), tiles_y.ravel(), zoom_level)
+                positions = result.index.get_indexer(quadkeys)
+                result = result.iloc[np.sort(positions[positions >= 0])]
+            else:
+                tiles_x, tiles_y, _ = quadkeys_to_tiles(result.index.values)
+                result = result[(tiles_x >= min_x) & (tiles_x <= max_x) & (tiles_y >= min_y) & (tiles_y <= max_y)]
+
+        tiles_x, tiles_y, _ = quadkeys_to_tiles(result.index.values)
+        result = result.reset_index()
+        result['geometry'] = tile_polygons(tiles_x, tiles_y, zoom_level)
+
+        return GeoDataFrame(result, geometry='geometry', crs='epsg:4326')
+
+
+def _point_tile_keys(input_df, zoom_level, lng_col, lat_col):
+    """Get the mask of the points with coordinates and the keys of their tiles"""
+    lng, lat = _get_lnglat(input_df, lng_col, lat_col)
+    valid = ~(np.isnan(lng) | np.isnan(lat))
+    tiles_x, tiles_y = lnglat_to_tile(lng[valid], lat[valid], zoom_level)
+    return valid, _tile_key(tiles_x, tiles_y, zoom_level)
+
+
+def _pyramid_level(stats, zoom, aggs):
+    keys = stats.index.values
+    result = DataFrame({'count': stats[('', 'count')].values})
+
+    for column, funcs in aggs.items():
+        for func in funcs:
+            if func == 'mean':
+                values = stats[(column, 'sum')].values / stats[(column, 'count')].values
+            else:
+                values = stats[(column, func)].values
+            result['{}_{}'.format(column, func)] = values
+
+    result.index = MultiIndex.from_arrays(
+        [np.full(len(keys), zoom), tile_quadkeys(keys >> zoom, keys & ((1 << zoom) - 1), zoom)],
+        names=['zoom', 'quadkey'])
+
+    return result
+
+
+def _get_lnglat(input_df, lng_col, lat_col):
+    if lng_col is not None and lat_col is not None:
+        if lng_col not in input_df or lat_col not in input_df:
+            raise ValueError('Wrong coordinate columns. You should provide existing columns.')
+        return (input_df[lng_col].values.astype(np.float64),
+                input_df[lat_col].values.astype(np.float64))
+
+    if not hasattr(input_df, 'geometry'):
+        raise ValueError('This dataframe has no valid geometry.')
+
+    # The bounds of a point are its coordinates, and NaN for null or empty geometries
+    bounds = input_df.geometry.bounds
+    lng, lat = bounds['minx'].values, bounds['miny'].values
+
+    if not (input_df.geometry.geom_type[~np.isnan(lng)] == 'Point').all():
+        raise ValueError('Wrong geometry type. You should provide a dataframe with point geometries.')
+
+    return lng, lat
+
+
+def _to_list(value):
+    return value if isinstance(value, list) else [value]
+
+
+def _check_quadkey_type(quadkey_type, zoom_level):
+    if quadkey_type not in QUADKEY_TYPES:
+        raise ValueError('Wrong quadkey type. You should provide one of {}.'.format(QUADKEY_TYPES))
+
+    if quadkey_type == 'int':
+        check_quadint_zoom(zoom_level)
+
+
+def _encode_quadkeys(tiles_x, tiles_y, tiles_z, quadkey_type):
+    if quadkey_type == 'int':
+        return tile_quadints(tiles_x, tiles_y, tiles_z)
+    return tile_quadkeys(tiles_x, tiles_y, tiles_z)
+
+
+def _polyfill(input_gdf, zoom_level, compact=False, quadkey_type='string'):
+    index, tiles_x, tiles_y, tiles_z = _polyfill_tiles(input_gdf.geometry.values, zoom_level, compact)
+    return _build_tiles_gdf(input_gdf, index, tiles_x, tiles_y, tiles_z, quadkey_type)
+
+
+def _build_tiles_gdf(input_gdf, index, tiles_x, tiles_y, tiles_z, quadkey_type='string'):
+    geometry_name = input_gdf.geometry.name
+
+    # The attributes are repeated once, at the end, for all the tiles
+    df = DataFrame(input_gdf).drop(columns=[geometry_name]).take(index).reset_index(drop=True)
+    df.insert(input_gdf.columns.get_loc(geometry_name), geometry_name,
+              tile_polygons(tiles_x, tiles_y, tiles_z))
+    df['quadkey'] = _encode_quadkeys(tiles_x, tiles_y, tiles_z, quadkey_type)
+
+    return GeoDataFrame(df, geometry=geometry_name, crs='epsg:4326')
+
+
+def _polyfill_chunk(args):
+    return _polyfill(*args)
+
+
+def _imap_bounded(func, iterable, workers, initializer=None, initargs=()):
+    """Map a function in a process pool, yielding the results in order. The number
+    of results waiting to be consumed is bounded to keep the memory usage stable."""
+    max_pending = workers * CHUNKS_PER_WORKER
+    pool = Pool(workers, initializer=initializer, initargs=initargs)
+    try:
+        pending = deque()
+        for args in iterable:
+            pending.append(pool.apply_async(func, (args,)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+
+
+def _polyfill_tiles(geometries, zoom, compact=False):
+    """Compute the tiles intersected by each geometry.
+
+    Returns:
+        tuple with the arrays of geometry positions, x, y and z tile coordinates, sorted
+        by geometry, x and y. The z coordinate is the zoom level, unless `compact` is True.
+
+    """
+    tiles = []
+    for position, geometry in enumerate(geometries):
+        if geometry is None or geometry.is_empty:
+            continue
+        for tile in _cover_geometry(geometry, zoom):
+            tiles.append((position,) + tile)
+
+    if not tiles:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty, empty
+
+    positions, tiles_x, tiles_y, tiles_z = np.array(tiles, dtype=np.int64).T
+
+    if compact:
+        # Sort the parent tiles by their first child tile of the zoom level
+        shifts = zoom - tiles_z
+        order = np.lexsort((tiles_y << shifts, tiles_x << shifts, positions))
+        return positions[order], tiles_x[order], tiles_y[order], tiles_z[order]
+
+    positions, tiles_x, tiles_y = _expand_tiles(positions, tiles_x, tiles_y, tiles_z, zoom)
+    order = np.lexsort((tiles_y, tiles_x, positions))
+
+    return positions[order], tiles_x[order], tiles_y[order], np.full(len(order), zoom, dtype=np.int64)
+
+
+def _cover_geometry(geometry, zoom):
+    """Get the tiles intersected by a geometry, with the tiles fully contained in the geometry
+    merged into their largest contained parent tile.
+
+    The tiles of the bounding box are tested level by level in a quadtree, starting at the
+    zoom level where the bounding box is covered by a few tiles: tiles outside the geometry
+    are discarded, tiles inside the geometry are kept and only the tiles in the boundary
+    are subdivided. So the number of tests grows with the perimeter of the geometry
+    instead of its area.
+
+    Returns:
+        list of (x, y, z) tiles.
+
+    """
+    min_x, min_y, max_x, max_y = [int(value[0]) for value in bbox_to_tile_range([geometry.bounds], zoom)]
+
+    size = max(max_x - min_x, max_y - min_y) + 1
+    z = max(0, zoom - int(np.ceil(np.log2(size))))
+    shift = zoom - z
+
+    xs, ys = np.meshgrid(np.arange(min_x >> shift, (max_x >> shift) + 1),
+                         np.arange(min_y >> shift, (max_y >> shift) + 1), indexing='ij')
+    xs, ys = xs.ravel(), ys.ravel()
+
+    prepared = prep(geometry)
+    tiles = []
+
+    while len(xs):
+        covered = np.zeros(len(xs), dtype=bool)
+        boundary = np.zeros(len(xs), dtype=bool)
+        for i, tile in enumerate(tile_polygons(xs, ys, z)):
+            if prepared.intersects(tile):
+                if z == zoom or prepared.contains(tile):
+                    covered[i] = True
+                else:
+                    boundary[i] = True
+
+        tiles.extend((x, y, z) for x, y in zip(xs[covered].tolist(), ys[covered].tolist()))
+
+        if z == zoom:
+            break
+
+        # Subdivide the tiles in the boundary, keeping the children inside the bounding box
+        xs = (2 * xs[boundary, None] + [0, 0, 1, 1]).ravel()
+        ys = (2 * ys[boundary, None] + [0, 1, 0, 1]).ravel()
+        z += 1
+        shift = zoom - z
+        inside = (xs >= min_x >> shift) & (xs <= max_x >> shift) & (ys >= min_y >> shift) & (ys <= max_y >> shift)
+        xs, ys = xs[inside], ys[inside]
+
+    return tiles
+
+
+def _expand_tiles(positions, tiles_x, tiles_y, tiles_z, zoom):
+    """Expand tiles into arrays of their children tiles of a zoom level"""
+    sizes = np.left_shift(1, zoom - tiles_z)
+    counts = sizes * sizes
+
+    tile_index = np.repeat(np.arange(len(positions)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    sizes = sizes[tile_index]
+    children_x = tiles_x[tile_index] * sizes + offsets // sizes
+    children_y = tiles_y[tile_index] * sizes + offsets % sizes
+
+    return positions[tile_index], children_x, children_y
+
+
+def _sjoin_zoom_level(left_bounds, right_bounds):
+    """Get the zoom level where the tiles have the median size of the geometries"""
+    sizes = np.concatenate([
+        np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+        for bounds in (left_bounds, right_bounds)
+    ])
+    sizes = sizes[sizes > 0]
+
+    if len(sizes) == 0:
+        return MAX_SJOIN_ZOOM_LEVEL
+
+    zoom = int(np.floor(np.log2(360.0 / np.median(sizes))))
+    return min(max(zoom, 0), MAX_SJOIN_ZOOM_LEVEL)
+
+
+def _index_tiles(bounds, zoom):
+    """Get the tiles indexing each bounding box: the tiles of the zoom level,
+    or of the zoom level where the bounding box is covered by up to 2x2 tiles.
+
+    Returns:
+        tuple with the arrays of positions, x, y and z tile coordinates.
+
+    """
+    positions = np.flatnonzero(~np.isnan(bounds).any(axis=1))
+    # Closed ranges, so geometries touching each other share a tile
+    min_x, min_y, max_x, max_y = bbox_to_tile_range(bounds[positions], zoom, closed=True)
+
+    size = np.maximum(max_x - min_x, max_y - min_y) + 1
+    shifts = np.maximum(np.ceil(np.log2(size)).astype(np.int64) - 1, 0)
+    spans = np.maximum((max_x >> shifts) - (min_x >> shifts), (max_y >> shifts) - (min_y >> shifts))
+    shifts = np.minimum(np.where(spans > 1, shifts + 1, shifts), zoom)
+    tiles_z = zoom - shifts
+
+    index, tiles_x, tiles_y = [], [], []
+    for dx in (0, 1):
+        for dy in (0, 1):
+            x = (min_x >> shifts) + dx
+            y = (min_y >> shifts) + dy
+            mask = (x <= max_x >> shifts) & (y <= max_y >> shifts)
+            index.append(np.flatnonzero(mask))
+            tiles_x.append(x[mask])
+            tiles_y.append(y[mask])
+
+    index = np.concatenate(index)
+    return positions[index], np.concatenate(tiles_x), np.concatenate(tiles_y), tiles_z[index]
+
+
+def _candidate_pairs(left_tiles, right_tiles, right_size):
+    """Get the unique pairs of left and right positions with the same tile,
+    or with a tile and one of its parents, sorted by left and right position"""
+    pairs = []
+
+    for parent_tiles, child_tiles, reverse in [(left_tiles, right_tiles, False), (right_tiles, left_tiles, True)]:
+        parent_positions, parent_x, parent_y, parent_z = parent_tiles
+        child_positions, child_x, child_y, child_z = child_tiles
+
+        for level in np.unique(parent_z):
+            mask = parent_z == level
+            # Children of the same level are matched only once, from the left
+            children = child_z > level if reverse else child_z >= level
+            shifts = child_z[children] - level
+
+            parents = DataFrame({
+                'key': _tile_key(parent_x[mask], parent_y[mask], level),
+                'parent': parent_positions[mask]
+            })
+            candidates = DataFrame({
+                'key': _tile_key(child_x[children] >> shifts, child_y[children] >> shifts, level),
+                'child': child_positions[children]
+            })
+            merged = parents.merge(candidates, on='key')
+
+            if reverse:
+                pairs.append(merged[['child', 'parent']].values)
+            else:
+                pairs.append(merged[['parent', 'child']].values)
+
+    pairs = np.concatenate(pairs).astype(np.int64) if pairs else np.empty((0, 2), dtype=np.int64)
+    keys = np.unique(pairs[:, 0] * right_size + pairs[:, 1])
+
+    return keys // right_size, keys % right_size
+
+
+def _bounds_overlap(left_bounds, right_bounds):
+    return ((left_bounds[:, 0] <= right_bounds[:, 2]) & (right_bounds[:, 0] <= left_bounds[:, 2]) &
+            (left_bounds[:, 1] <= right_bounds[:, 3]) & (right_bounds[:, 1] <= left_bounds[:, 3]))
+
+
+def _tile_key(tiles_x, tiles_y, zoom):
+    return (tiles_x.astype(np.int64) << zoom) | tiles_y.astype(np.int64)
+
+
+def _test_pairs(left_geometries, right_geometries, left_positions, right_positions, op, workers):
+    """Test the predicate on the pairs of geometries, in parallel processes if there are several workers"""
+    if workers is None or workers == 1 or len(left_positions) <= SJOIN_CHUNKSIZE:
+        return _test_pairs_chunk(left_geometries, right_geometries, left_positions, right_positions, op)
+
+    chunks = [(start, start + SJOIN_CHUNKSIZE) for start in range(0, len(left_positions), SJOIN_CHUNKSIZE)]
+    results = _imap_bounded(_test_pairs_worker, chunks, workers, initializer=_init_sjoin_worker,
+                            initargs=(left_geometries, right_geometries, left_positions, right_positions, op))
+
+    return np.concatenate(list(results))
+
+
+def _init_sjoin_worker(left_geometries, right_geometries, left_positions, right_positions, op):
+    _worker_data['args'] = (left_geometries, right_geometries, left_positions, right_positions, op)
+
+
+def _test_pairs_worker(bounds):
+    start, stop = bounds
+    left_geometries, right_geometries, left_positions, right_positions, op = _worker_data['args']
+    return _test_pairs_chunk(left_geometries, right_geometries,
+                             left_positions[start:stop], right_positions[start:stop], op)
+
+
+def _test_pairs_chunk(left_geometries, right_geometries, left_positions, right_positions, op):
+    """Test the predicate on the pairs of geometries, sorted by left position. The left
+    geometries with several candidates are prepared before testing them."""
+    matches = np.zeros(len(left_positions), dtype=bool)
+    starts = np.flatnonzero(np.r_[True, left_positions[1:] != left_positions[:-1]])
+    stops = np.r_[starts[1:], len(left_positions)]
+
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        geometry = left_geometries[left_positions[start]]
+        predicate = getattr(prep(geometry) if stop - start > 1 else geometry, op)
+        for i in range(start, stop):
+            matches[i] = predicate(right_geometries[right_positions[i]])
+
+    return matches
@@ -0,0 +1,328 @@
+"""Vectorized Web Mercator tile math.
+
+The functions work with NumPy arrays of coordinates and tiles and follow the
+conventions of `mercantile`, so the results are the same tile by tile.
+"""
+
+import numpy as np
+
+from shapely.geometry import box
+
+# Latitude limits of the Web Mercator projection
+MAX_LATITUDE = 85.051129
+MAX_LONGITUDE = 180.0
+# Points within EPSILON of the right or bottom side of a tile are counted in the next tile
+EPSILON = 1e-14
+# Offset applied to the east and south sides of a bounding box, so the bounds
+# of a tile are covered by that tile only
+LL_EPSILON = 1e-11
+
+
+def lnglat_to_tile(lng, lat, zoom):
+    """Get the tiles containing arrays of longitudes and latitudes.
+
+    Args:
+        lng (numpy.array): longitudes in decimal degrees.
+        lat (numpy.array): latitudes in decimal degrees.
+        zoom (int): zoom level.
+
+    Returns:
+        tuple with the arrays of x and y tile coordinates.
+
+    """
+    x = np.asarray(lng, dtype=np.float64) / 360.0 + 0.5
+    sinlat = np.sin(np.radians(np.asarray(lat, dtype=np.float64)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = 0.5 - 0.25 * np.log((1.0 + sinlat) / (1.0 - sinlat)) / np.pi
+
+    return _to_tile_coord(x, zoom), _to_tile_coord(y, zoom)
+
+
+def _to_tile_coord(value, zoom):
+    max_coord = 2 ** zoom - 1
+    coord = np.floor((value + EPSILON) * (max_coord + 1))
+    coord = np.where(value <= 0, 0, np.where(value >= 1, max_coord, coord))
+    return coord.astype(np.int64)
+
+
+def bbox_to_tile_range(bounds, zoom, closed=False):
+    """Get the range of tiles overlapped by arrays of bounding boxes.
+
+    Args:
+        bounds (numpy.array): (N, 4) array of west, south, east, north bounds.
+        zoom (int): zoom level.
+        closed (bool, optional): if True, the tiles of the east and south sides are included,
+            so the ranges of bounding boxes touching each other overlap. Default is False.
+
+    Returns:
+        tuple with the arrays of min x, min y, max x and max y tile coordinates. The range of
+        a degenerate bounding box (a point or an axis-aligned line) has at least one tile.
+
+    """
+    bounds = np.asarray(bounds, dtype=np.float64)
+    west = np.maximum(-MAX_LONGITUDE, bounds[:, 0])
+    south = np.maximum(-MAX_LATITUDE, bounds[:, 1])
+    east = np.minimum(MAX_LONGITUDE, bounds[:, 2])
+    north = np.minimum(MAX_LATITUDE, bounds[:, 3])
+
+    epsilon = 0 if closed else LL_EPSILON
+    min_x, min_y = lnglat_to_tile(west, north, zoom)
+    max_x, max_y = lnglat_to_tile(east - epsilon, south + epsilon, zoom)
+
+    # Degenerate bounds on a tile edge would get an empty range
+    return min_x, min_y, np.maximum(max_x, min_x), np.maximum(max_y, min_y)
+
+
+def tile_bounds(x, y, zoom):
+    """Get the bounds of arrays of tiles.
+
+    Args:
+        x (numpy.array): x tile coordinates.
+        y (numpy.array): y tile coordinates.
+        zoom (int or numpy.array): zoom level of the tiles.
+
+    Returns:
+        tuple with the arrays of west, south, east and north bounds.
+
+    """
+    z2 = np.power(2.0, zoom)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    west = x / z2 * 360.0 - 180.0
+    east = (x + 1) / z2 * 360.0 - 180.0
+    north = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / z2))))
+    south = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / z2))))
+
+    return west, south, east, north
+
+
+def tile_polygons(x, y, zoom):
+    """Get the polygons of arrays of tiles as a list of shapely boxes."""
+    west, south, east, north = tile_bounds(x, y, zoom)
+    return [box(*bounds) for bounds in zip(west.tolist(), south.tolist(), east.tolist(), north.tolist())]
+
+
+def tile_quadkeys(x, y, zoom):
+    """Get the quadkeys of arrays of tiles.
+
+    Args:
+        x (numpy.array): x tile coordinates.
+        y (numpy.array): y tile coordinates.
+        zoom (int or numpy.array): zoom level of the tiles.
+
+    Returns:
+        numpy.array of quadkey strings.
+
+    """
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+
+    if np.ndim(zoom) > 0:
+        zoom = np.asarray(zoom, dtype=np.int64)
+        quadkeys = np.empty(len(x), dtype=object)
+        for level in np.unique(zoom):
+            mask = zoom == level
+            quadkeys[mask] = tile_quadkeys(x[mask], y[mask], int(level))
+        return quadkeys
+
+    if zoom == 0:
+        return np.full(len(x), '', dtype=object)
+
+    shifts = np.arange(zoom - 1, -1, -1, dtype=np.int64)
+    digits = ((x[:, None] >> shifts) & 1) + 2 * ((y[:, None] >> shifts) & 1)
+    chars = (digits + ord('0')).astype(np.uint8)
+
+    return chars.view('S{}'.format(zoom)).ravel().astype(str).astype(object)
+
+
+def quadkeys_to_tiles(quadkeys):
+    """Get the tiles of an array of quadkeys.
+
+    Args:
+        quadkeys (numpy.array): quadkey strings, of any zoom level.
+
+    Returns:
+        tuple with the arrays of x, y and z tile coordinates.
+
+    """
+    quadkeys = np.asarray(quadkeys, dtype=str)
+    zoom = np.char.str_len(quadkeys).astype(np.int64)
+    x = np.zeros(len(quadkeys), dtype=np.int64)
+    y = np.zeros(len(quadkeys), dtype=np.int64)
+
+    for level in np.unique(zoom):
+        if level == 0:
+            continue
+        mask = zoom == level
+        digits = quadkeys[mask].astype('S{}'.format(level)).view(np.uint8).reshape(-1, level).astype(np.int64)
+        digits -= ord('0')
+        shifts = np.arange(level - 1, -1, -1, dtype=np.int64)
+        x[mask] = ((digits & 1) << shifts).sum(axis=1)
+        y[mask] = (((digits >> 1) & 1) << shifts).sum(axis=1)
+
+    return x, y, zoom
+
+
+# Integer quadkeys (quadints): the Morton code of the tile, aligned to MAX_QUADINT_ZOOM_LEVEL,
+# followed by the zoom level in the lowest QUADINT_ZOOM_BITS bits. The order of the quadints
+# is the order of the quadkeys, so the children of a tile are a contiguous range
+MAX_QUADINT_ZOOM_LEVEL = 29
+QUADINT_ZOOM_BITS = 5
+# Value of the neighbors outside the Web Mercator limits
+INVALID_QUADINT = np.iinfo(np.uint64).max
+
+_SPREAD_MASKS = [(16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                 (2, 0x3333333333333333), (1, 0x5555555555555555)]
+_COMPACT_MASKS = [(1, 0x3333333333333333), (2, 0x0F0F0F0F0F0F0F0F), (4, 0x00FF00FF00FF00FF),
+                  (8, 0x0000FFFF0000FFFF), (16, 0x00000000FFFFFFFF)]
+
+
+def tile_quadints(x, y, zoom):
+    """Get the integer quadkeys of arrays of tiles.
+
+    Args:
+        x (numpy.array): x tile coordinates.
+        y (numpy.array): y tile coordinates.
+        zoom (int or numpy.array): zoom level of the tiles, up to MAX_QUADINT_ZOOM_LEVEL.
+
+    Returns:
+        numpy.array of uint64 quadints.
+
+    Raises:
+        ValueError: if the zoom level is higher than MAX_QUADINT_ZOOM_LEVEL.
+
+    """
+    check_quadint_zoom(zoom)
+
+    x = np.asarray(x).astype(np.uint64)
+    y = np.asarray(y).astype(np.uint64)
+    zoom = np.broadcast_to(np.asarray(zoom).astype(np.uint64), x.shape)
+
+    morton = _spread_bits(x) | (_spread_bits(y) << np.uint64(1))
+    aligned = morton << (np.uint64(2) * (np.uint64(MAX_QUADINT_ZOOM_LEVEL) - zoom))
+
+    return (aligned << np.uint64(QUADINT_ZOOM_BITS)) | zoom
+
+
+def quadints_to_tiles(quadints):
+    """Get the tiles of an array of integer quadkeys.
+
+    Returns:
+        tuple with the arrays of x, y and z tile coordinates.
+
+    """
+    quadints = np.asarray(quadints).astype(np.uint64)
+    zoom = quadints & np.uint64((1 << QUADINT_ZOOM_BITS) - 1)
+    morton = (quadints >> np.uint64(QUADINT_ZOOM_BITS)) >> \
+        (np.uint64(2) * (np.uint64(MAX_QUADINT_ZOOM_LEVEL) - zoom))
+
+    x = _compact_bits(morton)
+    y = _compact_bits(morton >> np.uint64(1))
+
+    return x.astype(np.int64), y.astype(np.int64), zoom.astype(np.int64)
+
+
+def quadkeys_to_quadints(quadkeys):
+    """Convert an array of quadkey strings into integer quadkeys."""
+    return tile_quadints(*quadkeys_to_tiles(quadkeys))
+
+
+def quadints_to_quadkeys(quadints):
+    """Convert an array of integer quadkeys into quadkey strings."""
+    return tile_quadkeys(*quadints_to_tiles(quadints))
+
+
+def quadint_parents(quadints, zoom=None):
+    """Get the parents of an array of integer quadkeys.
+
+    Args:
+        quadints (numpy.array): integer quadkeys.
+        zoom (int, optional): zoom level of the parents, not higher than the zoom level of the
+            quadkeys. By default, the parents of the previous zoom level.
+
+    Returns:
+        numpy.array of uint64 quadints.
+
+    """
+    quadints = np.asarray(quadints).astype(np.uint64)
+    zoom_mask = np.uint64((1 << QUADINT_ZOOM_BITS) - 1)
+    levels = quadints & zoom_mask
+
+    if zoom is None:
+        parent_levels = np.maximum(levels.astype(np.int64) - 1, 0).astype(np.uint64)
+    else:
+        parent_levels = np.minimum(levels, np.uint64(zoom))
+
+    # Clear the digits of the levels under the parent
+    shifts = np.uint64(QUADINT_ZOOM_BITS) + np.uint64(2) * (np.uint64(MAX_QUADINT_ZOOM_LEVEL) - parent_levels)
+    aligned = (quadints >> shifts) << shifts
+
+    return aligned | parent_levels
+
+
+def quadint_children(quadints):
+    """Get the children of an array of integer quadkeys.
+
+    Returns:
+        (N, 4) numpy.array of uint64 quadints, sorted.
+
+    Raises:
+        ValueError: if any quadkey is of the MAX_QUADINT_ZOOM_LEVEL zoom level.
+
+    """
+    quadints = np.asarray(quadints).astype(np.uint64)
+    zoom_mask = np.uint64((1 << QUADINT_ZOOM_BITS) - 1)
+    child_levels = (quadints & zoom_mask) + np.uint64(1)
+    check_quadint_zoom(child_levels)
+
+    shifts = np.uint64(QUADINT_ZOOM_BITS) + np.uint64(2) * (np.uint64(MAX_QUADINT_ZOOM_LEVEL) - child_levels)
+    aligned = (quadints & ~zoom_mask)[:, None]
+    digits = np.arange(4, dtype=np.uint64)[None, :] << shifts[:, None]
+
+    return aligned | digits | child_levels[:, None]
+
+
+def quadint_neighbors(quadints):
+    """Get the neighbors of an array of integer quadkeys, wrapping around the antimeridian.
+
+    Returns:
+        (N, 8) numpy.array of uint64 quadints with the N, NE, E, SE, S, SW, W and NW
+        neighbors. The neighbors outside the latitude limits are INVALID_QUADINT.
+
+    """
+    x, y, zoom = quadints_to_tiles(quadints)
+    size = np.left_shift(1, zoom)[:, None]
+
+    dx = np.array([0, 1, 1, 1, 0, -1, -1, -1])[None, :]
+    dy = np.array([-1, -1, 0, 1, 1, 1, 0, -1])[None, :]
+    neighbors_x = (x[:, None] + dx) % size
+    neighbors_y = y[:, None] + dy
+    valid = (neighbors_y >= 0) & (neighbors_y < size)
+
+    neighbors_zoom = np.broadcast_to(zoom[:, None], neighbors_x.shape)
+    neighbors = tile_quadints(neighbors_x, np.where(valid, neighbors_y, 0), neighbors_zoom)
+    neighbors[~valid] = INVALID_QUADINT
+
+    return neighbors
+
+
+def check_quadint_zoom(zoom):
+    """Check that zoom levels can be encoded in integer quadkeys."""
+    if np.size(zoom) and np.max(zoom) > MAX_QUADINT_ZOOM_LEVEL:
+        raise ValueError('Wrong zoom level. You should provide a zoom level <= {} for integer quadkeys.'.format(
+            MAX_QUADINT_ZOOM_LEVEL))
+
+
+def _spread_bits(values):
+    values = values & np.uint64(0xFFFFFFFF)
+    for shift, mask in _SPREAD_MASKS:
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def _compact_bits(values):
+    values = values & np.uint64(0x5555555555555555)
+    for shift, mask in _COMPACT_MASKS:
+        values = (values | (values >> np.uint64(shift))) & np.uint64(mask)
+    return values
@@ -1,6 +1,7 @@
 import os
 import csv
 import tqdm
+import tempfile
 import pandas as pd
 
 from google.auth.exceptions import RefreshError
@@ -10,11 +11,12 @@ from google.api_core.exceptions import DeadlineExceeded
 
 from ...auth import get_default_credentials
 from ...utils.logger import log
-from ...utils.utils import timelogger, is_ipython_notebook
+from ...utils.utils import timelogger, is_ipython_notebook, check_package
 from ...exceptions import DOError
 
 _GCS_CHUNK_SIZE = 25 * 1024 * 1024  # 25MB. This must be a multiple of 256 KB per the API specification.
 _BQS_TIMEOUT = 2 * 3600  # 2 hours in seconds
+_UPLOAD_SPOOL_SIZE = 256 * 1024 * 1024  # 256MB. Bigger uploads are spooled to a temporary file.
 
 
 def refresh_clients(func):
@@ -78,8 +80,8 @@ class BigQueryClient:
         return self.bq_client.query(query, **kwargs)
 
     def upload_dataframe(self, dataframe, schema, tablename):
-        self._upload_dataframe_to_GCS(dataframe, tablename)
-        self._import_from_GCS_to_BQ(schema, tablename)
+        source_format = self._upload_dataframe_to_GCS(dataframe, tablename)
+        self._import_from_GCS_to_BQ(schema, tablename, source_format)
 
     @timelogger
     def download_to_file(self, job, file_path, fail_if_exists=False, column_names=None, progress_bar=True):
@@ -143,15 +145,14 @@ class BigQueryClient:
         log.debug('Uploading to GCS')
         bucket = self.gcs_client.get_bucket(self._gcs_bucket)
         blob = bucket.blob(tablename, chunk_size=_GCS_CHUNK_SIZE)
-        dataframe.to_csv(tablename, index=False, header=False)
-        try:
-            blob.upload_from_filename(tablename)
-        finally:
-            os.remove(tablename)
+        with tempfile.SpooledTemporaryFile(max_size=_UPLOAD_SPOOL_SIZE) as data_file:
+            source_format = _write_upload_file(dataframe, data_file)
+            blob.upload_from_file(data_file, rewind=True)
+        return source_format
 
     @refresh_clients
     @timelogger
-    def _import_from_GCS_to_BQ(self, schema, tablename):
+    def _import_from_GCS_to_BQ(self, schema, tablename, source_format=bigquery.SourceFormat.CSV):
         log.debug('Importing to BQ from GCS')
 
         dataset_ref = self.bq_client.dataset(self.bq_dataset, project=self.bq_project)
@@ -160,7 +161,7 @@ class BigQueryClient:
 
         job_config = bigquery.LoadJobConfig()
         job_config.schema = schema_wrapped
-        job_config.source_format = bigquery.SourceFormat.CSV
+        job_config.source_format = source_format
         uri = 'gs://{bucket}/{tablename}'.format(bucket=self._gcs_bucket, tablename=tablename)
 
         job = self.bq_client.load_table_from_uri(
@@ -197,6 +198,25 @@ def _rows_to_file(rows, file_path, column_names=None, progress_bar=True):
                 pb.update(1)
 
 
+def _write_upload_file(dataframe, data_file):
+    """Write a DataFrame to be loaded in BigQuery: as Parquet, or as CSV if pyarrow is not installed.
+
+    Returns:
+        the BigQuery source format of the file.
+
+    """
+    try:
+        check_package('pyarrow', is_optional=True)
+    except Exception:
+        log.debug('Uploading data as CSV, install pyarrow to upload it as Parquet')
+        data_file.write(dataframe.to_csv(index=False, header=False).encode('utf-8'))
+        return bigquery.SourceFormat.CSV
+
+    # Plain DataFrame, so GeoDataFrames are not written as GeoParquet
+    pd.DataFrame(dataframe).to_parquet(data_file, index=False)
+    return bigquery.SourceFormat.PARQUET
+
+
 def _get_job_result(job, error_message):
     try:
         return job.result()
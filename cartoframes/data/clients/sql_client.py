@@ -13,6 +13,7 @@ class SQLClient:
         >>> sql = SQLClient(credentials)
         >>> sql.query('SELECT * FROM table_name')
         >>> sql.execute('DROP TABLE table_name')
+        >>> sql.submit('DROP TABLE table_name').result()
         >>> sql.distinct('table_name', 'column_name')
         >>> sql.count('table_name')
 
@@ -50,6 +51,22 @@ class SQLClient:
         """
         return self._context_manager.execute_long_running_query(query.strip())
 
+    def submit(self, query, callback=None):
+        """Run a long running query without waiting for it. It returns a future
+        resolved with the status and information of the job. The jobs of an account
+        are polled in a single loop, with a limit of jobs running at the same time.
+
+        Args:
+            query (str): SQL query.
+            callback (function, optional): function called with the future when the job finishes.
+
+        Example:
+            >>> futures = [sql.submit(query) for query in queries]
+            >>> results = [future.result() for future in futures]
+
+        """
+        return self._context_manager.submit_long_running_query(query.strip(), callback)
+
     def distinct(self, table_name, column_name):
         """Get the distict values and their count in a table
         for a specific column.
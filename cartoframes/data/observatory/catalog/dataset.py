@@ -13,6 +13,7 @@ from .summary import dataset_describe, head, tail, counts, fields_by_type, geom_
 from . import subscription_info
 from . import subscriptions
 from . import utils
+from ....analysis.grid import QuadGrid
 from ....utils.logger import log
 from ....utils.utils import get_credentials, check_credentials, check_do_enabled
 from ....exceptions import DOError
@@ -371,7 +372,7 @@ class Dataset(CatalogEntity):
 
     @staticmethod
     def _join_geographies_geodataframes(geographies_gdf1, geographies_gdf2):
-        join_gdf = gpd.sjoin(geographies_gdf1, geographies_gdf2, how='inner', op='intersects')
+        join_gdf = QuadGrid().sjoin(geographies_gdf1, geographies_gdf2, op='intersects')
         return join_gdf['id'].unique()
 
     @check_do_enabled
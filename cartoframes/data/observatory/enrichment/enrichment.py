@@ -1,4 +1,6 @@
-from .enrichment_service import EnrichmentService, prepare_variables, AGGREGATION_DEFAULT
+from .enrichment_service import EnrichmentService, AGGREGATION_DEFAULT, _prepare_variables
+from .local_enrichment import check_engine, enrich_points_locally, enrich_polygons_locally, ENGINE_BIGQUERY, \
+    ENGINE_LOCAL
 
 
 class Enrichment(EnrichmentService):
@@ -22,7 +24,8 @@ class Enrichment(EnrichmentService):
     def __init__(self, credentials=None):
         super(Enrichment, self).__init__(credentials)
 
-    def enrich_points(self, dataframe, variables, geom_col=None, filters={}):
+    def enrich_points(self, dataframe, variables, geom_col=None, filters={}, chunksize=None, workers=None,
+                      engine=ENGINE_BIGQUERY):
         """Enrich your points `DataFrame` with columns (:obj:`Variable`) from one or more :obj:`Dataset`
         in the Data Observatory, intersecting the points in the source `DataFrame` with the geographies in the
         Data Observatory.
@@ -43,12 +46,22 @@ class Enrichment(EnrichmentService):
                 operator (in the example: `WHERE {variable1.column_name} > 30`). If you want to filter the same
                 variable several times you can use a list as a dict value: `{variable1.id: ["> 30", "< 100"]}`. The
                 variables used to filter results should exist in `variables` property list.
+            chunksize (int, optional): number of rows enriched at a time. The rows are uploaded, enriched and
+                downloaded in independent blocks to bound the memory used with very large dataframes.
+            workers (int, optional): number of blocks of rows enriched at the same time. If `chunksize` is not
+                provided, the dataframe is split into one block per worker. With the 'local' engine, number
+                of processes of the spatial join. Default is 1.
+            engine (str, optional): 'bigquery' to enrich the data in BigQuery, or 'local' to download the
+                geographies and datasets once into the enrichment cache (see :py:func:`get_enrichment_cache
+                <cartoframes.utils.get_enrichment_cache>`) and enrich the data locally. The 'local' engine requires
+                `pyarrow` and does not support `filters` nor `chunksize`. Default is 'bigquery'.
 
         Returns:
             A geopandas.GeoDataFrame enriched with the variables passed as argument.
 
         Raises:
             EnrichmentError: if there is an error in the enrichment process.
+            ValueError: if the chunksize, workers or engine params are not valid.
 
         *Note that if the points of the `dataframe` you provide are contained in more than one geometry
         in the enrichment dataset, the number of rows of the returned `GeoDataFrame` could be different
@@ -80,16 +93,23 @@ class Enrichment(EnrichmentService):
             ...     geom_col='the_geom')
 
         """
-        variables = prepare_variables(variables, self.credentials)
-        geodataframe = self._prepare_data(dataframe, geom_col)
+        check_engine(engine)
+        variables, datasets, geographies = _prepare_variables(variables, self.credentials)
 
-        temp_table_name = self._get_temp_table_name()
-        self._upload_data(temp_table_name, geodataframe)
+        if engine == ENGINE_LOCAL:
+            return self._enrich_locally(dataframe, geom_col, enrich_points_locally, filters, chunksize, workers,
+                                        variables=variables)
 
-        queries = self._get_points_enrichment_sql(temp_table_name, variables, filters)
-        return self._execute_enrichment(queries, geodataframe)
+        # The catalog metadata is resolved once, the chunks only differ in the temp table
+        tables_metadata = self._get_tables_metadata(variables, filters, datasets, geographies)
 
-    def enrich_polygons(self, dataframe, variables, geom_col=None, filters={}, aggregation=AGGREGATION_DEFAULT):
+        def get_queries(temp_table_name):
+            return self._build_points_queries(tables_metadata, temp_table_name)
+
+        return self._enrich(dataframe, geom_col, get_queries, chunksize, workers)
+
+    def enrich_polygons(self, dataframe, variables, geom_col=None, filters={}, aggregation=AGGREGATION_DEFAULT,
+                        chunksize=None, workers=None, engine=ENGINE_BIGQUERY):
         """Enrich your polygons `DataFrame` with columns (:obj:`Variable`) from one or more :obj:`Dataset` in
         the Data Observatory by intersecting the polygons in the source `DataFrame` with geographies in the
         Data Observatory.
@@ -137,12 +157,23 @@ class Enrichment(EnrichmentService):
                 variables, use a dict as :py:attr:`Variable.id`: aggregation method pairs, for example:
                 `{variable1.id: 'SUM', variable3.id: 'AVG'}`. Or if you want to use several aggregation method for one
                 variable, you can use a list as a dict value: `{variable1.id: ['SUM', 'AVG'], variable3.id: 'AVG'}`
+            chunksize (int, optional): number of rows enriched at a time. The rows are uploaded, enriched and
+                downloaded in independent blocks to bound the memory used with very large dataframes.
+            workers (int, optional): number of blocks of rows enriched at the same time. If `chunksize` is not
+                provided, the dataframe is split into one block per worker. With the 'local' engine, number
+                of processes of the spatial join and the intersections. Default is 1.
+            engine (str, optional): 'bigquery' to enrich the data in BigQuery, or 'local' to download the
+                geographies and datasets once into the enrichment cache (see :py:func:`get_enrichment_cache
+                <cartoframes.utils.get_enrichment_cache>`) and enrich the data locally. The 'local' engine requires
+                `pyarrow`, supports the 'SUM', 'AVG', 'MIN', 'MAX' and 'COUNT' aggregations and does not
+                support `filters` nor `chunksize`. Default is 'bigquery'.
 
         Returns:
             A geopandas.GeoDataFrame enriched with the variables passed as argument.
 
         Raises:
             EnrichmentError: if there is an error in the enrichment process.
+            ValueError: if the chunksize, workers or engine params are not valid.
 
         *Note that if the geometry of the `dataframe` you provide intersects with more than one geometry
         in the enrichment dataset, the number of rows of the returned `GeoDataFrame` could be different
@@ -248,12 +279,17 @@ class Enrichment(EnrichmentService):
             ...     geom_col='the_geom')
 
         """
-        variables = prepare_variables(variables, self.credentials, aggregation)
+        check_engine(engine)
+        variables, datasets, geographies = _prepare_variables(variables, self.credentials, aggregation)
+
+        if engine == ENGINE_LOCAL:
+            return self._enrich_locally(dataframe, geom_col, enrich_polygons_locally, filters, chunksize, workers,
+                                        variables=variables, aggregation=aggregation)
 
-        geodataframe = self._prepare_data(dataframe, geom_col)
-        temp_table_name = self._get_temp_table_name()
+        # The catalog metadata is resolved once, the chunks only differ in the temp table
+        tables_metadata = self._get_tables_metadata(variables, filters, datasets, geographies)
 
-        self._upload_data(temp_table_name, geodataframe)
+        def get_queries(temp_table_name):
+            return self._build_polygons_queries(tables_metadata, temp_table_name, aggregation)
 
-        queries = self._get_polygon_enrichment_sql(temp_table_name, variables, filters, aggregation)
-        return self._execute_enrichment(queries, geodataframe)
+        return self._enrich(dataframe, geom_col, get_queries, chunksize, workers)
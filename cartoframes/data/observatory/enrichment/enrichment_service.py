@@ -1,27 +1,35 @@
 import uuid
-import time
+import numpy as np
 
+from functools import reduce
+from threading import Event
+from pandas import RangeIndex, concat, factorize, isnull
 from geopandas import GeoDataFrame
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED, FIRST_EXCEPTION
 
 from ..catalog.variable import Variable
 from ..catalog.dataset import Dataset
 from ..catalog.geography import Geography
+from ..catalog.entity import is_slug_value
+from ..catalog.subscriptions import fetch_subscriptions
 from ...clients import bigquery_client
 from ....auth import get_default_credentials
-from ....exceptions import EnrichmentError
+from ....exceptions import CatalogError, EnrichmentError
 from ....utils.logger import log
-from ....utils.geom_utils import to_geojson, set_geometry, has_geometry
+from ....utils.geom_utils import to_wkb_hex, set_geometry, has_geometry
 from ....utils.utils import timelogger
 
 
 _ENRICHMENT_ID = 'enrichment_id'
-_GEOM_COLUMN = '__geojson_geom'
+_GEOM_COLUMN = '__wkb_geom'
 
 AGGREGATION_DEFAULT = 'default'
 AGGREGATION_NONE = None
 
 MAX_VARIABLES_NUMBER = 50
+# Maximum number of enrichment results downloaded at the same time
+MAX_DOWNLOAD_WORKERS = 4
 
 
 class EnrichmentService(object):
@@ -34,40 +42,132 @@ class EnrichmentService(object):
         self.bq_project = self.bq_client.bq_project
         self.bq_public_project = self.bq_client.bq_public_project
 
-    @timelogger
-    def _execute_enrichment(self, queries, geodataframe):
+    def _enrich(self, dataframe, geom_col, get_queries, chunksize=None, workers=None):
+        """Enrich the dataframe, or blocks of `chunksize` rows of the dataframe with up to `workers`
+        blocks in flight. Each block is prepared, uploaded, queried and downloaded independently.
 
-        dfs_enriched = list()
-        awaiting_jobs = set()
-        errors = list()
+        The first error stops the rest of the blocks: the queued ones are cancelled, the running
+        ones skip their next upload or query, and they are waited for before raising the error of
+        the first failed block.
 
-        def callback(job):
-            if not job.errors:
-                dfs_enriched.append(self.bq_client.download_to_dataframe(job))
-            else:
-                errors.extend(job.errors)
+        Args:
+            get_queries (function): function returning the enrichment queries of a temp table name.
 
-            awaiting_jobs.discard(job.job_id)
+        """
+        _check_chunks_params(chunksize, workers)
 
-        for query in queries:
-            job = self.bq_client.query(query)
-            awaiting_jobs.add(job.job_id)
-            job.add_done_callback(callback)
+        if chunksize is None and workers is not None and workers > 1:
+            chunksize = max(1, -(-len(dataframe) // workers))
 
-        while awaiting_jobs:
-            time.sleep(0.5)
+        if chunksize is None or len(dataframe) <= chunksize:
+            return self._enrich_chunk(dataframe, geom_col, get_queries)
 
-        if len(errors) > 0:
-            raise EnrichmentError(errors)
+        stop = Event()
 
-        for df in dfs_enriched:
-            geodataframe = geodataframe.merge(df, on=_ENRICHMENT_ID, how='left')
+        def enrich_chunk(start):
+            return self._enrich_chunk(dataframe.iloc[start:start + chunksize], geom_col, get_queries, stop)
 
-        # Remove extra columns
-        geodataframe.drop(_ENRICHMENT_ID, axis=1, inplace=True)
-        geodataframe.drop(_GEOM_COLUMN, axis=1, inplace=True)
+        executor = ThreadPoolExecutor(max_workers=workers or 1)
+        futures = []
+        try:
+            futures = [executor.submit(enrich_chunk, start) for start in range(0, len(dataframe), chunksize)]
+            _, not_done = wait(futures, return_when=FIRST_EXCEPTION)
 
-        return geodataframe
+            if any(future.done() and future.exception() is not None for future in futures):
+                stop.set()
+                for future in not_done:
+                    future.cancel()
+                wait(futures)
+                # Raise the error of the first failed block, not the ones of the blocks stopped
+                raise next(future.exception() for future in futures
+                           if not future.cancelled() and future.exception() is not None and
+                           not isinstance(future.exception(), _EnrichmentStopped))
+
+            results = [future.result() for future in futures]
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        return concat(results, ignore_index=True)
+
+    def _enrich_locally(self, dataframe, geom_col, enrich_function, filters, chunksize=None, workers=None, **kwargs):
+        """Enrich the dataframe with the local engine.
+
+        Args:
+            enrich_function (function): local enrichment function returning the enrichment results.
+
+        """
+        _check_chunks_params(None, workers)
+
+        if chunksize is not None:
+            raise ValueError('Wrong chunksize. The local engine does not support chunksize.')
+
+        if filters:
+            raise EnrichmentError('The local engine does not support filters. Please, use the bigquery engine.')
+
+        geodataframe = self._prepare_data(dataframe, geom_col)
+        dfs_enriched = enrich_function(geodataframe, credentials=self.credentials, enrichment_id=_ENRICHMENT_ID,
+                                       workers=workers, **kwargs)
+
+        return _merge_enrichment_results(geodataframe, dfs_enriched)
+
+    def _enrich_chunk(self, dataframe, geom_col, get_queries, stop=None):
+        geodataframe = self._prepare_data(dataframe, geom_col)
+
+        _check_stop(stop)
+        temp_table_name = self._get_temp_table_name()
+        self._upload_data(temp_table_name, geodataframe)
+
+        _check_stop(stop)
+        queries = get_queries(temp_table_name)
+        return self._execute_enrichment(queries, geodataframe)
+
+    @timelogger
+    def _execute_enrichment(self, queries, geodataframe):
+        jobs = [self.bq_client.query(query) for query in queries]
+        dfs_enriched = self._download_enrichment_results(jobs)
+
+        return _merge_enrichment_results(geodataframe, dfs_enriched)
+
+    def _download_enrichment_results(self, jobs):
+        """Wait for the jobs and download their results as soon as they are done, in a
+        bounded pool. The first error cancels the rest of the jobs and downloads."""
+        job_futures = [Future() for _ in jobs]
+        positions = {job_future: position for position, job_future in enumerate(job_futures)}
+        for job, job_future in zip(jobs, job_futures):
+            job.add_done_callback(_set_future_result(job_future))
+
+        results = [None] * len(jobs)
+        download_futures = {}
+        pending = set(job_futures)
+        executor = ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, max(len(jobs), 1)))
+
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in positions:
+                        job = future.result()
+                        if job.errors:
+                            raise EnrichmentError(job.errors)
+                        download_future = executor.submit(self.bq_client.download_to_dataframe, job)
+                        download_futures[download_future] = positions[future]
+                        pending.add(download_future)
+                    else:
+                        results[download_futures[future]] = future.result()
+        except BaseException:
+            for future in download_futures:
+                future.cancel()
+            for job, job_future in zip(jobs, job_futures):
+                if not job_future.done():
+                    _cancel_job(job)
+            raise
+        finally:
+            executor.shutdown(wait=False)
+
+        return results
 
     @timelogger
     def _prepare_data(self, dataframe, geom_col):
@@ -81,9 +181,11 @@ class EnrichmentService(object):
             raise ValueError('No valid geometry found. Please provide an input source with ' +
                              'a valid geometry or specify the "geom_col" param with a geometry column.')
 
-        # Add extra columns for the enrichment
-        geodataframe[_ENRICHMENT_ID] = range(geodataframe.shape[0])
-        geodataframe[_GEOM_COLUMN] = geodataframe.geometry.apply(to_geojson)
+        # Add extra columns for the enrichment. Identical geometries share the same id,
+        # so they are uploaded and enriched once
+        geometries = to_wkb_hex(geodataframe.geometry.values)
+        geodataframe[_ENRICHMENT_ID] = _geometry_ids(geometries)
+        geodataframe[_GEOM_COLUMN] = geometries
 
         return geodataframe
 
@@ -92,7 +194,7 @@ class EnrichmentService(object):
         return 'temp_{id}'.format(id=id_tablename)
 
     def _upload_data(self, tablename, geodataframe):
-        bq_dataframe = geodataframe[[_ENRICHMENT_ID, _GEOM_COLUMN]]
+        bq_dataframe = geodataframe[[_ENRICHMENT_ID, _GEOM_COLUMN]].drop_duplicates(_ENRICHMENT_ID)
         schema = {_ENRICHMENT_ID: 'INTEGER', _GEOM_COLUMN: 'GEOGRAPHY'}
 
         self.bq_client.upload_dataframe(
@@ -101,7 +203,14 @@ class EnrichmentService(object):
             tablename=tablename
         )
 
-    def _get_tables_metadata(self, variables, filters):
+    def _get_tables_metadata(self, variables, filters, datasets, geographies):
+        """Group the variables by enrichment table.
+
+        Args:
+            datasets (dict): datasets of the variables by id.
+            geographies (dict): geographies of the datasets by id.
+
+        """
         tables_metadata = defaultdict(lambda: defaultdict(list))
 
         for variable in variables:
@@ -111,9 +220,12 @@ class EnrichmentService(object):
             variable_filters = _build_where_conditions_by_variable(variable, filters)
             if variable_filters:
                 tables_metadata[table_name]['filters'] = variable_filters
+            else:
+                # Set explicitly, the metadata is shared by the chunks built in parallel
+                tables_metadata[table_name].setdefault('filters', [])
 
             if 'geo_table' not in tables_metadata[table_name].keys():
-                tables_metadata[table_name]['geo_table'] = self.__get_geo_table(variable)
+                tables_metadata[table_name]['geo_table'] = self.__get_geo_table(variable, datasets, geographies)
 
             if 'project' not in tables_metadata[table_name].keys():
                 tables_metadata[table_name]['project'] = self.__get_project(variable)
@@ -135,9 +247,9 @@ class EnrichmentService(object):
         else:
             return variable.dataset
 
-    def __get_geo_table(self, variable):
-        geography_id = Dataset.get(variable.dataset).geography
-        geography = Geography.get(geography_id)
+    def __get_geo_table(self, variable, datasets, geographies):
+        geography_id = datasets[variable.dataset].geography
+        geography = geographies[geography_id]
         _, dataset_geo_table, geo_table = geography_id.split('.')
 
         if not geography.is_public_data:
@@ -163,10 +275,13 @@ class EnrichmentService(object):
         return project
 
     def _get_points_enrichment_sql(self, temp_table_name, variables, filters):
-        tables_metadata = self._get_tables_metadata(variables, filters).items()
+        tables_metadata = self._get_tables_metadata(variables, filters, *_get_datasets_and_geographies(variables))
 
+        return self._build_points_queries(tables_metadata, temp_table_name)
+
+    def _build_points_queries(self, tables_metadata, temp_table_name):
         return [self._build_points_query(metadata, enrichment_table, temp_table_name)
-                for enrichment_table, metadata in tables_metadata]
+                for enrichment_table, metadata in tables_metadata.items()]
 
     def _build_points_query(self, metadata, enrichment_table, temp_table_name):
         variables = ['enrichment_table.{}'.format(variable.column_name) for variable in metadata['variables']]
@@ -198,12 +313,80 @@ class EnrichmentService(object):
         )
 
     def _get_polygon_enrichment_sql(self, temp_table_name, variables, filters, aggregation):
-        tables_metadata = self._get_tables_metadata(variables, filters).items()
+        tables_metadata = self._get_tables_metadata(variables, filters, *_get_datasets_and_geographies(variables))
+
+        return self._build_polygons_queries(tables_metadata, temp_table_name, aggregation)
 
-        return [self._build_polygons_query(metadata, enrichment_table, temp_table_name, aggregation)
-                for enrichment_table, metadata in tables_metadata]
+    def _build_polygons_queries(self, tables_metadata, temp_table_name, aggregation):
+        tables_metadata = tables_metadata.items()
 
-    def _build_polygons_query(self, metadata, enrichment_table, temp_table_name, aggregation):
+        if aggregation == AGGREGATION_NONE:
+            return [self._build_polygons_query_without_aggregation(metadata, enrichment_table, temp_table_name)
+                    for enrichment_table, metadata in tables_metadata]
+
+        return [self._build_polygons_query_by_geography(tables, temp_table_name, aggregation)
+                for tables in _group_tables_by_geography(tables_metadata, aggregation)]
+
+    def _build_polygons_query_by_geography(self, tables, temp_table_name, aggregation):
+        """Build the query of a list of (enrichment table, metadata) sharing a geography. The intersections
+        with the geography are computed once, and each table is aggregated with its own filters."""
+        data_table = '{project}.{user_dataset}.{temp_table_name}'.format(
+            project=self.bq_project,
+            user_dataset=self.bq_dataset,
+            temp_table_name=temp_table_name
+        )
+
+        variables = [variable for _, metadata in tables for variable in metadata['variables']]
+        if any(agg == 'sum' for _, agg, _ in _get_polygons_aggregations(variables, aggregation)):
+            intersection_ratio = """,
+                    ST_AREA(ST_INTERSECTION(enrichment_geo_table.geom, data_table.{geom_column}))
+                    /
+                    NULLIF(ST_AREA(enrichment_geo_table.geom), 0) AS intersection_ratio""".format(
+                geom_column=_GEOM_COLUMN)
+        else:
+            intersection_ratio = ''
+
+        tables_queries = ["""
+            enrichment_{index} AS (
+                SELECT intersections.{enrichment_id}, {columns}
+                FROM intersections
+                    JOIN `{enrichment_table}` enrichment_table
+                        ON enrichment_table.geoid = intersections.geoid
+                {where}
+                GROUP BY intersections.{enrichment_id}
+            )
+            """.format(
+                index=index,
+                enrichment_id=_ENRICHMENT_ID,
+                columns=_build_polygons_query_variables_with_aggregation(metadata['variables'], aggregation),
+                enrichment_table=enrichment_table,
+                where=_build_where_clausule(metadata['filters'])
+            ) for index, (enrichment_table, metadata) in enumerate(tables)]
+
+        joins = ['FULL OUTER JOIN enrichment_{index} USING ({enrichment_id})'.format(
+            index=index, enrichment_id=_ENRICHMENT_ID) for index in range(1, len(tables))]
+
+        return '''
+            WITH intersections AS (
+                SELECT data_table.{enrichment_id}, enrichment_geo_table.geoid{intersection_ratio}
+                FROM `{enrichment_geo_table}` enrichment_geo_table
+                    JOIN `{data_table}` data_table
+                        ON ST_Intersects(data_table.{geom_column}, enrichment_geo_table.geom)
+            ),
+            {tables_queries}
+            SELECT * FROM enrichment_0
+                {joins};
+        '''.format(
+            enrichment_id=_ENRICHMENT_ID,
+            intersection_ratio=intersection_ratio,
+            enrichment_geo_table=tables[0][1]['geo_table'],
+            data_table=data_table,
+            geom_column=_GEOM_COLUMN,
+            tables_queries=','.join(tables_queries),
+            joins='\n                '.join(joins)
+        )
+
+    def _build_polygons_query_without_aggregation(self, metadata, enrichment_table, temp_table_name):
         variables = metadata['variables']
         filters = metadata['filters']
         enrichment_geo_table = metadata['geo_table']
@@ -213,13 +396,6 @@ class EnrichmentService(object):
             temp_table_name=temp_table_name
         )
 
-        if aggregation == AGGREGATION_NONE:
-            grouper = ''
-            columns = _build_polygons_query_variables_without_aggregation(variables)
-        else:
-            grouper = 'group by data_table.{enrichment_id}'.format(enrichment_id=_ENRICHMENT_ID)
-            columns = _build_polygons_query_variables_with_aggregation(variables, aggregation)
-
         return '''
             SELECT data_table.{enrichment_id}, {columns}
             FROM `{enrichment_table}` enrichment_table
@@ -227,8 +403,7 @@ class EnrichmentService(object):
                     ON enrichment_table.geoid = enrichment_geo_table.geoid
                 JOIN `{data_table}` data_table
                     ON ST_Intersects(data_table.{geom_column}, enrichment_geo_table.geom)
-            {where}
-            {grouper};
+            {where};
         '''.format(
             geom_column=_GEOM_COLUMN,
             enrichment_table=enrichment_table,
@@ -236,11 +411,98 @@ class EnrichmentService(object):
             enrichment_id=_ENRICHMENT_ID,
             where=_build_where_clausule(filters),
             data_table=data_table,
-            grouper=grouper or '',
-            columns=columns
+            columns=_build_polygons_query_variables_without_aggregation(variables)
         )
 
 
+def _check_chunks_params(chunksize, workers):
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError('Wrong number of workers. You should provide an integer >= 1.')
+
+    if chunksize is not None and (not isinstance(chunksize, int) or chunksize < 1):
+        raise ValueError('Wrong chunksize. You should provide an integer >= 1.')
+
+
+def _merge_enrichment_results(geodataframe, dfs):
+    if dfs:
+        geodataframe = _join_enrichment_results(geodataframe, dfs)
+
+    # Remove extra columns
+    geodataframe.drop(_ENRICHMENT_ID, axis=1, inplace=True)
+    geodataframe.drop(_GEOM_COLUMN, axis=1, inplace=True)
+
+    return geodataframe
+
+
+def _geometry_ids(geometries):
+    """Number the encoded geometries in order of appearance, with the same id for identical geometries"""
+    ids, _ = factorize(np.where(isnull(geometries), '', geometries))
+    return ids
+
+
+def _join_enrichment_results(geodataframe, dfs):
+    """Left join the results of the enrichment queries to the data in a single pass.
+
+    The result frames are aligned by `enrichment_id` first, so the data (and its geometries)
+    is copied once instead of once per query. The columns are named as in a chain of
+    merges: repeated columns get the `_x` and `_y` suffixes.
+    """
+    data_columns, results_columns = _merged_column_names(
+        [geodataframe.columns] + [[c for c in df.columns if c != _ENRICHMENT_ID] for df in dfs])
+
+    results = []
+    for df, columns in zip(dfs, results_columns):
+        result = df.set_index(_ENRICHMENT_ID)
+        result.columns = columns
+        results.append(result)
+
+    if all(result.index.is_unique for result in results):
+        results = concat(results, axis=1, sort=False)
+    else:
+        # Several rows per id: keep the rows of every combination, as merge does
+        results = reduce(lambda left, right: left.join(right, how='outer'), results)
+
+    geodataframe.columns = data_columns
+    geodataframe = geodataframe.join(results, on=_ENRICHMENT_ID, how='left')
+    geodataframe.index = RangeIndex(len(geodataframe))
+
+    return geodataframe
+
+
+def _merged_column_names(columns_list):
+    names = [list(columns) for columns in columns_list[:1]]
+
+    for columns in columns_list[1:]:
+        repeated = set(name for previous in names for name in previous) & set(columns)
+        if repeated:
+            names = [['{}_x'.format(name) if name in repeated else name for name in previous] for previous in names]
+        names.append(['{}_y'.format(name) if name in repeated else name for name in columns])
+
+    return names[0], names[1:]
+
+
+def _set_future_result(future):
+    def callback(job):
+        future.set_result(job)
+    return callback
+
+
+class _EnrichmentStopped(EnrichmentError):
+    pass
+
+
+def _check_stop(stop):
+    if stop is not None and stop.is_set():
+        raise _EnrichmentStopped('The enrichment was stopped by an error in another chunk.')
+
+
+def _cancel_job(job):
+    try:
+        job.cancel()
+    except Exception as e:
+        log.debug('Enrichment job can not be cancelled: {}'.format(e))
+
+
 def _build_polygons_query_variables_with_aggregation(variables, aggregation):
     sql = []
     for variable in variables:
@@ -254,22 +516,49 @@ def _build_polygons_query_variables_with_aggregation(variables, aggregation):
     return ', '.join(sql)
 
 
+def _get_polygons_aggregations(variables, aggregation):
+    """Get the list of (variable, aggregation, column name) of the aggregated columns"""
+    aggregations = []
+    for variable in variables:
+        variable_aggregation = _get_aggregation(variable, aggregation)
+        if isinstance(variable_aggregation, list):
+            aggregations.extend((variable, agg, _get_polygons_agg_column_name(variable.column_name, agg, True))
+                                for agg in variable_aggregation)
+        else:
+            aggregations.append((variable, variable_aggregation, variable.column_name))
+
+    return aggregations
+
+
+def _group_tables_by_geography(tables_metadata, aggregation):
+    """Group the (enrichment table, metadata) items sharing a geography, so they are enriched in the
+    same query. A table goes into a different query if its column names collide with the group ones."""
+    groups = []
+    for enrichment_table, metadata in tables_metadata:
+        column_names = set(name for _, _, name in _get_polygons_aggregations(metadata['variables'], aggregation))
+
+        for group in groups:
+            if group['geo_table'] == metadata['geo_table'] and not column_names & group['column_names']:
+                break
+        else:
+            group = {'geo_table': metadata['geo_table'], 'column_names': set(), 'tables': []}
+            groups.append(group)
+
+        group['column_names'] |= column_names
+        group['tables'].append((enrichment_table, metadata))
+
+    return [group['tables'] for group in groups]
+
+
 def _build_polygons_column_with_aggregation(variable, aggregation, column_sufix=False):
     column_name = _get_polygons_agg_column_name(variable.column_name, aggregation, column_sufix)
 
     if (aggregation == 'sum'):
         return """
-            {aggregation}(
-                enrichment_table.{column} * (
-                    ST_AREA(ST_INTERSECTION(enrichment_geo_table.geom, data_table.{geo_column}))
-                    /
-                    NULLIF(ST_AREA(enrichment_geo_table.geom), 0)
-                )
-            ) AS {column_name}
+            {aggregation}(enrichment_table.{column} * intersections.intersection_ratio) AS {column_name}
             """.format(
                 column=variable.column_name,
                 column_name=column_name,
-                geo_column=_GEOM_COLUMN,
                 aggregation=aggregation)
     else:
         return """
@@ -337,26 +626,37 @@ def _build_where_clausule(filters):
     return where
 
 
-@timelogger
 def prepare_variables(variables, credentials, aggregation=None):
+    variables, _, _ = _prepare_variables(variables, credentials, aggregation)
+    return variables
+
+
+@timelogger
+def _prepare_variables(variables, credentials, aggregation=None):
+    """Get and validate the variables, fetching their datasets and geographies once.
+
+    Returns:
+        tuple with the list of variables and the dicts with their datasets and geographies by id.
+
+    """
     _validate_variables_input(variables)
 
-    if isinstance(variables, list):
-        variables = [_prepare_variable(var, aggregation) for var in variables]
-    else:
-        variables = [_prepare_variable(variables, aggregation)]
+    if not isinstance(variables, list):
+        variables = [variables]
+
+    # The variables given by id or slug are fetched in a single catalog query
+    variables_by_id = _get_entities(Variable, [variable for variable in variables if isinstance(variable, str)])
+    variables = [_prepare_variable(variables_by_id[var] if isinstance(var, str) else var, aggregation)
+                 for var in variables]
 
     variables = list(filter(None, variables))
 
-    _validate_bq_operations(variables, credentials)
+    datasets, geographies = _validate_bq_operations(variables, credentials)
 
-    return variables
+    return variables, datasets, geographies
 
 
 def _prepare_variable(variable, aggregation=None):
-    if isinstance(variable, str):
-        variable = Variable.get(variable)
-
     if not isinstance(variable, Variable):
         raise EnrichmentError("""
             variable should be a `<cartoframes.data.observatory> Variable` instance,
@@ -372,6 +672,36 @@ def _prepare_variable(variable, aggregation=None):
     return variable
 
 
+def _get_entities(entity_class, entity_ids):
+    """Get the catalog entities of a list of ids or slugs, with one query for the ids and one for the slugs.
+
+    Returns:
+        dict with the entities by the ids or slugs given.
+
+    Raises:
+        CatalogError: if any of the ids or slugs does not correspond with an entity of the catalog.
+
+    """
+    entity_ids = list(OrderedDict.fromkeys(entity_ids))
+    entities = {}
+
+    # The catalog filters by ids and slugs at the same time, so they are queried separately
+    for id_list in ([id_ for id_ in entity_ids if not is_slug_value(id_)],
+                    [id_ for id_ in entity_ids if is_slug_value(id_)]):
+        if len(id_list) > 0:
+            for entity in entity_class.get_list(id_list) or []:
+                entities[entity.id] = entity
+                if entity.slug is not None:
+                    entities[entity.slug] = entity
+
+    missing_ids = [id_ for id_ in entity_ids if id_ not in entities]
+    if missing_ids:
+        raise CatalogError('The ids {} do not correspond with any existing entity in the catalog. '
+                           'You can check the full list of available values with get_all() method.'.format(missing_ids))
+
+    return entities
+
+
 def _validate_variables_input(variables):
     if not isinstance(variables, Variable) and not isinstance(variables, str) and not isinstance(variables, list):
         raise EnrichmentError('variables parameter should be a Variable instance, a list or a str.')
@@ -383,16 +713,43 @@ def _validate_variables_input(variables):
         raise EnrichmentError('The maximum number of variables to be used in enrichment is 50.')
 
 
+def _get_datasets_and_geographies(variables):
+    """Get the datasets and geographies of the variables, with one catalog query per entity type"""
+    dataset_ids = list(OrderedDict.fromkeys(variable.dataset for variable in variables))
+    datasets = _get_entities(Dataset, dataset_ids)
+    geographies = _get_entities(Geography, [datasets[dataset_id].geography for dataset_id in dataset_ids])
+
+    return datasets, geographies
+
+
 def _validate_bq_operations(variables, credentials):
-    dataset_ids = list(set([variable.dataset for variable in variables]))
+    """Validate the datasets and geographies of the variables for the enrichment in BigQuery.
+
+    Returns:
+        tuple with the dicts of the datasets and geographies by id.
+
+    """
+    datasets, geographies = _get_datasets_and_geographies(variables)
+    dataset_ids = list(OrderedDict.fromkeys(variable.dataset for variable in variables))
+    subscription_ids = _get_subscription_ids(list(datasets.values()) + list(geographies.values()), credentials)
 
     for dataset_id in dataset_ids:
-        dataset = Dataset.get(dataset_id)
-        geography = Geography.get(dataset.geography)
+        dataset = datasets[dataset_id]
+        geography = geographies[dataset.geography]
 
-        _is_subscribed(dataset, geography, credentials)
+        _is_subscribed(dataset, geography, subscription_ids)
         _is_available_in_bq(dataset, geography)
 
+    return datasets, geographies
+
+
+def _get_subscription_ids(entities, credentials):
+    """Fetch the subscriptions once for all the entities, only if any of them is not public"""
+    if all(entity.is_public_data for entity in entities):
+        return set()
+
+    return set(subscription.id for subscription in fetch_subscriptions(credentials))
+
 
 def _is_available_in_bq(dataset, geography):
     if not dataset._is_available_in('bq'):
@@ -406,13 +763,13 @@ def _is_available_in_bq(dataset, geography):
         """.format(geography))
 
 
-def _is_subscribed(dataset, geography, credentials):
-    if not dataset._is_subscribed(credentials):
+def _is_subscribed(dataset, geography, subscription_ids):
+    if not dataset.is_public_data and dataset.id not in subscription_ids:
         raise EnrichmentError("""
             You are not subscribed to the Dataset '{}' yet. Please, use the subscribe method first.
         """.format(dataset.id))
 
-    if not geography._is_subscribed(credentials):
+    if not geography.is_public_data and geography.id not in subscription_ids:
         raise EnrichmentError("""
             You are not subscribed to the Geography '{}' yet. Please, use the subscribe method first.
         """.format(geography.id))
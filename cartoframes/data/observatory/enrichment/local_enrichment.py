@@ -0,0 +1,226 @@
+"""Local enrichment engine.
+
+The geographies and datasets of the Data Observatory are downloaded once into the enrichment cache
+(see :py:func:`get_enrichment_cache <cartoframes.utils.get_enrichment_cache>`), versioned by their catalog
+version, and the spatial joins are done locally instead of running BigQuery jobs.
+"""
+
+import shapely
+import numpy as np
+
+from collections import OrderedDict
+from pandas import DataFrame
+from geopandas import GeoDataFrame
+from pyproj import Geod
+
+from .enrichment_service import AGGREGATION_DEFAULT, AGGREGATION_NONE, _get_polygons_aggregations
+from ..catalog.dataset import Dataset
+from ..catalog.geography import Geography
+from ....analysis.grid import QuadGrid, CHUNKS_PER_WORKER, _imap_bounded
+from ....exceptions import EnrichmentError
+from ....utils.cache import get_enrichment_cache
+from ....utils.geom_utils import decode_geometry
+from ....utils.logger import log
+
+ENGINE_BIGQUERY = 'bigquery'
+ENGINE_LOCAL = 'local'
+ENGINES = [ENGINE_BIGQUERY, ENGINE_LOCAL]
+
+GEOID_COLUMN = 'geoid'
+GEOM_COLUMN = 'geom'
+DO_AREA_COLUMN = 'do_area'
+
+LOCAL_AGGREGATIONS = ['sum', 'avg', 'min', 'max', 'count']
+
+# Sphere used by BigQuery to compute the areas of GEOGRAPHY values
+_SPHERE = Geod(a=6371008.8, b=6371008.8)
+
+
+def check_engine(engine):
+    if engine not in ENGINES:
+        raise ValueError('Wrong engine. You should provide one of {}.'.format(ENGINES))
+
+
+def enrich_points_locally(geodataframe, variables, credentials, enrichment_id, workers=None):
+    """Enrich the points of the geodataframe with the variables of their geographies.
+
+    Returns:
+        list of DataFrames, one per dataset, with the `enrichment_id`, the variables and the
+        `do_area` columns of the geographies containing the points, as the BigQuery queries.
+
+    """
+    points = _unique_geometries(geodataframe, enrichment_id)
+    results = []
+
+    for dataset, dataset_variables in _group_by_dataset(variables):
+        geography_gdf = get_geography_data(dataset.geography, credentials)
+        columns = [variable.column_name for variable in dataset_variables]
+        data_df = get_dataset_data(dataset, credentials)[[GEOID_COLUMN] + columns]
+
+        joined = QuadGrid().sjoin(points, geography_gdf, op='within', workers=workers)
+        result = joined[[enrichment_id, GEOID_COLUMN, DO_AREA_COLUMN]].merge(data_df, on=GEOID_COLUMN)
+        results.append(result[[enrichment_id] + columns + [DO_AREA_COLUMN]])
+
+    return results
+
+
+def enrich_polygons_locally(geodataframe, variables, credentials, enrichment_id, workers=None,
+                            aggregation=AGGREGATION_DEFAULT):
+    """Enrich the polygons of the geodataframe with the variables of the geographies they intersect.
+
+    As in BigQuery, the `sum` aggregation weights the values by the fraction of the geodesic area
+    of each geography inside the polygon, and the rest of aggregations are computed over the values of the
+    geographies intersected. Without aggregation, there is a row per geography intersected with the
+    areas of the intersection, the geography and the polygon.
+
+    Returns:
+        list of DataFrames, one per dataset, with the columns of the BigQuery queries.
+
+    """
+    polygons = _unique_geometries(geodataframe, enrichment_id)
+    results = []
+
+    for dataset, dataset_variables in _group_by_dataset(variables):
+        aggregations = _get_local_aggregations(dataset_variables, aggregation)
+        geography_gdf = get_geography_data(dataset.geography, credentials)
+        columns = [variable.column_name for variable in dataset_variables]
+        data_df = get_dataset_data(dataset, credentials)[[GEOID_COLUMN] + columns]
+
+        joined = QuadGrid().sjoin(polygons, geography_gdf, op='intersects', workers=workers)
+        pairs = DataFrame({
+            enrichment_id: joined[enrichment_id].values,
+            GEOID_COLUMN: joined[GEOID_COLUMN].values,
+            DO_AREA_COLUMN: joined[DO_AREA_COLUMN].values,
+            '_user_geom': np.asarray(joined.geometry.values, dtype=object),
+            '_do_geom': np.asarray(geography_gdf.geometry.values, dtype=object)[
+                geography_gdf.index.get_indexer(joined['index_right'])]
+        }, columns=[enrichment_id, GEOID_COLUMN, DO_AREA_COLUMN, '_user_geom', '_do_geom'])
+        pairs = pairs.merge(data_df, on=GEOID_COLUMN)
+
+        intersected_areas = geodesic_areas(_intersections(pairs['_user_geom'].values, pairs['_do_geom'].values,
+                                                          workers))
+
+        if aggregation == AGGREGATION_NONE:
+            result = pairs[[enrichment_id] + columns].copy()
+            result['intersected_area'] = intersected_areas
+            result[DO_AREA_COLUMN] = pairs[DO_AREA_COLUMN].values
+            result['user_area'] = geodesic_areas(pairs['_user_geom'].values)
+            result['do_geoid'] = pairs[GEOID_COLUMN].values
+        else:
+            # Fraction of the geodesic area of the geographies intersected, as ST_AREA in BigQuery,
+            # NULL for geographies without area
+            do_areas = pairs[DO_AREA_COLUMN].values
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weights = np.where(do_areas > 0, intersected_areas / do_areas, np.nan)
+            result = _aggregate_pairs(pairs, enrichment_id, aggregations, weights)
+
+        results.append(result)
+
+    return results
+
+
+def _get_local_aggregations(variables, aggregation):
+    """Get the list of (column, aggregation, result column) of the variables"""
+    aggregations = [(variable.column_name, agg, column_name)
+                    for variable, agg, column_name in _get_polygons_aggregations(variables, aggregation)
+                    if agg is not None]
+
+    for _, agg, _ in aggregations:
+        if agg not in LOCAL_AGGREGATIONS:
+            raise EnrichmentError('The local engine does not support the {} aggregation. '
+                                  'Please, use one of {} or the bigquery engine.'.format(agg, LOCAL_AGGREGATIONS))
+
+    return aggregations
+
+
+def _aggregate_pairs(pairs, enrichment_id, aggregations, weights):
+    grouped = OrderedDict()
+    for column, agg, result_column in aggregations:
+        values = pairs[column]
+        if agg == 'sum':
+            grouped[result_column] = (values * weights).groupby(pairs[enrichment_id]).sum(min_count=1)
+        elif agg == 'avg':
+            grouped[result_column] = values.groupby(pairs[enrichment_id]).mean()
+        else:
+            grouped[result_column] = getattr(values.groupby(pairs[enrichment_id]), agg)()
+
+    result = DataFrame(grouped, columns=list(grouped))
+    result.index.name = enrichment_id
+    return result.reset_index()
+
+
+def _intersections(left, right, workers=None):
+    if workers is not None and workers > 1 and len(left) > workers:
+        chunksize = max(1, int(np.ceil(len(left) / (workers * CHUNKS_PER_WORKER))))
+        chunks = ((left[i:i + chunksize], right[i:i + chunksize]) for i in range(0, len(left), chunksize))
+        return np.concatenate(list(_imap_bounded(_intersections_chunk, chunks, workers)))
+
+    return _intersections_chunk((left, right))
+
+
+def _intersections_chunk(args):
+    left, right = args
+    if hasattr(shapely, 'intersection'):
+        # shapely >= 2
+        return shapely.intersection(left, right)
+
+    result = np.empty(len(left), dtype=object)
+    result[:] = [left_geom.intersection(right_geom) for left_geom, right_geom in zip(left, right)]
+    return result
+
+
+def get_geography_data(geography_id, credentials):
+    """Get the geoid, geometry and area in square meters of the geographies, from the cache
+    or downloading and storing them in the cache."""
+    geography = Geography.get(geography_id)
+
+    def fetch():
+        log.info('Downloading geography {} for local enrichment'.format(geography_id))
+        df = geography._download(credentials)
+        df = df[[GEOID_COLUMN, GEOM_COLUMN]].copy()
+        df[GEOM_COLUMN] = decode_geometry(df[GEOM_COLUMN])
+        df[DO_AREA_COLUMN] = geodesic_areas(df[GEOM_COLUMN].values)
+        return df
+
+    df = _read_cached(geography, credentials, fetch)
+    return GeoDataFrame(df, geometry=GEOM_COLUMN, crs='epsg:4326')
+
+
+def get_dataset_data(dataset, credentials):
+    """Get the data of a dataset, from the cache or downloading and storing it in the cache."""
+    def fetch():
+        log.info('Downloading dataset {} for local enrichment'.format(dataset.id))
+        return dataset._download(credentials)
+
+    return _read_cached(dataset, credentials, fetch)
+
+
+def geodesic_areas(geometries):
+    """Get the areas of an array of geometries in square meters, as BigQuery `ST_AREA`."""
+    areas = np.zeros(len(geometries))
+    for i, geom in enumerate(geometries):
+        if geom is not None and not geom.is_empty:
+            areas[i] = abs(_SPHERE.geometry_area_perimeter(geom)[0])
+    return areas
+
+
+def _read_cached(entity, credentials, fetch):
+    key_params = {
+        'base_url': credentials.base_url,
+        'do_table': entity.id
+    }
+    return get_enrichment_cache().read(key_params, str(entity.version), fetch)
+
+
+def _group_by_dataset(variables):
+    groups = OrderedDict()
+    for variable in variables:
+        groups.setdefault(variable.dataset, []).append(variable)
+    return [(Dataset.get(dataset_id), dataset_variables) for dataset_id, dataset_variables in groups.items()]
+
+
+def _unique_geometries(geodataframe, enrichment_id):
+    # Identical geometries share the enrichment id, so each one is joined once
+    gdf = geodataframe[[enrichment_id, geodataframe.geometry.name]].drop_duplicates(enrichment_id)
+    valid = ~(gdf.geometry.isna() | gdf.geometry.is_empty)
+    return GeoDataFrame(gdf[valid], geometry=geodataframe.geometry.name)
@@ -8,10 +8,34 @@ from .utils import geocoding_constants
 from .utils import TableGeocodingLock
 from ...utils.logger import log
 from ...io.managers.source_manager import SourceManager
-from ...io.carto import read_carto, to_carto, has_table, delete_table, rename_table, copy_table, create_table_from_query
+from ...io.managers.context_manager import Estimate, BATCH_JOB_ROUND_TRIPS
+from ...io.carto import read_carto, to_carto, estimate_to_carto, has_table, delete_table, rename_table, copy_table, \
+                        create_table_from_query
 
 CARTO_INDEX_KEY = 'cartodb_id'
 
+# Requests sent by each step of a geocoding, used to estimate its round trips
+# Column names of the source
+COLUMNS_ROUND_TRIPS = 1
+# Existence check of the hash column + summary of the rows to be geocoded
+PRIOR_SUMMARY_ROUND_TRIPS = 2
+# Available quota
+QUOTA_ROUND_TRIPS = 1
+# Table lock + unlock
+LOCK_ROUND_TRIPS = 2
+# Account schema
+SCHEMA_ROUND_TRIPS = 1
+# Creation of the geocoding columns
+ADD_COLUMNS_ROUND_TRIPS = 1
+# Summary of the geocoded rows
+POSTERIOR_SUMMARY_ROUND_TRIPS = 1
+# Download of the results: schema + columns info + COPY TO
+DOWNLOAD_ROUND_TRIPS = 3
+# Temporary table creation from a query: schema + existence check + batch job
+QUERY_TABLE_ROUND_TRIPS = 2 + BATCH_JOB_ROUND_TRIPS
+# Temporary table removal
+DELETE_TABLE_ROUND_TRIPS = 1
+
 
 class Geocoding(Service):
     """Geocoding using CARTO data services.
@@ -198,6 +222,46 @@ class Geocoding(Service):
 
         return result
 
+    def estimate_geocode(self, source):
+        """Estimate the cost of geocoding a source without running it.
+
+        The estimation does not upload nor scan the data: it uses the table statistics
+        and the `EXPLAIN` row estimations of the database for tables and queries.
+
+        Args:
+            source (str, pandas.DataFrame, geopandas.GeoDataFrame):
+                table, SQL query or DataFrame object to be geocoded.
+
+        Returns:
+            A named-tuple ``(rows, bytes, round_trips, quota)`` with the expected number of rows,
+            bytes transferred, requests to CARTO and quota units consumed. The quota is an upper
+            bound: rows previously geocoded are not charged.
+
+        """
+        source_manager = SourceManager(source, self._credentials)
+
+        round_trips = (COLUMNS_ROUND_TRIPS + PRIOR_SUMMARY_ROUND_TRIPS + QUOTA_ROUND_TRIPS + LOCK_ROUND_TRIPS +
+                       SCHEMA_ROUND_TRIPS + ADD_COLUMNS_ROUND_TRIPS + BATCH_JOB_ROUND_TRIPS +
+                       POSTERIOR_SUMMARY_ROUND_TRIPS + DOWNLOAD_ROUND_TRIPS)
+        upload_size = 0
+
+        if source_manager.is_dataframe():
+            upload = estimate_to_carto(source_manager.gdf)
+            rows, size = upload.rows, upload.bytes
+            upload_size = upload.bytes
+            round_trips += upload.round_trips + DELETE_TABLE_ROUND_TRIPS
+        else:
+            rows, size = source_manager.estimate_size()
+            if source_manager.is_table():
+                # Schema to compute the table query
+                round_trips += SCHEMA_ROUND_TRIPS
+            else:
+                round_trips += QUERY_TABLE_ROUND_TRIPS + DELETE_TABLE_ROUND_TRIPS
+
+        download_size = size + rows * geocoding_constants.GEOCODED_ROW_BYTES
+
+        return Estimate(rows=rows, bytes=upload_size + download_size, round_trips=round_trips, quota=rows)
+
     def _cached_geocode(self, source, table_name, street, city, state, country, dry_run):
         """Geocode a dataframe caching results into a table.
         If the same dataframe if geocoded repeatedly no credits will be spent.
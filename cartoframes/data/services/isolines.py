@@ -2,12 +2,15 @@ from .service import Service
 from ...utils.logger import log
 from ...utils.geom_utils import set_geometry, has_geometry
 from ...io.managers.source_manager import SourceManager
-from ...io.carto import read_carto, to_carto, delete_table
+from ...io.managers.context_manager import Estimate
+from ...io.carto import read_carto, to_carto, estimate_to_carto, delete_table
 
 QUOTA_SERVICE = 'isolines'
 DATA_RANGE_KEY = 'data_range'
 RANGE_LABEL_KEY = 'range_label'
 CARTO_INDEX_KEY = 'cartodb_id'
+# Approximate size of an isoline area encoded as EWKB
+ISOLINE_AREA_BYTES = 8192
 
 
 class Isolines(Service):
@@ -118,6 +121,59 @@ class Isolines(Service):
         """
         return self._iso_areas(source, ranges, function='isodistance', **args)
 
+    def estimate_isochrones(self, source, ranges):
+        """Estimate the cost of computing isochrone areas without running it.
+
+        Args:
+            source (str, pandas.DataFrame, geopandas.GeoDataFrame):
+                table, SQL query or DataFrame containing the source points for the isochrones.
+            ranges (list): travel time values in seconds.
+
+        Returns:
+            A named-tuple ``(rows, bytes, round_trips, quota)`` with the expected number of
+            areas, bytes transferred, requests to CARTO and quota units consumed.
+        """
+        return self._estimate_iso_areas(source, ranges)
+
+    def estimate_isodistances(self, source, ranges):
+        """Estimate the cost of computing isodistance areas without running it.
+
+        Args:
+            source (str, pandas.DataFrame, geopandas.GeoDataFrame):
+                table, SQL query or DataFrame containing the source points for the isodistances.
+            ranges (list): travel distance values in meters.
+
+        Returns:
+            A named-tuple ``(rows, bytes, round_trips, quota)`` with the expected number of
+            areas, bytes transferred, requests to CARTO and quota units consumed.
+        """
+        return self._estimate_iso_areas(source, ranges)
+
+    def _estimate_iso_areas(self, source, ranges):
+        source_manager = SourceManager(source, self._credentials)
+
+        # Number of rows + quota + columns info + download
+        round_trips = 1 + 1 + 2
+        upload_size = 0
+
+        if source_manager.is_dataframe():
+            upload = estimate_to_carto(source_manager.gdf, index=CARTO_INDEX_KEY not in source_manager.gdf,
+                                       index_label=CARTO_INDEX_KEY)
+            num_rows = upload.rows
+            # Upload + temporary table removal
+            upload_size = upload.bytes
+            round_trips += upload.round_trips + 1
+        else:
+            num_rows, _ = source_manager.estimate_size()
+            if source_manager.is_table():
+                # Schema
+                round_trips += 1
+
+        num_areas = num_rows * len(ranges)
+
+        return Estimate(rows=num_areas, bytes=upload_size + num_areas * ISOLINE_AREA_BYTES,
+                        round_trips=round_trips, quota=num_areas)
+
     def _iso_areas(self,
                    source,
                    ranges,
@@ -7,7 +7,8 @@ __all__ = [
     'STATUS_FIELDS_KEYS',
     'GEOCODE_COLUMN_KEY',
     'GEOCODE_VALUE_KEY',
-    'VALID_GEOCODE_KEYS'
+    'VALID_GEOCODE_KEYS',
+    'GEOCODED_ROW_BYTES'
 ]
 
 HASH_COLUMN = 'carto_geocode_hash'
@@ -32,3 +33,6 @@ GEOCODE_COLUMN_KEY = 'column'
 GEOCODE_VALUE_KEY = 'value'
 
 VALID_GEOCODE_KEYS = [GEOCODE_COLUMN_KEY, GEOCODE_VALUE_KEY]
+
+# Bytes added to each downloaded row by the geocoding: point EWKB, hash and relevance
+GEOCODED_ROW_BYTES = 96
@@ -5,11 +5,12 @@ from geopandas import GeoDataFrame
 
 from carto.exceptions import CartoException
 
-from .managers.context_manager import ContextManager
+from .managers.context_manager import ContextManager, estimate_copy_from, DTYPE_BACKEND_OPTIONS
 from ..utils.geom_utils import set_geometry, has_geometry
 from ..utils.logger import log
 from ..utils.utils import is_valid_str, is_sql_query
 from ..utils.metrics import send_metrics
+from ..utils.cache import get_query_cache
 
 
 GEOM_COLUMN_NAME = 'the_geom'
@@ -18,7 +19,8 @@ IF_EXISTS_OPTIONS = ['fail', 'replace', 'append']
 
 
 @send_metrics('data_downloaded')
-def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None, index_col=None, decode_geom=True):
+def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None, index_col=None, decode_geom=True,
+               dtype_backend=None, chunksize=None, cache=False):
     """Read a table or a SQL query from the CARTO account.
 
     Args:
@@ -33,20 +35,49 @@ def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None,
             `current_schema()` using the credentials.
         index_col (str, optional): name of the column to be loaded as index. It can be used also to set the index name.
         decode_geom (bool, optional): convert the "the_geom" column into a valid geometry column.
+        dtype_backend (str, optional): 'compact' to reduce the memory usage of the data: numbers are
+            stored in the narrowest safe dtype, text columns with low cardinality as `category` and
+            the rest of text columns as Arrow-backed strings (if `pyarrow` is installed).
+            By default, the dtypes are mapped directly from the database types.
+        chunksize (int, optional): number of rows per chunk. If provided, the download, the parsing and the
+            geometry decoding of the chunks are run in parallel. Recommended for large sources.
+        cache (bool, optional): store the result in a local cache and reuse it while the tables
+            involved in the source are not updated. Default False. It requires `pyarrow`.
+            Use :py:func:`get_query_cache <cartoframes.utils.get_query_cache>` to manage the cache.
 
     Returns:
         geopandas.GeoDataFrame
 
     Raises:
-        ValueError: if the source is not a valid table_name or SQL query.
+        ValueError: if the source is not a valid table_name or SQL query or the dtype_backend param is not valid.
 
     """
     if not is_valid_str(source):
         raise ValueError('Wrong source. You should provide a valid table_name or SQL query.')
 
+    if dtype_backend is not None and dtype_backend not in DTYPE_BACKEND_OPTIONS:
+        raise ValueError('Wrong option for the `dtype_backend` param. You should provide: {}.'.format(
+            ', '.join(DTYPE_BACKEND_OPTIONS)))
+
     context_manager = ContextManager(credentials)
 
-    df = context_manager.copy_to(source, schema, limit, retry_times)
+    def fetch():
+        return context_manager.copy_to(source, schema, limit, retry_times, dtype_backend, chunksize, decode_geom)
+
+    if cache:
+        key_params = {
+            'base_url': context_manager.credentials.base_url,
+            'api_key': context_manager.credentials.api_key,
+            'query': source,
+            'schema': schema,
+            'limit': limit,
+            'decode_geom': decode_geom,
+            'dtype_backend': dtype_backend
+        }
+        updated_at = context_manager.get_tables_updated_at(source, schema)
+        df = get_query_cache().read(key_params, updated_at, fetch)
+    else:
+        df = fetch()
 
     gdf = GeoDataFrame(df, crs='epsg:4326')
 
@@ -65,7 +96,7 @@ def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None,
 
 @send_metrics('data_uploaded')
 def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col=None, index=False, index_label=None,
-             cartodbfy=True, log_enabled=True):
+             cartodbfy=True, log_enabled=True, workers=None, bulk_load=False, cluster=False):
     """Upload a DataFrame to CARTO.
 
     Args:
@@ -80,9 +111,18 @@ def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col
             uses the name of the index from the dataframe.
         cartodbfy (bool, optional): convert the table to CARTO format. Default True. More info
             `here <https://carto.com/developers/sql-api/guides/creating-tables/#create-tables>`.
+        workers (int, optional): number of processes used to encode the data in parallel.
+            By default, the data is encoded in the current process. Recommended for large dataframes.
+        bulk_load (bool, optional): create a plain table, load the data and then convert the table to
+            CARTO format, build the spatial index of the geometry and analyze the table, so the
+            triggers and indexes are not maintained row by row during the load. Default False.
+            Recommended for large dataframes.
+        cluster (bool, optional): physically reorder the table by the spatial index after a bulk load.
+            It requires `bulk_load=True`. Default False.
 
     Raises:
-        ValueError: if the dataframe or table name provided are wrong or the if_exists param is not valid.
+        ValueError: if the dataframe or table name provided are wrong or the if_exists,
+            workers or cluster params are not valid.
 
     """
     if not isinstance(dataframe, DataFrame):
@@ -95,33 +135,88 @@ def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col
         raise ValueError('Wrong option for the `if_exists` param. You should provide: {}.'.format(
             ', '.join(IF_EXISTS_OPTIONS)))
 
-    context_manager = ContextManager(credentials)
-
-    gdf = GeoDataFrame(dataframe, copy=True)
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError('Wrong number of workers. You should provide an integer >= 1.')
 
-    if index:
-        index_name = index_label or gdf.index.name
-        if index_name is not None and index_name != '':
-            # Append the index as a column
-            gdf[index_name] = gdf.index
-        else:
-            raise ValueError('Wrong index name. You should provide a valid index label.')
+    if cluster and not bulk_load:
+        raise ValueError('Wrong option for the `cluster` param. cluster requires bulk_load=True.')
 
-    if geom_col in gdf:
-        set_geometry(gdf, geom_col, inplace=True, drop=True)
-    elif has_geometry(dataframe):
-        gdf.set_geometry(dataframe.geometry.name, inplace=True)
+    context_manager = ContextManager(credentials)
 
-    if has_geometry(gdf):
-        # Prepare geometry column for the upload
-        gdf.rename_geometry(GEOM_COLUMN_NAME, inplace=True)
+    gdf = _prepare_dataframe(dataframe, geom_col, index, index_label)
 
-    table_name = context_manager.copy_from(gdf, table_name, if_exists, cartodbfy)
+    table_name = context_manager.copy_from(gdf, table_name, if_exists, cartodbfy, workers, bulk_load, cluster)
 
     if log_enabled:
         log.info('Success! Data uploaded to table "{}" correctly'.format(table_name))
 
 
+def estimate_read_carto(source, credentials=None, limit=None, schema=None):
+    """Estimate the cost of reading a table or a SQL query from the CARTO account.
+
+    The estimation does not download the data nor scans the source: it uses the table
+    statistics (`pg_class`) and the `EXPLAIN` row estimations of the database.
+
+    Args:
+        source (str): table name or SQL query.
+        credentials (:py:class:`Credentials <cartoframes.auth.Credentials>`, optional):
+            instance of Credentials (username, api_key, etc).
+        limit (int, optional):
+            The number of rows to download. Default is to download all rows.
+        schema (str, optional): prefix of the table. By default, it gets the
+            `current_schema()` using the credentials.
+
+    Returns:
+        A named-tuple ``(rows, bytes, round_trips, quota)`` with the expected number of rows,
+        bytes transferred, requests to CARTO and quota units consumed.
+
+    Raises:
+        ValueError: if the source is not a valid table_name or SQL query.
+
+    """
+    if not is_valid_str(source):
+        raise ValueError('Wrong source. You should provide a valid table_name or SQL query.')
+
+    context_manager = ContextManager(credentials)
+    return context_manager.estimate_copy_to(source, schema, limit)
+
+
+def estimate_to_carto(dataframe, if_exists='fail', geom_col=None, index=False, index_label=None, cartodbfy=True,
+                      bulk_load=False):
+    """Estimate the cost of uploading a DataFrame to CARTO.
+
+    The estimation is computed locally by encoding a sample of the rows.
+
+    Args:
+        dataframe (pandas.DataFrame, geopandas.GeoDataFrame`): data to be uploaded.
+        if_exists (str, optional): 'fail', 'replace', 'append'. Default is 'fail'.
+        geom_col (str, optional): name of the geometry column of the dataframe.
+        index (bool, optional): write the index in the table. Default is False.
+        index_label (str, optional): name of the index column in the table. By default it
+            uses the name of the index from the dataframe.
+        cartodbfy (bool, optional): convert the table to CARTO format. Default True.
+        bulk_load (bool, optional): prepare the table after loading the data. Default False.
+
+    Returns:
+        A named-tuple ``(rows, bytes, round_trips, quota)`` with the expected number of rows,
+        bytes transferred, requests to CARTO and quota units consumed.
+
+    Raises:
+        ValueError: if the dataframe provided is wrong or the if_exists param is not valid.
+
+    """
+    if not isinstance(dataframe, DataFrame):
+        raise ValueError('Wrong dataframe. You should provide a valid DataFrame instance.')
+
+    if if_exists not in IF_EXISTS_OPTIONS:
+        raise ValueError('Wrong option for the `if_exists` param. You should provide: {}.'.format(
+            ', '.join(IF_EXISTS_OPTIONS)))
+
+    gdf = _prepare_dataframe(dataframe, geom_col, index, index_label)
+
+    return estimate_copy_from(gdf, if_exists, cartodbfy, bulk_load)
+
+
 def has_table(table_name, credentials=None, schema=None):
     """Check if the table exists in the CARTO account.
 
@@ -331,3 +426,26 @@ def update_privacy_table(table_name, privacy, credentials=None, log_enabled=True
 
     if log_enabled:
         log.info('Success! Table "{}" privacy updated correctly'.format(table_name))
+
+
+def _prepare_dataframe(dataframe, geom_col=None, index=False, index_label=None):
+    gdf = GeoDataFrame(dataframe, copy=True)
+
+    if index:
+        index_name = index_label or gdf.index.name
+        if index_name is not None and index_name != '':
+            # Append the index as a column
+            gdf[index_name] = gdf.index
+        else:
+            raise ValueError('Wrong index name. You should provide a valid index label.')
+
+    if geom_col in gdf:
+        set_geometry(gdf, geom_col, inplace=True, drop=True)
+    elif has_geometry(dataframe):
+        gdf.set_geometry(dataframe.geometry.name, inplace=True)
+
+    if has_geometry(gdf):
+        # Prepare geometry column for the upload
+        gdf.rename_geometry(GEOM_COLUMN_NAME, inplace=True)
+
+    return gdf
@@ -0,0 +1,166 @@
+import time
+
+from collections import deque
+from concurrent.futures import Future
+from threading import Thread, Lock, Condition
+
+from carto.exceptions import CartoException
+from carto.sql import BATCH_JOBS_PENDING_STATUSES, BATCH_JOBS_FAILED_STATUSES
+
+from ...utils.logger import log
+
+# Maximum number of batch jobs running at the same time per account
+DEFAULT_MAX_JOBS = 4
+# Seconds between the status reads of a job: it starts with the minimum interval
+# and it grows by the backoff factor after each read, up to the maximum interval
+MIN_POLL_INTERVAL = 0.25
+MAX_POLL_INTERVAL = 5
+POLL_BACKOFF_FACTOR = 1.5
+
+_managers = {}
+_managers_lock = Lock()
+
+
+def get_batch_job_manager(account):
+    """Get the batch job manager shared by all the clients of an account"""
+    with _managers_lock:
+        if account not in _managers:
+            _managers[account] = BatchJobManager()
+        return _managers[account]
+
+
+class BatchJob:
+
+    def __init__(self, batch_sql_client, query):
+        self.batch_sql_client = batch_sql_client
+        self.query = query
+        self.future = Future()
+        self.job_id = None
+        self.interval = MIN_POLL_INTERVAL
+        self.next_poll = 0
+
+
+class BatchJobManager:
+    """Submit batch SQL jobs and wait for all of them in a single polling loop.
+
+    The jobs are queued and started while the number of running jobs is under `max_jobs`.
+    The status of each running job is read with an adaptive interval, growing while
+    the job is still running, so short jobs finish fast and long jobs do not flood the API.
+    The loop is woken up when a job is submitted, and the callbacks run in their own threads,
+    so they can submit new jobs and wait for them.
+
+    Args:
+        max_jobs (int, optional): maximum number of jobs running at the same time.
+            Default is DEFAULT_MAX_JOBS.
+
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._queued = deque()
+        self._running = []
+        self._lock = Lock()
+        self._wakeup = Condition(self._lock)
+        self._thread = None
+
+    def submit(self, batch_sql_client, query, callback=None):
+        """Queue a batch SQL job.
+
+        Args:
+            batch_sql_client (carto.sql.BatchSQLClient): client used to create and read the job.
+            query (str): SQL query.
+            callback (function, optional): function called with the future when the job finishes.
+
+        Returns:
+            concurrent.futures.Future resolved with the job data when the job is done.
+
+        """
+        job = BatchJob(batch_sql_client, query)
+
+        if callback is not None:
+            job.future.add_done_callback(lambda future: _start_thread(callback, future))
+
+        with self._lock:
+            self._queued.append(job)
+            if self._thread is None:
+                self._thread = _start_thread(self._run)
+            else:
+                self._wakeup.notify()
+
+        return job.future
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._queued and not self._running:
+                    self._thread = None
+                    return
+                jobs = []
+                while self._queued and len(self._running) + len(jobs) < self.max_jobs:
+                    jobs.append(self._queued.popleft())
+
+            for job in jobs:
+                self._start(job)
+
+            now = time.time()
+            for job in list(self._running):
+                if job.next_poll <= now:
+                    self._poll(job)
+
+            with self._lock:
+                if self._running and (not self._queued or len(self._running) >= self.max_jobs):
+                    next_poll = min(job.next_poll for job in self._running)
+                    self._wakeup.wait(max(0, next_poll - time.time()))
+
+    def _start(self, job):
+        if not job.future.set_running_or_notify_cancel():
+            return
+
+        try:
+            data = job.batch_sql_client.create(job.query)
+        except Exception as err:
+            job.future.set_exception(err)
+            return
+
+        job.job_id = data.get('job_id')
+        log.debug('Batch job "{}" created'.format(job.job_id))
+
+        if not self._finish(job, data):
+            job.next_poll = time.time() + job.interval
+            self._running.append(job)
+
+    def _poll(self, job):
+        try:
+            data = job.batch_sql_client.read(job.job_id)
+        except Exception as err:
+            self._running.remove(job)
+            job.future.set_exception(err)
+            return
+
+        if self._finish(job, data):
+            self._running.remove(job)
+        else:
+            job.interval = min(job.interval * POLL_BACKOFF_FACTOR, MAX_POLL_INTERVAL)
+            job.next_poll = time.time() + job.interval
+
+    def _finish(self, job, data):
+        status = data.get('status')
+
+        if status in BATCH_JOBS_PENDING_STATUSES:
+            return False
+
+        log.debug('Batch job "{}" finished with status "{}"'.format(job.job_id, status))
+
+        if status in BATCH_JOBS_FAILED_STATUSES:
+            job.future.set_exception(CartoException('Batch SQL job failed with result: {data}'.format(data=data)))
+        else:
+            job.future.set_result(data)
+
+        return True
+
+
+def _start_thread(target, *args):
+    thread = Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
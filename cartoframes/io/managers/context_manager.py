@@ -1,12 +1,17 @@
+import json
 import time
 
-from pandas import read_csv
+from collections import namedtuple
+from pandas import read_csv, isna
+from pandas.api.types import is_scalar
 from warnings import warn
 
 from carto.auth import APIKeyAuthClient
 from carto.exceptions import CartoException, CartoRateLimitException
 from carto.sql import SQLClient, BatchSQLClient, CopySQLClient
 
+from .copy_pipeline import read_csv_pipelined, encode_parallel
+from .batch_job_manager import get_batch_job_manager
 from ..dataset_info import DatasetInfo
 from ... import __version__
 from ...auth.defaults import get_default_credentials
@@ -14,10 +19,19 @@ from ...utils.logger import log
 from ...utils.geom_utils import encode_geometry_ewkb
 from ...utils.utils import is_sql_query, check_credentials, encode_row, map_geom_type, PG_NULL
 from ...utils.columns import Column, get_dataframe_columns_info, obtain_converters, \
-                      date_columns_names, normalize_name
+                      date_columns_names, normalize_name, compact_dtypes
 
 DEFAULT_RETRY_TIMES = 3
 
+DTYPE_BACKEND_OPTIONS = ['compact']
+
+# Requests sent by a batch job: the creation plus, at least, one status read
+BATCH_JOB_ROUND_TRIPS = 2
+# Number of rows encoded to estimate the size of a COPY FROM payload
+ESTIMATE_SAMPLE_SIZE = 1000
+
+Estimate = namedtuple('Estimate', ['rows', 'bytes', 'round_trips', 'quota'])
+
 
 class ContextManager:
 
@@ -29,27 +43,41 @@ class ContextManager:
         self.sql_client = SQLClient(self.auth_client)
         self.copy_client = CopySQLClient(self.auth_client)
         self.batch_sql_client = BatchSQLClient(self.auth_client)
+        self.batch_job_manager = get_batch_job_manager(self.credentials.base_url)
 
     def execute_query(self, query, parse_json=True, do_post=True, format=None, **request_args):
         return self.sql_client.send(query.strip(), parse_json, do_post, format, **request_args)
 
     def execute_long_running_query(self, query):
-        return self.batch_sql_client.create_and_wait_for_completion(query.strip())
+        return self.submit_long_running_query(query).result()
 
-    def copy_to(self, source, schema, limit=None, retry_times=DEFAULT_RETRY_TIMES):
+    def submit_long_running_query(self, query, callback=None):
+        return self.batch_job_manager.submit(self.batch_sql_client, query.strip(), callback)
+
+    def copy_to(self, source, schema, limit=None, retry_times=DEFAULT_RETRY_TIMES, dtype_backend=None,
+                chunksize=None, decode_geom=False):
         query = self.compute_query(source, schema)
         columns = self._get_query_columns_info(query)
         copy_query = self._get_copy_query(query, columns, limit)
-        return self._copy_to(copy_query, columns, retry_times)
+        df = self._copy_to(copy_query, columns, retry_times, chunksize, decode_geom)
+
+        if dtype_backend == 'compact':
+            compact_dtypes(df, columns)
 
-    def copy_from(self, gdf, table_name, if_exists='fail', cartodbfy=True):
+        return df
+
+    def copy_from(self, gdf, table_name, if_exists='fail', cartodbfy=True, workers=None, bulk_load=False,
+                  cluster=False):
         schema = self.get_schema()
         table_name = self.normalize_table_name(table_name)
         columns = get_dataframe_columns_info(gdf)
+        created = False
 
         if if_exists == 'replace' or not self.has_table(table_name, schema):
             log.debug('Creating table "{}"'.format(table_name))
-            self._create_table_from_columns(table_name, columns, schema, cartodbfy)
+            # In bulk load mode the table is cartodbfied after the COPY
+            self._create_table_from_columns(table_name, columns, schema, cartodbfy and not bulk_load)
+            created = True
         elif if_exists == 'fail':
             raise Exception('Table "{schema}.{table_name}" already exists in your CARTO account. '
                             'Please choose a different `table_name` or use '
@@ -58,7 +86,12 @@ class ContextManager:
         else:  # 'append'
             pass
 
-        self._copy_from(gdf, table_name, columns)
+        self._copy_from(gdf, table_name, columns, workers)
+
+        if bulk_load:
+            log.debug('Preparing table "{}" after the load'.format(table_name))
+            self._prepare_loaded_table(table_name, columns, schema, cartodbfy and created, cluster)
+
         return table_name
 
     def create_table_from_query(self, query, table_name, if_exists, cartodbfy=True):
@@ -141,6 +174,39 @@ class ContextManager:
         result = self.execute_query("SELECT COUNT(*) FROM ({query}) _query".format(query=query))
         return result.get('rows')[0].get('count')
 
+    def estimate_size(self, source, schema=None):
+        """Estimate the number of rows and bytes of a table or query without scanning it.
+
+        Tables use the `pg_class` statistics, queries the `EXPLAIN` estimations.
+        It returns a tuple (rows, bytes).
+        """
+        if not is_sql_query(source):
+            schema = schema or self.get_schema()
+            stats = self._get_table_stats(source, schema)
+            if stats and stats.get('rows', 0) > 0:
+                return int(stats.get('rows')), int(stats.get('bytes'))
+            source = self._compute_query_from_table(source, schema)
+
+        plan = self._explain_plan(source)
+        rows = int(plan.get('Plan Rows', 0))
+        return rows, rows * int(plan.get('Plan Width', 0))
+
+    def estimate_copy_to(self, source, schema=None, limit=None):
+        """Estimate the cost of a `copy_to` call without downloading the data"""
+        # Columns info + COPY TO
+        round_trips = 2
+        if not is_sql_query(source) and schema is None:
+            schema = self.get_schema()
+            round_trips += 1
+
+        rows, size = self.estimate_size(source, schema)
+
+        if limit is not None and limit < rows:
+            size = size * limit // rows
+            rows = limit
+
+        return Estimate(rows=rows, bytes=size, round_trips=round_trips, quota=0)
+
     def get_bounds(self, query):
         extent_query = '''
             SELECT ARRAY[
@@ -177,6 +243,32 @@ class ContextManager:
         except CartoException:
             return False
 
+    def get_tables_updated_at(self, source, schema=None):
+        """Get the last update of the tables involved in a table or query, or None
+        if any of the tables has no update information"""
+        if is_sql_query(source):
+            query = source
+        else:
+            query = self._compute_query_from_table(source, schema) if schema else 'SELECT * FROM "{}"'.format(source)
+        updated_at_query = '''
+            SELECT
+                COALESCE(array_length(t.tables, 1), 0) AS num_tables,
+                COUNT(m.updated_at) AS num_updated,
+                MAX(m.updated_at) AS updated_at
+            FROM (SELECT CDB_QueryTablesText('{query}') AS tables) t
+            LEFT JOIN CDB_TableMetadata m ON m.tabname = ANY(t.tables::regclass[])
+            GROUP BY t.tables
+        '''.format(query=query.replace("'", "''"))
+        try:
+            result = self.execute_query(updated_at_query)
+        except CartoException as err:
+            log.debug('Tables update can not be retrieved: {}'.format(err))
+            return None
+        row = result.get('rows')[0]
+        if row.get('num_tables') > 0 and row.get('num_tables') == row.get('num_updated'):
+            return row.get('updated_at')
+        return None
+
     def get_table_names(self, query):
         # Used to detect tables in queries in the publication.
         query = 'SELECT CDB_QueryTablesText(\'{}\') as tables'.format(query)
@@ -203,6 +295,16 @@ class ContextManager:
         )
         self.execute_long_running_query(query)
 
+    def _prepare_loaded_table(self, table_name, columns, schema, cartodbfy=True, cluster=False):
+        has_geom = any(column.is_geom for column in columns)
+        query = 'BEGIN; {cartodbfy}; {index}; {cluster}; {analyze}; COMMIT;'.format(
+            cartodbfy=_cartodbfy_query(table_name, schema) if cartodbfy else '',
+            index=_create_geom_index_query(table_name) if has_geom else '',
+            cluster=_cluster_geom_index_query(table_name) if has_geom and cluster else '',
+            analyze=_analyze_table_query(table_name)
+        )
+        self.execute_long_running_query(query)
+
     def compute_query(self, source, schema=None):
         if is_sql_query(source):
             return source
@@ -223,6 +325,25 @@ class ContextManager:
         except CartoException:
             return False
 
+    def _explain_plan(self, query):
+        explain_query = 'EXPLAIN (FORMAT JSON) {}'.format(query)
+        result = self.execute_query(explain_query, do_post=False)
+        plan = result.get('rows')[0].get('QUERY PLAN')
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0].get('Plan')
+
+    def _get_table_stats(self, table_name, schema):
+        stats_query = '''
+            SELECT reltuples::bigint AS rows, pg_table_size(oid) AS bytes
+            FROM pg_class
+            WHERE oid = '"{schema}"."{table_name}"'::regclass
+        '''.format(schema=schema, table_name=table_name)
+        result = self.execute_query(stats_query, do_post=False)
+        if result and result.get('rows'):
+            return result.get('rows')[0]
+        return None
+
     def _get_query_columns_info(self, query):
         query = 'SELECT * FROM ({}) _q LIMIT 0'.format(query)
         table_info = self.execute_query(query)
@@ -244,7 +365,7 @@ class ContextManager:
 
         return query
 
-    def _copy_to(self, query, columns, retry_times):
+    def _copy_to(self, query, columns, retry_times, chunksize=None, decode_geom=False):
         copy_query = 'COPY ({0}) TO stdout WITH (FORMAT csv, HEADER true, NULL \'{1}\')'.format(query, PG_NULL)
 
         try:
@@ -255,7 +376,7 @@ class ContextManager:
                 warn('Read call rate limited. Waiting {s} seconds'.format(s=err.retry_after))
                 time.sleep(err.retry_after)
                 warn('Retrying...')
-                return self._copy_to(query, columns, retry_times)
+                return self._copy_to(query, columns, retry_times, chunksize, decode_geom)
             else:
                 warn(('Read call was rate-limited. '
                       'This usually happens when there are multiple queries being read at the same time.'))
@@ -263,6 +384,15 @@ class ContextManager:
 
         converters = obtain_converters(columns)
         parse_dates = date_columns_names(columns)
+        geom_col = Column.NORMALIZED_GEOM_COL_NAME if decode_geom else None
+
+        if chunksize is not None:
+            return read_csv_pipelined(
+                raw_result,
+                chunksize,
+                converters=converters,
+                parse_dates=parse_dates,
+                geom_col=geom_col)
 
         df = read_csv(
             raw_result,
@@ -271,13 +401,17 @@ class ContextManager:
 
         return df
 
-    def _copy_from(self, dataframe, table_name, columns):
+    def _copy_from(self, dataframe, table_name, columns, workers=None):
         query = """
             COPY {table_name}({columns}) FROM stdin WITH (FORMAT csv, DELIMITER '|', NULL '{null}');
         """.format(
             table_name=table_name, null=PG_NULL,
             columns=','.join(column.dbname for column in columns)).strip()
-        data = _compute_copy_data(dataframe, columns)
+
+        if workers is not None and workers > 1:
+            data = encode_parallel(dataframe, columns, _compute_copy_data, workers)
+        else:
+            data = _compute_copy_data(dataframe, columns)
         self.copy_client.copyfrom(query, data)
 
     def _rename_table(self, table_name, new_table_name):
@@ -291,6 +425,26 @@ class ContextManager:
         return norm_table_name
 
 
+def estimate_copy_from(gdf, if_exists='fail', cartodbfy=True, bulk_load=False):
+    """Estimate the cost of a `copy_from` call from a sample of the encoded data"""
+    columns = get_dataframe_columns_info(gdf)
+    rows = len(gdf)
+    sample = gdf.head(ESTIMATE_SAMPLE_SIZE)
+    sample_size = sum(len(row) for row in _compute_copy_data(sample, columns))
+    size = sample_size * rows // len(sample) if len(sample) > 0 else 0
+
+    # Schema + table creation + COPY FROM
+    round_trips = 1 + BATCH_JOB_ROUND_TRIPS + 1
+    if if_exists != 'replace':
+        # Existence check
+        round_trips += 1
+    if bulk_load:
+        # Table preparation after the load
+        round_trips += BATCH_JOB_ROUND_TRIPS
+
+    return Estimate(rows=rows, bytes=size, round_trips=round_trips, quota=0)
+
+
 def _drop_table_query(table_name, if_exists=True):
     return '''DROP TABLE {if_exists} {table_name}'''.format(
         table_name=table_name,
@@ -314,6 +468,24 @@ def _cartodbfy_query(table_name, schema):
         .format(schema=schema, table_name=table_name)
 
 
+def _geom_index_name(table_name):
+    return '{table_name}_the_geom_idx'.format(table_name=table_name)
+
+
+def _create_geom_index_query(table_name):
+    return 'CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} USING GIST (the_geom)'.format(
+        index_name=_geom_index_name(table_name), table_name=table_name)
+
+
+def _cluster_geom_index_query(table_name):
+    return 'CLUSTER {table_name} USING {index_name}'.format(
+        index_name=_geom_index_name(table_name), table_name=table_name)
+
+
+def _analyze_table_query(table_name):
+    return 'ANALYZE {table_name}'.format(table_name=table_name)
+
+
 def _rename_table_query(table_name, new_table_name):
     return 'ALTER TABLE {table_name} RENAME TO {new_table_name};'.format(
         table_name=table_name, new_table_name=new_table_name)
@@ -337,6 +509,9 @@ def _compute_copy_data(df, columns):
 
             if column.is_geom:
                 val = encode_geometry_ewkb(val)
+            elif column.dbtype == 'text' and is_scalar(val) and isna(val):
+                # Missing values of categorical and string columns
+                val = None
 
             row_data.append(encode_row(val))
 
@@ -0,0 +1,179 @@
+"""Pipelines for COPY TO and COPY FROM streams.
+
+The download of the stream, the parsing of the CSV chunks and the decoding
+of the geometries run in different threads, so the phases overlap and the
+total time approaches the slowest phase instead of the sum of all of them.
+
+The encoding of the uploaded data is sharded by row blocks across a process pool.
+"""
+
+from io import RawIOBase
+from collections import deque
+from multiprocessing import Pool
+from queue import Queue, Full
+from threading import Thread, Event
+from concurrent.futures import ThreadPoolExecutor
+
+from pandas import read_csv, concat
+
+from ...utils.geom_utils import decode_geometry
+
+# Size of the blocks read from the network stream
+BLOCK_SIZE = 64 * 1024
+# Maximum number of blocks buffered between the download and the parsing
+MAX_BUFFERED_BLOCKS = 256
+# Number of threads decoding geometries
+DEFAULT_DECODE_WORKERS = 4
+# Seconds between checks of the stop signal while the buffer is full
+QUEUE_TIMEOUT = 0.1
+# Number of rows encoded per task in the process pool
+ENCODE_BLOCK_SIZE = 10000
+# Maximum number of encoded blocks waiting to be sent per worker
+MAX_PENDING_BLOCKS_PER_WORKER = 2
+
+# Data shared with the encoding processes
+_worker_data = {}
+
+
+class BufferedStream(RawIOBase):
+    """Readable stream fed by a background thread through a bounded buffer."""
+
+    def __init__(self, stream, max_blocks=MAX_BUFFERED_BLOCKS):
+        self._queue = Queue(maxsize=max_blocks)
+        self._stop = Event()
+        self._leftover = b''
+        self._finished = False
+        self._thread = Thread(target=self._download, args=(stream,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self._leftover:
+            if self._finished:
+                return 0
+
+            item = self._queue.get()
+
+            if isinstance(item, Exception):
+                self._finished = True
+                raise item
+
+            if item is None:
+                self._finished = True
+                return 0
+
+            self._leftover = item
+
+        length = len(b)
+        output, self._leftover = self._leftover[:length], self._leftover[length:]
+        b[:len(output)] = output
+        return len(output)
+
+    def close(self):
+        self._stop.set()
+        super(BufferedStream, self).close()
+
+    def _download(self, stream):
+        try:
+            while not self._stop.is_set():
+                block = stream.read(BLOCK_SIZE)
+                if not block:
+                    break
+                self._put(block)
+            self._put(None)
+        except Exception as err:
+            self._put(err)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=QUEUE_TIMEOUT)
+                return
+            except Full:
+                continue
+
+
+def read_csv_pipelined(stream, chunksize, converters=None, parse_dates=None, geom_col=None,
+                       workers=DEFAULT_DECODE_WORKERS):
+    """Read a CSV stream overlapping the download, the parsing and the geometry decoding.
+
+    Args:
+        stream (file-like): CSV stream.
+        chunksize (int): number of rows parsed per chunk.
+        converters (dict, optional): converters passed to `pandas.read_csv`.
+        parse_dates (list, optional): date columns passed to `pandas.read_csv`.
+        geom_col (str, optional): name of the column to be decoded into geometries.
+        workers (int, optional): number of threads decoding geometries.
+
+    Returns:
+        pandas.DataFrame with the chunks assembled in order.
+
+    """
+    buffered_stream = BufferedStream(stream)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            reader = read_csv(buffered_stream, converters=converters, parse_dates=parse_dates, chunksize=chunksize)
+
+            for chunk in reader:
+                futures.append(executor.submit(_decode_chunk, chunk, geom_col))
+
+            chunks = [future.result() for future in futures]
+    finally:
+        buffered_stream.close()
+
+    return concat(chunks, ignore_index=True)
+
+
+def _decode_chunk(chunk, geom_col):
+    if geom_col is not None and geom_col in chunk:
+        chunk[geom_col] = decode_geometry(chunk[geom_col])
+    return chunk
+
+
+def encode_parallel(df, columns, encoder, workers, block_size=None):
+    """Encode a DataFrame by row blocks in a process pool, yielding the blocks in order.
+
+    The DataFrame is sent to the processes once, when they are created (with the `fork`
+    start method it is inherited without copying it), and each task only receives
+    the bounds of its block. The number of encoded blocks waiting to be consumed
+    is bounded to keep the memory usage stable.
+
+    Args:
+        df (pandas.DataFrame): data to be encoded.
+        columns (list): ColumnInfo list of the columns to be encoded.
+        encoder (function): module level function that returns an iterable of encoded
+            rows from a (DataFrame, columns) pair.
+        workers (int): number of processes.
+        block_size (int, optional): number of rows per block. Default is ENCODE_BLOCK_SIZE.
+
+    """
+    block_size = block_size or ENCODE_BLOCK_SIZE
+    bounds = deque((start, min(start + block_size, len(df))) for start in range(0, len(df), block_size))
+    max_pending = workers * MAX_PENDING_BLOCKS_PER_WORKER
+
+    pool = Pool(workers, initializer=_init_encode_worker, initargs=(df, columns, encoder))
+    try:
+        pending = deque()
+        while bounds or pending:
+            while bounds and len(pending) < max_pending:
+                pending.append(pool.apply_async(_encode_block, (bounds.popleft(),)))
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+
+
+def _init_encode_worker(df, columns, encoder):
+    _worker_data['df'] = df
+    _worker_data['columns'] = columns
+    _worker_data['encoder'] = encoder
+
+
+def _encode_block(bounds):
+    start, stop = bounds
+    df = _worker_data['df'].iloc[start:stop]
+    return b''.join(_worker_data['encoder'](df, _worker_data['columns']))
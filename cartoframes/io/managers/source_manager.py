@@ -1,7 +1,7 @@
 from pandas import DataFrame
 from geopandas import GeoDataFrame
 
-from .context_manager import ContextManager
+from .context_manager import ContextManager, estimate_copy_from
 from ...utils.utils import is_sql_query
 from ...utils.geom_utils import has_geometry
 
@@ -53,6 +53,17 @@ class SourceManager:
         else:
             return len(self._gdf)
 
+    def estimate_size(self):
+        """Estimate the number of rows and bytes of the source without a full scan.
+
+        For local data, the bytes are the estimated size of the upload.
+        """
+        if self.is_remote():
+            return self._context_manager.estimate_size(self._source)
+        else:
+            estimate = estimate_copy_from(self._gdf)
+            return estimate.rows, estimate.bytes
+
     def get_column_names(self):
         if self.is_remote():
             return self._context_manager.get_column_names(self._query)
@@ -1,9 +1,12 @@
 from .logger import set_log_level
 from .geom_utils import decode_geometry
 from .metrics import setup_metrics
+from .cache import get_query_cache, get_enrichment_cache
 
 __all__ = [
     'setup_metrics',
     'set_log_level',
-    'decode_geometry'
+    'decode_geometry',
+    'get_query_cache',
+    'get_enrichment_cache'
 ]
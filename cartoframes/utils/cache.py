@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import time
+import uuid
+import appdirs
+import hashlib
+
+from threading import Lock
+from pandas import read_parquet
+
+from .logger import log
+from .utils import check_package
+from .geom_utils import decode_geometry, detect_encoding_type, ENC_SHAPELY
+
+USER_CACHE_DIR = os.path.join(appdirs.user_cache_dir('cartoframes'), 'queries')
+ENRICHMENT_CACHE_DIR = os.path.join(appdirs.user_cache_dir('cartoframes'), 'enrichment')
+INDEX_FILENAME = 'index.json'
+DEFAULT_MAX_SIZE = 1024 ** 3  # 1 GB
+# Quoted sections (with doubled quotes as escapes) and line comments, or runs of whitespaces
+QUERY_TOKENS_RE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*\n?)|\s+")
+
+_query_cache = None
+_enrichment_cache = None
+
+
+def get_query_cache():
+    """Get the on-disk cache used by `read_carto(..., cache=True)`.
+
+    Example:
+        >>> query_cache = get_query_cache()
+        >>> query_cache.stats()
+        >>> query_cache.max_size = 512 * 1024 ** 2
+        >>> query_cache.clear()
+
+    """
+    global _query_cache
+
+    if _query_cache is None:
+        _query_cache = QueryCache()
+
+    return _query_cache
+
+
+def get_enrichment_cache():
+    """Get the on-disk cache of the Data Observatory geographies and datasets downloaded by
+    the 'local' enrichment engine. It is independent from the query cache, with its own directory
+    and `max_size`, so the large catalog downloads do not evict the `read_carto` results.
+
+    Example:
+        >>> enrichment_cache = get_enrichment_cache()
+        >>> enrichment_cache.stats()
+        >>> enrichment_cache.max_size = 4 * 1024 ** 3
+        >>> enrichment_cache.clear()
+
+    """
+    global _enrichment_cache
+
+    if _enrichment_cache is None:
+        _enrichment_cache = QueryCache(path=ENRICHMENT_CACHE_DIR)
+
+    return _enrichment_cache
+
+
+class QueryCache:
+    """On-disk cache of query results stored as Parquet files.
+
+    The entries are validated with the last update of the tables involved in the query
+    and evicted, the least recently used first, when the cache exceeds `max_size` bytes.
+
+    Args:
+        path (str, optional): directory of the cache. Default is the user cache directory.
+        max_size (int, optional): maximum size of the cache in bytes. Default is 1 GB.
+
+    """
+
+    def __init__(self, path=USER_CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    def read(self, key_params, updated_at, fetch):
+        """Read a DataFrame from the cache, or fetch it and store it.
+
+        Args:
+            key_params (dict): parameters identifying the request (credentials, query, limit...).
+            updated_at (str): last update of the tables involved in the query. If None,
+                the request is not cacheable and the data is fetched.
+            fetch (function): function returning the DataFrame when it is not cached.
+
+        """
+        check_package('pyarrow', is_optional=True)
+
+        if updated_at is None:
+            return fetch()
+
+        key = cache_key(key_params)
+
+        with self._lock:
+            index = self._read_index()
+            entry = index.get(key)
+            if entry and entry['updated_at'] == updated_at and os.path.exists(self._filepath(entry)):
+                df = self._load(entry)
+                if df is not None:
+                    self._hits += 1
+                    entry['last_access'] = time.time()
+                    self._write_index(index)
+                    log.debug('Query cache hit "{}"'.format(key))
+                    return df
+
+            self._misses += 1
+
+        df = fetch()
+
+        with self._lock:
+            index = self._read_index()
+            entry = self._store(df, key, updated_at)
+            if entry is not None:
+                if key in index:
+                    self._remove_file(index[key])
+                index[key] = entry
+                self._evict(index)
+                self._write_index(index)
+
+        return df
+
+    def stats(self):
+        """Get the statistics of the cache: hits and misses of the current session,
+        number of entries, size in bytes and maximum size in bytes."""
+        index = self._read_index()
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'entries': len(index),
+            'size': sum(entry['size'] for entry in index.values()),
+            'max_size': self.max_size
+        }
+
+    def clear(self):
+        """Remove all the entries of the cache."""
+        with self._lock:
+            for entry in self._read_index().values():
+                self._remove_file(entry)
+            self._write_index({})
+
+    def _load(self, entry):
+        try:
+            df = read_parquet(self._filepath(entry))
+        except Exception as err:
+            log.debug('Query cache entry can not be read: {}'.format(err))
+            return None
+
+        for column in entry.get('geom_columns', []):
+            df[column] = decode_geometry(df[column])
+
+        return df
+
+    def _store(self, df, key, updated_at):
+        df = df.copy()
+        geom_columns = _geometry_columns(df)
+        for column in geom_columns:
+            df[column] = df[column].apply(_encode_geometry)
+
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        filename = '{}_{}.parquet'.format(key, uuid.uuid4().hex[:8])
+        filepath = os.path.join(self.path, filename)
+        try:
+            df.to_parquet(filepath)
+        except Exception as err:
+            # Some object columns (e.g., arrays) can not be stored
+            log.debug('Query result can not be cached: {}'.format(err))
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            return None
+
+        return {
+            'filename': filename,
+            'updated_at': updated_at,
+            'size': os.path.getsize(filepath),
+            'last_access': time.time(),
+            'geom_columns': geom_columns
+        }
+
+    def _evict(self, index):
+        size = sum(entry['size'] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]['last_access']):
+            if size <= self.max_size:
+                break
+            size -= index[key]['size']
+            self._remove_file(index.pop(key))
+
+    def _read_index(self):
+        filepath = os.path.join(self.path, INDEX_FILENAME)
+        if not os.path.exists(filepath):
+            return {}
+        try:
+            with open(filepath, 'r') as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def _write_index(self, index):
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        filepath = os.path.join(self.path, INDEX_FILENAME)
+        tmp_filepath = '{}.{}'.format(filepath, uuid.uuid4().hex[:8])
+        with open(tmp_filepath, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_filepath, filepath)
+
+    def _filepath(self, entry):
+        return os.path.join(self.path, entry['filename'])
+
+    def _remove_file(self, entry):
+        filepath = self._filepath(entry)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+
+def cache_key(key_params):
+    params = dict(key_params)
+    if 'query' in params:
+        params['query'] = normalize_query(params['query'])
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def normalize_query(query):
+    """Collapse whitespaces and remove the trailing semicolon of a query. The string literals,
+    quoted identifiers and comments are kept as they are"""
+    query = QUERY_TOKENS_RE.sub(lambda match: match.group(1) or ' ', query)
+    return query.strip().rstrip(';').strip()
+
+
+def _geometry_columns(df):
+    columns = []
+    for column in df.columns:
+        values = df[column].dropna()
+        if len(values) > 0 and detect_encoding_type(values.iloc[0]) == ENC_SHAPELY:
+            columns.append(column)
+    return columns
+
+
+def _encode_geometry(geom):
+    if geom is None or geom.is_empty:
+        return None
+    return geom.wkb_hex
@@ -1,9 +1,13 @@
 # coding=UTF-8
 
 import re
+import numpy as np
 
 from unidecode import unidecode
 from collections import namedtuple
+from functools import lru_cache
+from pandas import to_numeric
+from pandas.api.types import infer_dtype, is_integer_dtype
 
 from .utils import dtypes2pg, pg2dtypes, PG_NULL
 from .geom_utils import decode_geometry_item, detect_encoding_type
@@ -14,6 +18,7 @@ class Column(object):
     OBJECT_DTYPE = 'object'
     INT_DTYPES = ['int16', 'int32', 'int64']
     FLOAT_DTYPES = ['float32', 'float64']
+    NUMERIC_PGTYPES = ['numeric', 'decimal']
     DATETIME_DTYPES = ['datetime64[D]', 'datetime64[ns]', 'datetime64[ns, UTC]']
     INDEX_COLUMN_NAME = 'cartodb_id'
     FORBIDDEN_COLUMN_NAMES = ['the_geom_webmercator']
@@ -31,6 +36,11 @@ class Column(object):
                       'TO', 'TRAILING', 'TRUE', 'UNION', 'UNIQUE', 'USER', 'USING', 'VERBOSE', 'WHEN', 'WHERE',
                       'XMIN', 'XMAX', 'FORMAT', 'CONTROLLER', 'ACTION', )
     NORMALIZED_GEOM_COL_NAME = 'the_geom'
+    GEOM_PGTYPES = ['geometry', 'geography']
+    # Maximum ratio of unique values of a text column to be converted into a category
+    CATEGORY_MAX_RATIO = 0.5
+    # Maximum number of sanitized names kept in memory
+    NORMALIZE_CACHE_SIZE = 8192
 
     @staticmethod
     def from_sql_api_fields(fields):
@@ -47,14 +57,10 @@ class Column(object):
             self.normalize()
 
     def normalize(self, forbidden_column_names=None):
-        self._sanitize()
-        self.name = self._truncate()
+        self.name = _sanitize_name(self.name)
 
         if forbidden_column_names:
-            i = 1
-            while self.name in forbidden_column_names:
-                self.name = '{}_{}'.format(self._truncate(length=Column.MAX_COLLISION_LENGTH), str(i))
-                i += 1
+            self.name = _avoid_collision(self.name, set(forbidden_column_names))
 
         return self
 
@@ -65,10 +71,10 @@ class Column(object):
             self.name = '_{}'.format(self.name)
 
     def _is_reserved(self):
-        return self.name.upper() in Column.RESERVED_WORDS
+        return self.name.upper() in RESERVED_WORDS
 
     def _is_unsupported(self):
-        return not re.match(r'^[a-z_]+[a-z_0-9]*$', self.name)
+        return not SUPPORTED_NAME_RE.match(self.name)
 
     def _truncate(self, length=MAX_LENGTH):
         return self.name[:length]
@@ -76,17 +82,48 @@ class Column(object):
     def _slugify(self, value):
         value = unidecode(str(value).lower())
 
-        value = re.sub(r'<[^>]+>', '', value)
-        value = re.sub(r'&.+?;', '-', value)
-        value = re.sub(r'[^a-z0-9 _-]', '-', value).strip().lower()
-        value = re.sub(r'\s+', '-', value)
-        value = re.sub(r' ', '-', value)
-        value = re.sub(r'-+', '-', value)
-        value = re.sub(r'-', '_', value)
+        value = HTML_TAG_RE.sub('', value)
+        value = HTML_ENTITY_RE.sub('-', value)
+        value = INVALID_CHARS_RE.sub('-', value).strip().lower()
+        value = SEPARATORS_RE.sub('-', value)
+        value = DASHES_RE.sub('_', value)
 
         return value
 
 
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+HTML_ENTITY_RE = re.compile(r'&.+?;')
+INVALID_CHARS_RE = re.compile(r'[^a-z0-9 _-]')
+SEPARATORS_RE = re.compile(r'\s+')
+DASHES_RE = re.compile(r'-+')
+SUPPORTED_NAME_RE = re.compile(r'^[a-z_]+[a-z_0-9]*$')
+RESERVED_WORDS = frozenset(Column.RESERVED_WORDS)
+
+
+@lru_cache(maxsize=Column.NORMALIZE_CACHE_SIZE)
+def _sanitize_name(name):
+    column = Column(name, normalize=False)
+    column._sanitize()
+    return column._truncate()
+
+
+def _avoid_collision(name, forbidden_names, chains=None):
+    """Add numeric suffixes to a name until it is not forbidden. `chains` keeps the last
+    name tried for each name, so the search does not start again for repeated names"""
+    if name not in forbidden_names:
+        return name
+
+    i, new_name = chains.get(name, (1, name)) if chains is not None else (1, name)
+    while new_name in forbidden_names:
+        new_name = '{}_{}'.format(new_name[:Column.MAX_COLLISION_LENGTH], i)
+        i += 1
+
+    if chains is not None:
+        chains[name] = (i, new_name)
+
+    return new_name
+
+
 ColumnInfo = namedtuple('ColumnInfo', ['name', 'dbname', 'dbtype', 'is_geom'])
 
 
@@ -167,9 +204,15 @@ def normalize_names(column_names):
             list: List of SQL-normalized column names
     """
     result = []
+    used_names = set()
+    chains = {}
     for column_name in column_names:
-        column = Column(column_name).normalize(forbidden_column_names=result)
-        result.append(column.name)
+        if not column_name:
+            raise ValueError('Column name cannot be null or empty')
+
+        name = _avoid_collision(_sanitize_name(str(column_name)), used_names, chains)
+        used_names.add(name)
+        result.append(name)
 
     return result
 
@@ -181,6 +224,63 @@ def normalize_name(column_name):
     return normalize_names([column_name])[0]
 
 
+def compact_dtypes(df, columns):
+    """Convert the columns of a DataFrame into the narrowest safe dtypes.
+
+    Integer columns (and numeric columns without decimals) are downcasted to the smallest
+    integer type, floats (even without decimals) to `float32` when there is no loss of precision,
+    text columns with low cardinality to `category` and the rest of the text columns to
+    Arrow-backed strings, if `pyarrow` is installed.
+    """
+    for column in columns:
+        if column.name not in df or _is_geom_column(column):
+            continue
+
+        if column.dtype in Column.INT_DTYPES or column.dtype in Column.FLOAT_DTYPES:
+            df[column.name] = _compact_numeric(df[column.name], _is_integer_column(column, df[column.name]))
+        elif column.dtype == Column.OBJECT_DTYPE:
+            df[column.name] = _compact_text(df[column.name])
+
+    return df
+
+
+def _is_geom_column(column):
+    return column.pgtype in Column.GEOM_PGTYPES or column.name == Column.NORMALIZED_GEOM_COL_NAME
+
+
+def _is_integer_column(column, series):
+    return column.dtype in Column.INT_DTYPES or column.pgtype in Column.NUMERIC_PGTYPES or \
+        is_integer_dtype(series)
+
+
+def _compact_numeric(series, integer=True):
+    values = series.dropna()
+
+    if integer and len(values) == len(series) and np.array_equal(values, np.floor(values)):
+        # Integer values without nulls
+        return to_numeric(series, downcast='integer')
+
+    float32_series = series.astype('float32')
+    if ((float32_series.astype('float64') == series) | series.isna()).all():
+        return float32_series
+
+    return series
+
+
+def _compact_text(series):
+    if infer_dtype(series, skipna=True) != 'string':
+        return series
+
+    if len(series) > 0 and series.nunique() / len(series) <= Column.CATEGORY_MAX_RATIO:
+        return series.astype('category')
+
+    try:
+        return series.astype('string[pyarrow]')
+    except (ImportError, TypeError):
+        # pyarrow not installed or pandas < 1.3
+        return series
+
+
 def obtain_converters(columns):
     converters = {}
 
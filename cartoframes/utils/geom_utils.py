@@ -2,8 +2,10 @@ import re
 import json
 import shapely
 import binascii as ba
+import numpy as np
 
 from geopandas import GeoSeries, GeoDataFrame, points_from_xy
+from geopandas.array import GeometryDtype
 
 
 ENC_SHAPELY = 'shapely'
@@ -44,12 +46,13 @@ def set_geometry(gdf, col, drop=False, inplace=False, crs=None):
     else:
         frame = gdf.copy()
 
-    # Decode geometry
+    # Decode geometry (skipped for columns already holding geometries)
     if isinstance(col, str):
         if col not in frame:
             raise Exception('Column "{0}" does not exist.'.format(col))
-        frame[col] = decode_geometry(frame[col])
-    else:
+        if not is_geometry_column(frame[col]):
+            frame[col] = decode_geometry(frame[col])
+    elif not is_geometry_column(col):
         col = decode_geometry(col)
 
     # Call set_geometry with decoded column
@@ -136,6 +139,11 @@ def decode_geometry(geom_col):
         return geom_col
 
 
+def is_geometry_column(geom_col):
+    """Checks if a column is already decoded, i.e. it has the geopandas geometry dtype."""
+    return isinstance(getattr(geom_col, 'dtype', None), GeometryDtype)
+
+
 def detect_encoding_type(input_geom):
     """
     Detect geometry encoding type:
@@ -244,6 +252,31 @@ def encode_geometry_ewkb(geom, srid=4326):
         return shapely.wkb.dumps(geom, hex=True, include_srid=True)
 
 
+def to_wkb_hex(geometries):
+    """Encode an array of geometries as hex WKB strings. The encoding is vectorized with
+    shapely >= 2, and a loop over a single GEOS writer otherwise. Null and empty geometries
+    are encoded as None."""
+    if isinstance(geometries, (list, tuple)):
+        # Lists of shapely < 2 geometries would be converted into arrays of coordinates
+        values = np.empty(len(geometries), dtype=object)
+        values[:] = list(geometries)
+        geometries = values
+    geometries = np.asarray(geometries, dtype=object)
+
+    if hasattr(shapely, 'to_wkb'):
+        result = shapely.to_wkb(geometries, hex=True)
+        result[shapely.is_empty(geometries)] = None
+        return result
+
+    from shapely.geos import WKBWriter, lgeos
+
+    # `geom.wkb_hex` creates a writer per geometry
+    writer = WKBWriter(lgeos)
+    result = np.empty(len(geometries), dtype=object)
+    result[:] = [None if geom is None or geom.is_empty else writer.write(geom).hex() for geom in geometries]
+    return result
+
+
 def to_geojson(geom):
     if geom is not None and str(geom) != 'GEOMETRYCOLLECTION EMPTY':
         return json.dumps(shapely.geometry.mapping(geom), sort_keys=True)
@@ -111,6 +111,7 @@ def temp_ignore_warnings(func):
 def dtypes2pg(dtype):
     """Returns equivalent PostgreSQL type for input `dtype`"""
     mapping = {
+        'int8': 'smallint',
         'int16': 'smallint',
         'int32': 'integer',
         'int64': 'bigint',
@@ -0,0 +1,80 @@
+"""Benchmark of cartoframes.analysis.grid.QuadGrid.polyfill
+
+Usage:
+    python -m tests.benchmarks.grid_benchmark [zoom_level]
+"""
+
+import sys
+import time
+import numpy as np
+
+from pandas import DataFrame
+from geopandas import GeoDataFrame
+from shapely.geometry import Point
+
+from cartoframes.analysis.grid import QuadGrid
+
+DEFAULT_ZOOM_LEVEL = 14
+WORKERS = 4
+AGGREGATE_POINTS = 10 ** 7
+
+
+def build_gdf():
+    # Irregular polygons of ~100 km of radius
+    geometries = [Point(-4 + i * 2.5, 40).buffer(1, resolution=64) for i in range(4)]
+    return GeoDataFrame({'id': range(len(geometries)), 'geom': geometries}, geometry='geom', crs='epsg:4326')
+
+
+def main(zoom_level=DEFAULT_ZOOM_LEVEL):
+    gdf = build_gdf()
+
+    start = time.time()
+    result = QuadGrid().polyfill(gdf, zoom_level)
+    elapsed = time.time() - start
+
+    print('polyfill: {} geometries, zoom {}, {} tiles in {:.2f} s ({:.0f} tiles/s)'.format(
+        len(gdf), zoom_level, len(result), elapsed, len(result) / elapsed))
+
+    start = time.time()
+    result = QuadGrid().polyfill(gdf, zoom_level, compact=True)
+    elapsed = time.time() - start
+
+    print('polyfill (compact): {} geometries, zoom {}, {} tiles in {:.2f} s'.format(
+        len(gdf), zoom_level, len(result), elapsed))
+
+    start = time.time()
+    result = QuadGrid().polyfill(gdf, zoom_level, workers=WORKERS)
+    elapsed = time.time() - start
+
+    print('polyfill ({} workers): {} geometries, zoom {}, {} tiles in {:.2f} s ({:.0f} tiles/s)'.format(
+        WORKERS, len(gdf), zoom_level, len(result), elapsed, len(result) / elapsed))
+
+
+def main_aggregate(zoom_level=DEFAULT_ZOOM_LEVEL, size=AGGREGATE_POINTS):
+    rng = np.random.RandomState(0)
+    df = DataFrame({
+        'lng': rng.uniform(-4, -3, size),
+        'lat': rng.uniform(40, 41, size),
+        'speed': rng.uniform(0, 100, size)
+    })
+
+    start = time.time()
+    result = QuadGrid().aggregate(df, zoom_level, {'speed': ['mean', 'max']}, lng_col='lng', lat_col='lat')
+    elapsed = time.time() - start
+
+    print('aggregate: {} points, zoom {}, {} tiles in {:.2f} s ({:.0f} points/s)'.format(
+        size, zoom_level, len(result), elapsed, size / elapsed))
+
+    zoom_levels = list(range(zoom_level - 8, zoom_level + 1, 2))
+    start = time.time()
+    pyramid = QuadGrid().pyramid(df, zoom_levels, {'speed': ['mean', 'max']}, lng_col='lng', lat_col='lat')
+    elapsed = time.time() - start
+
+    print('pyramid: {} points, zooms {}, {} tiles in {:.2f} s'.format(
+        size, zoom_levels, len(pyramid.data), elapsed))
+
+
+if __name__ == '__main__':
+    zoom_level = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ZOOM_LEVEL
+    main(zoom_level)
+    main_aggregate(zoom_level)
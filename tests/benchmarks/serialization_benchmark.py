@@ -0,0 +1,39 @@
+"""Benchmark of the geometry serialization of the enrichment uploads
+
+Usage:
+    python -m tests.benchmarks.serialization_benchmark [size]
+"""
+
+import sys
+import time
+import numpy as np
+
+from geopandas import GeoSeries
+from shapely.geometry import Point
+
+from cartoframes.utils.geom_utils import to_geojson, to_wkb_hex
+
+DEFAULT_SIZE = 10 ** 6
+
+
+def main(size=DEFAULT_SIZE):
+    rng = np.random.RandomState(0)
+    geometries = GeoSeries([Point(lng, lat) for lng, lat in zip(rng.uniform(-4, -3, size), rng.uniform(40, 41, size))])
+
+    start = time.time()
+    geometries.apply(to_geojson)
+    geojson_elapsed = time.time() - start
+
+    print('to_geojson: {} points in {:.2f} s ({:.0f} points/s)'.format(size, geojson_elapsed, size / geojson_elapsed))
+
+    start = time.time()
+    to_wkb_hex(geometries.values)
+    wkb_elapsed = time.time() - start
+
+    print('to_wkb_hex: {} points in {:.2f} s ({:.0f} points/s, {:.1f}x)'.format(
+        size, wkb_elapsed, size / wkb_elapsed, geojson_elapsed / wkb_elapsed))
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    main(size)
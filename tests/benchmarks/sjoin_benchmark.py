@@ -0,0 +1,53 @@
+"""Benchmark of cartoframes.analysis.grid.QuadGrid.sjoin against geopandas.sjoin
+
+Usage:
+    python -m tests.benchmarks.sjoin_benchmark [points]
+"""
+
+import sys
+import time
+import numpy as np
+import geopandas
+
+from geopandas import GeoDataFrame, points_from_xy
+from shapely.geometry import Point
+
+from cartoframes.analysis.grid import QuadGrid
+
+DEFAULT_POINTS = 100000
+POLYGONS = 1000
+WORKERS = 4
+
+
+def build_gdfs(size):
+    rng = np.random.RandomState(0)
+
+    # Skewed points: half of them in a small cluster
+    lng = np.concatenate([rng.uniform(-10, 10, size // 2), rng.normal(2, 0.1, size - size // 2)])
+    lat = np.concatenate([rng.uniform(-10, 10, size // 2), rng.normal(2, 0.1, size - size // 2)])
+    points_gdf = GeoDataFrame({'point_id': range(size)}, geometry=points_from_xy(lng, lat))
+
+    polygons = [Point(rng.uniform(-10, 10), rng.uniform(-10, 10)).buffer(rng.uniform(0.05, 2), resolution=32)
+                for _ in range(POLYGONS)]
+    polygons_gdf = GeoDataFrame({'polygon_id': range(POLYGONS)}, geometry=polygons)
+
+    return points_gdf, polygons_gdf
+
+
+def measure(name, func):
+    start = time.time()
+    result = func()
+    print('{}: {} rows in {:.2f} s'.format(name, len(result), time.time() - start))
+
+
+def main(size=DEFAULT_POINTS):
+    points_gdf, polygons_gdf = build_gdfs(size)
+
+    measure('geopandas.sjoin', lambda: geopandas.sjoin(polygons_gdf, points_gdf, how='inner', op='intersects'))
+    measure('QuadGrid.sjoin', lambda: QuadGrid().sjoin(polygons_gdf, points_gdf))
+    measure('QuadGrid.sjoin ({} workers)'.format(WORKERS),
+            lambda: QuadGrid().sjoin(polygons_gdf, points_gdf, workers=WORKERS))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_POINTS)
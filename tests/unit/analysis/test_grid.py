@@ -4,14 +4,16 @@ import os
 import pytest
 import numpy as np
 
-from pandas import read_csv
-from geopandas import GeoDataFrame
-from shapely.geometry import box, shape
+from types import GeneratorType
+from pandas import DataFrame, concat, read_csv
+from geopandas import GeoDataFrame, sjoin
+from shapely.geometry import Point, box, shape
 
 from cartoframes.analysis.grid import QuadGrid
+from cartoframes.analysis.tiles import quadints_to_quadkeys
 from cartoframes.utils.geom_utils import set_geometry
 
-from geopandas.testing import assert_geodataframe_equal
+from geopandas.testing import assert_geodataframe_equal, assert_geoseries_equal
 
 # DATA FRAME SRC BBOX
 pol_1 = box(1, 1, 2, 2)
@@ -76,7 +78,6 @@ class TestGrid(object):
         set_geometry(gdf, 'geom', inplace=True)
         return gdf
 
-    @pytest.mark.skip()
     def test_quadgrid_polyfill_box(self, mocker):
         """cartoframes.analysis.grid.QuadGrid.polyfill"""
         gdf = QuadGrid().polyfill(GDF_BOX, 12)
@@ -86,7 +87,6 @@ class TestGrid(object):
         gdf_test = self._load_test_gdf('grid_quadkey_bbox.csv')
         assert_geodataframe_equal(gdf, gdf_test, check_less_precise=True)
 
-    @pytest.mark.skip()
     def test_quadgrid_polyfill_pol(self, mocker):
         """cartoframes.analysis.grid.QuadGrid.polyfill"""
         gdf = QuadGrid().polyfill(GDF_IRREGULAR, 12)
@@ -95,3 +95,322 @@ class TestGrid(object):
         # Check both dataframes are equals
         gdf_test = self._load_test_gdf('grid_quadkey_pol.csv')
         assert_geodataframe_equal(gdf, gdf_test, check_less_precise=True)
+
+    def test_quadgrid_polyfill_attributes(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        gdf = GeoDataFrame({
+            'geom': [box(1, 1, 1.1, 1.1), None, box(3, 3, 3.1, 3.1)],
+            'name': ['a', 'b', 'c']
+        }, geometry='geom')
+
+        result = QuadGrid().polyfill(gdf, 10)
+
+        assert list(result.columns) == ['geom', 'name', 'quadkey']
+        assert list(result['name']) == ['a', 'a', 'a', 'a', 'c']
+        assert list(result['quadkey']) == ['1222222210', '1222222212', '1222222211', '1222222213', '1222221222']
+        assert result.index.tolist() == [0, 1, 2, 3, 4]
+
+    def test_quadgrid_polyfill_no_geometry(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        with pytest.raises(ValueError):
+            QuadGrid().polyfill(DataFrame({'id': [1]}), 10)
+
+    def test_quadgrid_polyfill_tile_corners(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        gdf = GeoDataFrame({'geometry': [Point(0, 0), Point(-90, 0), box(0, 0, 45, 0)]})
+
+        result = QuadGrid().polyfill(gdf, 5)
+
+        assert result['quadkey'].tolist() == ['30000', '21000', '30000', '30001', '30010', '30011']
+
+    def test_quadgrid_polyfill_workers(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        gdf = self._load_test_gdf('grid_quadkey_bbox.csv').head(20)
+
+        result = QuadGrid().polyfill(gdf, 14, workers=2)
+
+        assert_geodataframe_equal(result, QuadGrid().polyfill(gdf, 14))
+
+    def test_quadgrid_polyfill_chunksize(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        gdf = self._load_test_gdf('grid_quadkey_bbox.csv').head(20)
+
+        chunks = QuadGrid().polyfill(gdf, 14, workers=2, chunksize=3)
+
+        assert isinstance(chunks, GeneratorType)
+        chunks = list(chunks)
+        assert len(chunks) == 7
+        assert_geodataframe_equal(concat(chunks), QuadGrid().polyfill(gdf, 14))
+
+    def test_quadgrid_polyfill_chunksize_serial(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        gdf = self._load_test_gdf('grid_quadkey_bbox.csv').head(5)
+
+        chunks = list(QuadGrid().polyfill(gdf, 14, chunksize=2))
+
+        assert [chunk.index[0] for chunk in chunks] == [0, 32, 64]
+        assert_geodataframe_equal(concat(chunks), QuadGrid().polyfill(gdf, 14))
+
+    def test_quadgrid_polyfill_wrong_params(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        with pytest.raises(ValueError) as e:
+            QuadGrid().polyfill(GDF_BOX, 10, workers=0)
+        assert str(e.value) == 'Wrong number of workers. You should provide an integer >= 1.'
+
+        with pytest.raises(ValueError) as e:
+            QuadGrid().polyfill(GDF_BOX, 10, chunksize='a')
+        assert str(e.value) == 'Wrong chunksize. You should provide an integer >= 1.'
+
+        with pytest.raises(ValueError) as e:
+            QuadGrid().polyfill(GDF_BOX, 10, quadkey_type='uint64')
+        assert str(e.value) == "Wrong quadkey type. You should provide one of ['string', 'int']."
+
+    def test_quadgrid_polyfill_compact(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        result = QuadGrid().polyfill(GDF_IRREGULAR, 14, compact=True)
+
+        assert list(result.columns) == ['id', 'geom', 'quadkey']
+        assert len(result) < len(QuadGrid().polyfill(GDF_IRREGULAR, 14))
+        assert result['quadkey'].str.len().min() < 14
+        assert result['quadkey'].str.len().max() == 14
+        assert result['geom'][0].equals(box(*result['geom'][0].bounds))
+
+    def test_quadgrid_uncompact(self):
+        """cartoframes.analysis.grid.QuadGrid.uncompact"""
+        gdf = GDF_BOX.append(GDF_IRREGULAR, ignore_index=True)
+        compact_gdf = QuadGrid().polyfill(gdf, 13, compact=True)
+
+        result = QuadGrid().uncompact(compact_gdf, 13)
+
+        expected = QuadGrid().polyfill(gdf, 13)
+        result = result.sort_values(['id', 'quadkey']).reset_index(drop=True)
+        expected = expected.sort_values(['id', 'quadkey']).reset_index(drop=True)
+        assert_geodataframe_equal(result, expected, check_less_precise=True)
+
+    def test_quadgrid_polyfill_quadints(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        result = QuadGrid().polyfill(GDF_IRREGULAR, 13, quadkey_type='int')
+
+        expected = QuadGrid().polyfill(GDF_IRREGULAR, 13)
+        assert result['quadkey'].dtype == np.uint64
+        assert quadints_to_quadkeys(result['quadkey'].values).tolist() == expected['quadkey'].tolist()
+
+    def test_quadgrid_quadints_wrong_zoom_level(self):
+        """cartoframes.analysis.grid.QuadGrid.polyfill"""
+        error = 'Wrong zoom level. You should provide a zoom level <= 29 for integer quadkeys.'
+
+        with pytest.raises(ValueError) as e:
+            QuadGrid().polyfill(GDF_BOX, 30, quadkey_type='int')
+        assert str(e.value) == error
+
+        with pytest.raises(ValueError) as e:
+            QuadGrid().aggregate(GeoDataFrame({'geometry': [Point(1, 1)]}), 30, quadkey_type='int')
+        assert str(e.value) == error
+
+    def test_quadgrid_uncompact_quadints(self):
+        """cartoframes.analysis.grid.QuadGrid.uncompact"""
+        compact_gdf = QuadGrid().polyfill(GDF_IRREGULAR, 13, compact=True, quadkey_type='int')
+
+        result = QuadGrid().uncompact(compact_gdf, 13)
+
+        expected = QuadGrid().polyfill(GDF_IRREGULAR, 13, quadkey_type='int')
+        assert result['quadkey'].dtype == np.uint64
+        assert sorted(result['quadkey'].tolist()) == sorted(expected['quadkey'].tolist())
+
+    def test_quadgrid_uncompact_wrong_zoom_level(self):
+        """cartoframes.analysis.grid.QuadGrid.uncompact"""
+        compact_gdf = QuadGrid().polyfill(GDF_BOX, 10, compact=True)
+
+        with pytest.raises(ValueError) as e:
+            QuadGrid().uncompact(compact_gdf, 8)
+        assert str(e.value) == 'Wrong zoom level. You should provide a zoom level >= 10.'
+
+    def test_quadgrid_aggregate(self):
+        """cartoframes.analysis.grid.QuadGrid.aggregate"""
+        gdf = GeoDataFrame({
+            'speed': [1, 2, 3, 4],
+            'geom': [Point(0.001, 0.001), None, Point(0.002, 0.002), Point(-0.001, -0.001)]
+        }, geometry='geom')
+
+        result = QuadGrid().aggregate(gdf, 5, {'speed': ['mean', 'max']})
+
+        assert isinstance(result, GeoDataFrame)
+        assert list(result.columns) == ['quadkey', 'count', 'speed_mean', 'speed_max', 'geometry']
+        assert list(result['quadkey']) == ['21111', '12222']
+        assert list(result['count']) == [1, 2]
+        assert list(result['speed_mean']) == [4, 2]
+        assert list(result['speed_max']) == [4, 3]
+        assert result['geometry'][1].contains(Point(0.001, 0.001))
+
+    def test_quadgrid_aggregate_lnglat(self):
+        """cartoframes.analysis.grid.QuadGrid.aggregate"""
+        df = DataFrame({
+            'speed': [1, 2, 3, 4],
+            'lng': [0.001, None, 0.002, -0.001],
+            'lat': [0.001, None, 0.002, -0.001]
+        })
+
+        result = QuadGrid().aggregate(df, 5, {'speed': 'sum'}, lng_col='lng', lat_col='lat')
+
+        assert list(result.columns) == ['quadkey', 'count', 'speed_sum', 'geometry']
+        assert list(result['quadkey']) == ['21111', '12222']
+        assert list(result['speed_sum']) == [4, 4]
+
+    def test_quadgrid_aggregate_quadints(self):
+        """cartoframes.analysis.grid.QuadGrid.aggregate"""
+        df = DataFrame({'lng': [0.001, 0.002, -0.001], 'lat': [0.001, 0.002, -0.001]})
+
+        result = QuadGrid().aggregate(df, 5, lng_col='lng', lat_col='lat', quadkey_type='int')
+
+        assert result['quadkey'].dtype == np.uint64
+        assert quadints_to_quadkeys(result['quadkey'].values).tolist() == ['21111', '12222']
+
+    def test_quadgrid_aggregate_quadints_order(self):
+        """cartoframes.analysis.grid.QuadGrid.aggregate"""
+        df = DataFrame({'lng': [-135.0, -45.0, -135.0, 100.0], 'lat': [30.0, 75.0, 75.0, 10.0]})
+
+        result = QuadGrid().aggregate(df, 2, lng_col='lng', lat_col='lat', quadkey_type='int')
+        expected = QuadGrid().aggregate(df, 2, lng_col='lng', lat_col='lat')
+
+        assert expected['quadkey'].tolist() == ['00', '02', '01', '13']
+        assert quadints_to_quadkeys(result['quadkey'].values).tolist() == expected['quadkey'].tolist()
+        assert_geoseries_equal(result['geometry'], expected['geometry'])
+
+    def test_quadgrid_aggregate_wrong_params(self):
+        """cartoframes.analysis.grid.QuadGrid.aggregate"""
+        with pytest.raises(ValueError) as e:
+            QuadGrid().aggregate(GDF_BOX, 5)
+        assert str(e.value) == 'Wrong geometry type. You should provide a dataframe with point geometries.'
+
+        with pytest.raises(ValueError) as e:
+            QuadGrid().aggregate(GDF_BOX, 5, {'wrong': 'sum'})
+        assert str(e.value) == 'Wrong aggregations. You should provide a dict of existing columns and functions.'
+
+    def test_quadgrid_sjoin(self):
+        """cartoframes.analysis.grid.QuadGrid.sjoin"""
+        points_gdf = GeoDataFrame({
+            'id': [1, 2, 3, 4],
+            'geom': [Point(1.5, 1.5), Point(3.5, 3.5), Point(10, 10), Point(1.01, 1.01)]
+        }, geometry='geom', index=[10, 20, 30, 40])
+        polygons_gdf = GeoDataFrame({
+            'id': [1, 2, 3],
+            'name': ['a', 'b', 'c'],
+            'geom': [box(1, 1, 2, 2), box(3, 3, 4, 4), box(0, 0, 5, 5)]
+        }, geometry='geom')
+
+        result = QuadGrid().sjoin(polygons_gdf, points_gdf, zoom_level=8)
+
+        assert list(result.columns) == ['id_left', 'name', 'geom', 'index_right', 'id_right']
+        assert result.index.tolist() == [0, 0, 1, 2, 2, 2]
+        assert result['index_right'].tolist() == [10, 40, 20, 10, 20, 40]
+        assert result['name'].tolist() == ['a', 'a', 'b', 'c', 'c', 'c']
+
+    def test_quadgrid_sjoin_within(self):
+        """cartoframes.analysis.grid.QuadGrid.sjoin"""
+        points_gdf = GeoDataFrame({'geom': [Point(1.5, 1.5), Point(10, 10)]}, geometry='geom')
+
+        result = QuadGrid().sjoin(points_gdf, GDF_BOX, op='within')
+
+        assert result.index.tolist() == [0]
+        assert result['id'].tolist() == [1]
+
+    def test_quadgrid_sjoin_on_edges(self):
+        """cartoframes.analysis.grid.QuadGrid.sjoin"""
+        points_gdf = GeoDataFrame({'geom': [
+            Point(10, 0), Point(0, 10), Point(-45, -45), Point(1.40625, 0.5), Point(10, 5), Point(0, 0), Point(2, 1)
+        ]}, geometry='geom')
+        polygons_gdf = GeoDataFrame({'geom': [
+            box(1, 0, 2, 1), box(-50, -50, 20, 20), box(0, 0, 10, 10), box(10, 0, 20, 10), box(-45, -45, 0, 0)
+        ]}, geometry='geom')
+
+        for op in ['intersects', 'within', 'contains']:
+            for zoom_level in [None, 3, 8]:
+                for left_gdf, right_gdf in [(points_gdf, polygons_gdf), (polygons_gdf, points_gdf),
+                                            (polygons_gdf, polygons_gdf)]:
+                    result = QuadGrid().sjoin(left_gdf, right_gdf, zoom_level=zoom_level, op=op)
+                    expected = sjoin(left_gdf, right_gdf, op=op)
+
+                    assert sorted(zip(result.index, result['index_right'])) == \
+                        sorted(zip(expected.index, expected['index_right']))
+
+    def test_quadgrid_sjoin_workers(self, mocker):
+        """cartoframes.analysis.grid.QuadGrid.sjoin"""
+        mocker.patch('cartoframes.analysis.grid.SJOIN_CHUNKSIZE', 2)
+        gdf = self._load_test_gdf('grid_quadkey_pol.csv')
+
+        result = QuadGrid().sjoin(GDF_IRREGULAR, gdf, workers=2)
+
+        assert_geodataframe_equal(result, QuadGrid().sjoin(GDF_IRREGULAR, gdf))
+        assert len(result) == len(gdf)
+
+    def test_quadgrid_sjoin_wrong_op(self):
+        """cartoframes.analysis.grid.QuadGrid.sjoin"""
+        with pytest.raises(ValueError) as e:
+            QuadGrid().sjoin(GDF_BOX, GDF_BOX, op='touches')
+        assert str(e.value) == "Wrong op. You should provide one of ['intersects', 'contains', 'within']."
+
+    def test_quadgrid_pyramid(self):
+        """cartoframes.analysis.grid.QuadGrid.pyramid"""
+        df = DataFrame({
+            'speed': [1, 2, 3, 4, None],
+            'lng': [0.001, None, 0.002, -0.001, -0.002],
+            'lat': [0.001, None, 0.002, -0.001, -0.002]
+        })
+
+        pyramid = QuadGrid().pyramid(df, [5, 1, 3], {'speed': ['mean', 'sum', 'count']}, lng_col='lng', lat_col='lat')
+
+        assert pyramid.zoom_levels == [1, 3, 5]
+        assert list(pyramid.data.index.names) == ['zoom', 'quadkey']
+        assert list(pyramid.data.columns) == ['count', 'speed_mean', 'speed_sum', 'speed_count']
+        assert pyramid.data.loc[(5, '21111')].tolist() == [2, 4, 4, 1]
+        assert pyramid.data.loc[(5, '12222')].tolist() == [2, 2, 4, 2]
+        assert pyramid.data.loc[(3, '211')].tolist() == [2, 4, 4, 1]
+        assert pyramid.data.loc[(1, '1')].tolist() == [2, 2, 4, 2]
+
+        result = pyramid.query(5)
+        expected = QuadGrid().aggregate(df, 5, {'speed': ['mean', 'sum', 'count']}, lng_col='lng', lat_col='lat')
+        assert_geodataframe_equal(result, expected, check_dtype=False)
+
+    def test_quadgrid_pyramid_equals_aggregate(self):
+        """cartoframes.analysis.grid.QuadGrid.pyramid"""
+        # Tiles whose order by tile differs from their order by quadkey
+        df = DataFrame({
+            'speed': [1, 2, 3, 4, 5, 6, 7],
+            'lng': [-135.0, -45.0, -135.0, 100.0, -10.0, 170.0, 10.0],
+            'lat': [30.0, 75.0, 75.0, 10.0, -20.0, 40.0, 60.0]
+        })
+        aggs = {'speed': ['sum', 'min', 'max', 'count']}
+        pyramid = QuadGrid().pyramid(df, [2, 4, 8], aggs, lng_col='lng', lat_col='lat')
+
+        for zoom in [2, 4, 8]:
+            result = pyramid.query(zoom)
+            expected = QuadGrid().aggregate(df, zoom, aggs, lng_col='lng', lat_col='lat')
+            assert_geodataframe_equal(result, expected, check_dtype=False)
+            assert_geodataframe_equal(QuadGrid().pyramid(df, [zoom], aggs, lng_col='lng', lat_col='lat').query(zoom),
+                                      expected, check_dtype=False)
+
+        # Index lookup of the tiles of the bounding box
+        result = pyramid.query(2, (-170, 1, -1, 80))
+        assert result['quadkey'].tolist() == ['00', '02', '01']
+
+    def test_quadgrid_pyramid_query_bbox(self):
+        """cartoframes.analysis.grid.QuadGrid.pyramid"""
+        df = DataFrame({'lng': [0.5, 1.5, 30.5, 60.5], 'lat': [0.5, 1.5, 30.5, 60.5]})
+        pyramid = QuadGrid().pyramid(df, [4, 10], lng_col='lng', lat_col='lat')
+
+        assert pyramid.query(10, (0, 0, 2, 2))['count'].tolist() == [1, 1]
+        assert pyramid.query(4, (0, 0, 2, 2))['count'].tolist() == [2]
+        assert pyramid.query(4, (0, 0, 70, 70))['count'].tolist() == [2, 1, 1]
+
+        with pytest.raises(ValueError) as e:
+            pyramid.query(5)
+        assert str(e.value) == 'Wrong zoom level. You should provide one of [4, 10].'
+
+    def test_quadgrid_pyramid_wrong_aggregations(self):
+        """cartoframes.analysis.grid.QuadGrid.pyramid"""
+        df = DataFrame({'lng': [0.5], 'lat': [0.5], 'speed': [1]})
+
+        with pytest.raises(ValueError) as e:
+            QuadGrid().pyramid(df, [4], {'speed': 'median'}, lng_col='lng', lat_col='lat')
+        assert str(e.value) == "Wrong aggregations. You should provide a dict of existing columns and " + \
+            "['count', 'sum', 'mean', 'min', 'max']."
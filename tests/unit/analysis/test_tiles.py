@@ -0,0 +1,123 @@
+"""Unit tests for cartoframes.analysis.tiles"""
+
+import pytest
+import numpy as np
+
+from cartoframes.analysis.tiles import lnglat_to_tile, bbox_to_tile_range, tile_bounds, tile_quadkeys, \
+    quadkeys_to_tiles, tile_quadints, quadints_to_tiles, quadkeys_to_quadints, quadints_to_quadkeys, \
+    quadint_parents, quadint_children, quadint_neighbors, INVALID_QUADINT, MAX_QUADINT_ZOOM_LEVEL
+
+
+class TestTiles(object):
+
+    def test_lnglat_to_tile(self):
+        x, y = lnglat_to_tile(np.array([-3.7, 179.999, -180]), np.array([40.4, -85, 89]), 14)
+
+        assert x.tolist() == [8023, 16383, 0]
+        assert y.tolist() == [6178, 16357, 0]
+
+    def test_bbox_to_tile_range(self):
+        min_x, min_y, max_x, max_y = bbox_to_tile_range([[1, 1, 1.1, 1.1], [-4.21875, 43.3, -4.2, 43.31]], 10)
+
+        assert min_x.tolist() == [514, 500]
+        assert max_x.tolist() == [515, 500]
+        assert min_y.tolist() == [508, 375]
+        assert max_y.tolist() == [509, 375]
+
+    def test_bbox_to_tile_range_degenerate(self):
+        # Points and lines on the edges of the tiles
+        min_x, min_y, max_x, max_y = bbox_to_tile_range([[0, 0, 0, 0], [10, 0, 10, 5]], 3)
+
+        assert min_x.tolist() == [4, 4]
+        assert max_x.tolist() == [4, 4]
+        assert min_y.tolist() == [4, 3]
+        assert max_y.tolist() == [4, 3]
+
+    def test_bbox_to_tile_range_closed(self):
+        min_x, min_y, max_x, max_y = bbox_to_tile_range([[0, 0, 45, 45]], 3, closed=True)
+
+        assert min_x.tolist() == [4]
+        assert max_x.tolist() == [5]
+        assert min_y.tolist() == [2]
+        assert max_y.tolist() == [4]
+
+    def test_tile_bounds(self):
+        west, south, east, north = tile_bounds(np.array([8000]), np.array([6000]), 14)
+
+        assert np.allclose(west, -4.21875)
+        assert np.allclose(south, 43.309191099856854)
+        assert np.allclose(east, -4.19677734375)
+        assert np.allclose(north, 43.32517767999294)
+
+    def test_tile_quadkeys(self):
+        quadkeys = tile_quadkeys(np.array([486, 0, 1023]), np.array([332, 0, 1023]), 10)
+
+        assert quadkeys.tolist() == ['0313102310', '0000000000', '3333333333']
+
+    def test_tile_quadkeys_zoom_0(self):
+        assert tile_quadkeys(np.array([0]), np.array([0]), 0).tolist() == ['']
+
+    def test_tile_quadkeys_multiple_zooms(self):
+        quadkeys = tile_quadkeys(np.array([486, 1, 0]), np.array([332, 1, 0]), np.array([10, 1, 0]))
+
+        assert quadkeys.tolist() == ['0313102310', '3', '']
+
+    def test_quadkeys_to_tiles(self):
+        x, y, z = quadkeys_to_tiles(np.array(['0313102310', '3', ''], dtype=object))
+
+        assert x.tolist() == [486, 1, 0]
+        assert y.tolist() == [332, 1, 0]
+        assert z.tolist() == [10, 1, 0]
+
+    def test_quadints_round_trip(self):
+        x, y, z = np.array([486, 1, 0, 2 ** 29 - 1]), np.array([332, 0, 0, 5]), np.array([10, 1, 0, 29])
+
+        quadints = tile_quadints(x, y, z)
+        result_x, result_y, result_z = quadints_to_tiles(quadints)
+
+        assert quadints.dtype == np.uint64
+        assert result_x.tolist() == x.tolist()
+        assert result_y.tolist() == y.tolist()
+        assert result_z.tolist() == z.tolist()
+
+    def test_quadints_order(self):
+        quadkeys = np.array(['', '0', '00', '01', '0123', '1', '2', '30', '333'], dtype=object)
+
+        quadints = quadkeys_to_quadints(quadkeys)
+
+        assert np.all(np.diff(quadints.astype(np.float64)) > 0)
+        assert quadints_to_quadkeys(quadints).tolist() == quadkeys.tolist()
+
+    def test_quadint_parents(self):
+        quadints = quadkeys_to_quadints(np.array(['0313102310', '3', ''], dtype=object))
+
+        assert quadints_to_quadkeys(quadint_parents(quadints)).tolist() == ['031310231', '', '']
+        assert quadints_to_quadkeys(quadint_parents(quadints, 4)).tolist() == ['0313', '3', '']
+
+    def test_quadint_children(self):
+        children = quadint_children(quadkeys_to_quadints(np.array(['03', ''], dtype=object)))
+
+        assert children.shape == (2, 4)
+        assert quadints_to_quadkeys(children.ravel()).tolist() == ['030', '031', '032', '033', '0', '1', '2', '3']
+
+    def test_quadints_max_zoom_level(self):
+        quadints = tile_quadints(np.array([2 ** 29 - 1]), np.array([0]), MAX_QUADINT_ZOOM_LEVEL)
+        x, y, z = quadints_to_tiles(quadints)
+        assert (x.tolist(), y.tolist(), z.tolist()) == ([2 ** 29 - 1], [0], [29])
+
+        error = 'Wrong zoom level. You should provide a zoom level <= 29 for integer quadkeys.'
+        with pytest.raises(ValueError) as e:
+            tile_quadints(np.array([0, 0]), np.array([0, 0]), np.array([3, 30]))
+        assert str(e.value) == error
+
+        with pytest.raises(ValueError) as e:
+            quadint_children(quadints)
+        assert str(e.value) == error
+
+    def test_quadint_neighbors(self):
+        neighbors = quadint_neighbors(tile_quadints(np.array([0]), np.array([0]), 1))
+
+        assert neighbors[0, 0] == INVALID_QUADINT
+        x, y, _ = quadints_to_tiles(neighbors[0, 2:7])
+        assert x.tolist() == [1, 1, 0, 1, 1]
+        assert y.tolist() == [0, 1, 1, 1, 0]
@@ -1,3 +1,4 @@
+import io
 import os
 import csv
 import pandas as pd
@@ -5,7 +6,9 @@ import pandas as pd
 from unittest.mock import Mock, patch
 
 from cartoframes.auth import Credentials
-from cartoframes.data.clients.bigquery_client import BigQueryClient
+from cartoframes.data.clients.bigquery_client import BigQueryClient, _write_upload_file
+
+POINT_WKB = '0101000000000000000000f03f000000000000f03f'
 
 
 class ResponseMock(list):
@@ -78,3 +81,38 @@ class TestBigQueryClient(object):
         df = bq_client.download_to_dataframe(job)
 
         assert df.equals(expected_df)
+
+    def test_upload_dataframe(self):
+        data = pd.DataFrame({'enrichment_id': [0, 1], '__wkb_geom': [POINT_WKB, None]})
+        uploaded = {}
+
+        def upload_from_file(data_file, rewind=False):
+            assert rewind
+            data_file.seek(0)
+            uploaded['data'] = pd.read_parquet(data_file)
+
+        blob = Mock(upload_from_file=Mock(side_effect=upload_from_file))
+        bq_client = BigQueryClient(self.credentials)
+        bq_client.gcs_client = Mock()
+        bq_client.gcs_client.get_bucket.return_value.blob.return_value = blob
+        bq_client.bq_client = Mock()
+        bq_client.bq_dataset = 'dataset'
+        bq_client.bq_project = 'project'
+        bq_client._gcs_bucket = 'bucket'
+
+        bq_client.upload_dataframe(data, {'enrichment_id': 'INTEGER', '__wkb_geom': 'GEOGRAPHY'}, 'tablename')
+
+        assert uploaded['data'].equals(data)
+        job_config = bq_client.bq_client.load_table_from_uri.call_args[1]['job_config']
+        assert job_config.source_format == 'PARQUET'
+        assert not os.path.exists('tablename')
+
+    @patch('cartoframes.data.clients.bigquery_client.check_package', side_effect=Exception('Not installed'))
+    def test_write_upload_file_csv(self, _):
+        data = pd.DataFrame({'enrichment_id': [0, 1], '__wkb_geom': [POINT_WKB, None]})
+        data_file = io.BytesIO()
+
+        source_format = _write_upload_file(data, data_file)
+
+        assert source_format == 'CSV'
+        assert data_file.getvalue() == '0,{}\n1,\n'.format(POINT_WKB).encode()
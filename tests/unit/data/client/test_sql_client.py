@@ -104,6 +104,13 @@ class TestSQLClient(object):
         assert output == SQL_BATCH_RESPONSE
         mock.assert_called_once_with('query')
 
+    def test_submit(self, mocker):
+        """client.SQLClient.submit"""
+        mock = mocker.patch.object(ContextManager, 'submit_long_running_query')
+        SQLClient(self.credentials).submit('query')
+
+        mock.assert_called_once_with('query', None)
+
     def test_distinct(self, mocker):
         """client.SQLClient.distinct"""
         mock = mocker.patch.object(ContextManager, 'execute_query', return_value=SQL_DISTINCT_RESPONSE)
@@ -1,8 +1,26 @@
+import copy
+
+
 class CatalogEntityWithGeographyMock:
-    def __init__(self, geography):
+    def __init__(self, geography, id=None, is_public_data=False):
+        self.id = id
+        self.slug = None
         self.geography = geography
+        self.is_public_data = is_public_data
 
 
 class GeographyMock:
-    def __init__(self, is_public_data=False):
+    def __init__(self, is_public_data=False, id=None):
+        self.id = id
+        self.slug = None
         self.is_public_data = is_public_data
+
+
+def get_list_mock(entity):
+    """Mock of the `get_list` of a catalog entity class returning a copy of `entity` for each id"""
+    def get_list(ids):
+        entities = [copy.copy(entity) for _ in ids]
+        for entity_copy, id_ in zip(entities, ids):
+            entity_copy.id = id_
+        return entities
+    return get_list
@@ -1,4 +1,5 @@
 import pytest
+import threading
 
 from pandas import DataFrame
 from geopandas import GeoDataFrame
@@ -9,15 +10,14 @@ from google.cloud import bigquery, storage
 
 from cartoframes.auth import Credentials
 from cartoframes.data.clients.bigquery_client import BigQueryClient
-from cartoframes.data.observatory import Variable, Dataset
-from cartoframes.data.observatory.catalog.repository.dataset_repo import DatasetRepository
+from cartoframes.data.observatory import Variable, Dataset, Geography, CatalogList
 from cartoframes.data.observatory.catalog.repository.entity_repo import EntityRepository
 from cartoframes.data.observatory.enrichment.enrichment_service import EnrichmentService, prepare_variables, \
     _ENRICHMENT_ID, _GEOM_COLUMN, AGGREGATION_DEFAULT, AGGREGATION_NONE, _get_aggregation, _build_where_condition, \
     _build_where_clausule, _validate_variables_input, _build_polygons_query_variables_with_aggregation, \
-    _build_polygons_column_with_aggregation, _build_where_conditions_by_variable
-from cartoframes.exceptions import EnrichmentError
-from cartoframes.utils.geom_utils import to_geojson
+    _build_polygons_column_with_aggregation, _build_where_conditions_by_variable, _join_enrichment_results
+from cartoframes.exceptions import CatalogError, EnrichmentError
+from cartoframes.utils.geom_utils import to_wkb_hex
 
 _WORKING_PROJECT = 'carto-do-customers'
 _PUBLIC_PROJECT = 'carto-do-public-data'
@@ -74,7 +74,7 @@ class TestEnrichmentService(object):
             [[1, point]],
             columns=['cartodb_id', geom_column])
         expected_gdf = GeoDataFrame(
-            [[1, point, 0, to_geojson(point)]],
+            [[1, point, 0, to_wkb_hex([point])[0]]],
             columns=['cartodb_id', geom_column, _ENRICHMENT_ID, _GEOM_COLUMN],
             geometry=geom_column
         )
@@ -93,7 +93,7 @@ class TestEnrichmentService(object):
             columns=['cartodb_id', geom_column])
 
         expected_gdf = GeoDataFrame(
-            [[1, polygon, 0, to_geojson(polygon)]],
+            [[1, polygon, 0, to_wkb_hex([polygon])[0]]],
             columns=['cartodb_id', geom_column, _ENRICHMENT_ID, _GEOM_COLUMN],
             geometry=geom_column
         )
@@ -108,14 +108,14 @@ class TestEnrichmentService(object):
 
         point = Point(1, 1)
         input_gdf = GeoDataFrame(
-            [[1, point, 0, to_geojson(point)]],
+            [[1, point, 0, to_wkb_hex([point])[0]]],
             columns=['cartodb_id', geom_column, _ENRICHMENT_ID, _GEOM_COLUMN],
             geometry=geom_column
         )
 
         expected_schema = {_ENRICHMENT_ID: 'INTEGER', _GEOM_COLUMN: 'GEOGRAPHY'}
         expected_gdf = GeoDataFrame(
-            [[0, to_geojson(point)]],
+            [[0, to_wkb_hex([point])[0]]],
             columns=[_ENRICHMENT_ID, _GEOM_COLUMN])
 
         # mock
@@ -132,6 +132,43 @@ class TestEnrichmentService(object):
 
         BigQueryClient.upload_dataframe = original
 
+    def test_upload_data_duplicated_geometries(self):
+        geom_column = 'the_geom'
+        user_dataset = 'test_dataset'
+
+        point1 = Point(1, 1)
+        point2 = Point(2, 2)
+        input_gdf = GeoDataFrame(
+            [[1, point1], [2, point2], [3, Point(1, 1)], [4, None], [5, None]],
+            columns=['cartodb_id', geom_column],
+            geometry=geom_column
+        )
+
+        enrichment_service = EnrichmentService(credentials=self.credentials)
+        input_gdf = enrichment_service._prepare_data(input_gdf, geom_column)
+
+        assert input_gdf[_ENRICHMENT_ID].tolist() == [0, 1, 0, 2, 2]
+
+        uploaded = {}
+
+        def upload_dataframe(_, dataframe, schema, tablename):
+            uploaded['dataframe'] = dataframe
+
+        original = BigQueryClient.upload_dataframe
+        BigQueryClient.upload_dataframe = upload_dataframe
+        enrichment_service._upload_data(user_dataset, input_gdf)
+        BigQueryClient.upload_dataframe = original
+
+        assert uploaded['dataframe'][_ENRICHMENT_ID].tolist() == [0, 1, 2]
+        assert uploaded['dataframe'][_GEOM_COLUMN].tolist() == [to_wkb_hex([point1])[0], to_wkb_hex([point2])[0], None]
+
+        results = [DataFrame({_ENRICHMENT_ID: [1, 0], 'var1': ['b', 'a']})]
+        result = _join_enrichment_results(input_gdf, results)
+
+        assert result['cartodb_id'].tolist() == [1, 2, 3, 4, 5]
+        assert result['var1'].tolist()[:3] == ['a', 'b', 'a']
+        assert result['var1'][3:].isnull().all()
+
     def test_upload_data_null_geometries(self):
         geom_column = 'the_geom'
         user_dataset = 'test_dataset'
@@ -148,7 +185,7 @@ class TestEnrichmentService(object):
 
         expected_schema = {_ENRICHMENT_ID: 'INTEGER', _GEOM_COLUMN: 'GEOGRAPHY'}
         expected_gdf = GeoDataFrame(
-            [[0, to_geojson(point)], [1, None]],
+            [[0, to_wkb_hex([point])[0]], [1, None]],
             columns=[_ENRICHMENT_ID, _GEOM_COLUMN])
 
         # mock
@@ -169,7 +206,7 @@ class TestEnrichmentService(object):
         geom_column = 'the_geom'
         point = Point(1, 1)
         input_gdf = GeoDataFrame(
-            [[point, 0, to_geojson(point)]],
+            [[point, 0, to_wkb_hex([point])[0]]],
             columns=[geom_column, _ENRICHMENT_ID, _GEOM_COLUMN])
         expected_gdf = GeoDataFrame(
             [[point, 'new data']],
@@ -196,10 +233,220 @@ class TestEnrichmentService(object):
 
         BigQueryClient.query = original
 
+    def test_execute_enrichment_async_jobs(self):
+        geom_column = 'the_geom'
+        point = Point(1, 1)
+        input_gdf = GeoDataFrame(
+            [[point, 0, to_wkb_hex([point])[0]]],
+            columns=[geom_column, _ENRICHMENT_ID, _GEOM_COLUMN])
+
+        class JobMock():
+            def __init__(self, column, delay):
+                self.column = column
+                self.delay = delay
+                self.errors = None
+
+            def to_dataframe(self):
+                return DataFrame([[0, self.column]], columns=[_ENRICHMENT_ID, self.column])
+
+            def add_done_callback(self, callback):
+                threading.Timer(self.delay, callback, [self]).start()
+
+        original = BigQueryClient.query
+        BigQueryClient.query = Mock(side_effect=[JobMock('var1', 0.05), JobMock('var2', 0)])
+        enrichment_service = EnrichmentService(credentials=self.credentials)
+
+        result = enrichment_service._execute_enrichment(['fake_query_1', 'fake_query_2'], input_gdf)
+
+        assert list(result.columns) == [geom_column, 'var1', 'var2']
+        assert result['var1'][0] == 'var1'
+        assert result['var2'][0] == 'var2'
+
+        BigQueryClient.query = original
+
+    def test_join_enrichment_results(self):
+        points = [Point(0, 0), Point(1, 1), Point(2, 2)]
+        input_gdf = GeoDataFrame({
+            'the_geom': points,
+            _ENRICHMENT_ID: [0, 1, 2],
+            _GEOM_COLUMN: to_wkb_hex(points)
+        }, geometry='the_geom', index=[10, 20, 30])
+        dfs = [
+            DataFrame({_ENRICHMENT_ID: [2, 0], 'var1': [3, 1], 'do_area': [30, 10]}),
+            DataFrame({_ENRICHMENT_ID: [1, 1], 'var2': [4, 5], 'do_area': [20, 21]})
+        ]
+
+        result = _join_enrichment_results(input_gdf, dfs)
+
+        expected = input_gdf.reset_index(drop=True)
+        for df in dfs:
+            expected = expected.merge(df, on=_ENRICHMENT_ID, how='left')
+        assert isinstance(result, GeoDataFrame)
+        assert list(result.columns) == ['the_geom', _ENRICHMENT_ID, _GEOM_COLUMN, 'var1', 'do_area_x', 'var2',
+                                        'do_area_y']
+        assert result.equals(expected)
+
+    def test_execute_enrichment_error(self):
+        point = Point(1, 1)
+        input_gdf = GeoDataFrame(
+            [[point, 0, to_wkb_hex([point])[0]]],
+            columns=['the_geom', _ENRICHMENT_ID, _GEOM_COLUMN])
+
+        class JobMock():
+            def __init__(self, errors=None, done=True):
+                self.errors = errors
+                self.done = done
+                self.cancel = Mock()
+                self.to_dataframe = Mock()
+
+            def add_done_callback(self, callback):
+                if self.done:
+                    callback(self)
+
+        failed_job = JobMock(errors=[{'message': 'error'}])
+        running_job = JobMock(done=False)
+        original = BigQueryClient.query
+        BigQueryClient.query = Mock(side_effect=[failed_job, running_job])
+        enrichment_service = EnrichmentService(credentials=self.credentials)
+
+        with pytest.raises(EnrichmentError):
+            enrichment_service._execute_enrichment(['fake_query_1', 'fake_query_2'], input_gdf)
+
+        running_job.cancel.assert_called_once_with()
+        failed_job.cancel.assert_not_called()
+        failed_job.to_dataframe.assert_not_called()
+
+        BigQueryClient.query = original
+
+    @patch.object(EnrichmentService, '_upload_data')
+    def test_enrich_chunks(self, upload_data_mock):
+        points = [Point(i, i) for i in range(5)]
+        df = DataFrame({'value': range(5), 'the_geom': points})
+
+        def execute_enrichment(queries, geodataframe):
+            assert queries == ['query_{}'.format(upload_data_mock.call_args[0][0])]
+            result = geodataframe.drop([_ENRICHMENT_ID, _GEOM_COLUMN], axis=1)
+            result['var1'] = result['value'] * 10
+            return result
+
+        enrichment_service = EnrichmentService(credentials=self.credentials)
+        enrichment_service._execute_enrichment = Mock(side_effect=execute_enrichment)
+
+        result = enrichment_service._enrich(df, 'the_geom', lambda table: ['query_{}'.format(table)], chunksize=2)
+
+        uploaded = [call[0][1] for call in upload_data_mock.call_args_list]
+        assert [len(gdf) for gdf in uploaded] == [2, 2, 1]
+        assert [gdf[_ENRICHMENT_ID].tolist() for gdf in uploaded] == [[0, 1], [0, 1], [0]]
+        assert isinstance(result, GeoDataFrame)
+        assert result.index.tolist() == [0, 1, 2, 3, 4]
+        assert result['var1'].tolist() == [0, 10, 20, 30, 40]
+        assert result['the_geom'].tolist() == points
+
+    @patch.object(EnrichmentService, '_upload_data')
+    def test_enrich_workers_error(self, upload_data_mock):
+        df = DataFrame({'value': range(4), 'the_geom': [Point(i, i) for i in range(4)]})
+
+        enrichment_service = EnrichmentService(credentials=self.credentials)
+        enrichment_service._execute_enrichment = Mock(side_effect=EnrichmentError('error'))
+
+        with pytest.raises(EnrichmentError):
+            enrichment_service._enrich(df, 'the_geom', lambda table: [], workers=2)
+
+    def test_enrich_workers_error_stops_chunks(self):
+        df = DataFrame({'value': range(4), 'the_geom': [Point(i, i) for i in range(4)]})
+        stopped = threading.Event()
+        uploading = threading.Event()
+        uploaded = []
+
+        class StopEvent(threading.Event):
+            def set(self):
+                super(StopEvent, self).set()
+                stopped.set()
+
+        def upload_data(tablename, geodataframe):
+            value = geodataframe['value'].iloc[0]
+            if value != 0:
+                # The rest of the chunks are in flight when the first one fails
+                uploading.set()
+                assert stopped.wait(timeout=30)
+            uploaded.append(value)
+
+        def execute_enrichment(queries, geodataframe):
+            assert uploading.wait(timeout=30)
+            raise EnrichmentError('error')
+
+        enrichment_service = EnrichmentService(credentials=self.credentials)
+        enrichment_service._upload_data = Mock(side_effect=upload_data)
+        enrichment_service._execute_enrichment = Mock(side_effect=execute_enrichment)
+
+        with patch('cartoframes.data.observatory.enrichment.enrichment_service.Event', StopEvent):
+            with pytest.raises(EnrichmentError) as e:
+                enrichment_service._enrich(df, 'the_geom', lambda table: [], chunksize=1, workers=2)
+
+        assert str(e.value) == 'error'
+        assert enrichment_service._execute_enrichment.call_count == 1
+        assert 1 in uploaded
+        assert 3 not in uploaded
+
+    def test_enrich_workers_errors_first_chunk(self):
+        df = DataFrame({'value': range(4), 'the_geom': [Point(i, i) for i in range(4)]})
+        stopped = threading.Event()
+        running = threading.Event()
+        failed = threading.Event()
+        uploaded = []
+
+        class StopEvent(threading.Event):
+            def set(self):
+                super(StopEvent, self).set()
+                stopped.set()
+
+        enrichment_service = EnrichmentService(credentials=self.credentials)
+        prepare_data = enrichment_service._prepare_data
+
+        def prepare_chunk(dataframe, geom_col):
+            if dataframe['value'].iloc[0] > 1:
+                # The rest of the chunks are picked up before the error is handled
+                assert stopped.wait(timeout=30)
+            return prepare_data(dataframe, geom_col)
+
+        def execute_enrichment(queries, geodataframe):
+            value = geodataframe['value'].iloc[0]
+            if value == 1:
+                assert running.wait(timeout=30)
+                failed.set()
+            else:
+                # The first chunk fails after the second one
+                running.set()
+                assert failed.wait(timeout=30)
+            raise EnrichmentError('error {}'.format(value))
+
+        enrichment_service._prepare_data = Mock(side_effect=prepare_chunk)
+        enrichment_service._upload_data = Mock(side_effect=lambda table, gdf: uploaded.append(gdf['value'].iloc[0]))
+        enrichment_service._execute_enrichment = Mock(side_effect=execute_enrichment)
+
+        with patch('cartoframes.data.observatory.enrichment.enrichment_service.Event', StopEvent):
+            with pytest.raises(EnrichmentError) as e:
+                enrichment_service._enrich(df, 'the_geom', lambda table: [], chunksize=1, workers=2)
+
+        assert str(e.value) == 'error 0'
+        assert sorted(uploaded) == [0, 1]
+        assert enrichment_service._execute_enrichment.call_count == 2
+
+    def test_enrich_wrong_params(self):
+        enrichment_service = EnrichmentService(credentials=self.credentials)
+
+        with pytest.raises(ValueError) as e:
+            enrichment_service._enrich(DataFrame(), 'the_geom', None, workers=0)
+        assert str(e.value) == 'Wrong number of workers. You should provide an integer >= 1.'
+
+        with pytest.raises(ValueError) as e:
+            enrichment_service._enrich(DataFrame(), 'the_geom', None, chunksize=1.5)
+        assert str(e.value) == 'Wrong chunksize. You should provide an integer >= 1.'
+
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._validate_bq_operations')
-    @patch.object(Variable, 'get')
+    @patch.object(Variable, 'get_list')
     def test_prepare_variables(self, get_mock, _validate_bq_operations_mock):
-        _validate_bq_operations_mock.return_value = True
+        _validate_bq_operations_mock.return_value = ({}, {})
 
         variable_id = 'project.dataset.table.variable'
         variable = Variable({
@@ -208,7 +455,7 @@ class TestEnrichmentService(object):
             'dataset_id': 'fake_name'
         })
 
-        get_mock.return_value = variable
+        get_mock.return_value = [variable]
 
         credentials = Credentials('fake_user', '1234')
 
@@ -234,9 +481,9 @@ class TestEnrichmentService(object):
             assert result == [variable, variable]
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._validate_bq_operations')
-    @patch.object(Variable, 'get')
+    @patch.object(Variable, 'get_list')
     def test_prepare_variables_with_agg_method(self, get_mock, _validate_bq_operations_mock):
-        _validate_bq_operations_mock.return_value = True
+        _validate_bq_operations_mock.return_value = ({}, {})
 
         variable_id = 'project.dataset.table.variable'
         variable = Variable({
@@ -246,7 +493,7 @@ class TestEnrichmentService(object):
             'agg_method': 'SUM'
         })
 
-        get_mock.return_value = variable
+        get_mock.return_value = [variable]
 
         credentials = Credentials('fake_user', '1234')
 
@@ -266,9 +513,9 @@ class TestEnrichmentService(object):
             assert result == [variable]
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._validate_bq_operations')
-    @patch.object(Variable, 'get')
+    @patch.object(Variable, 'get_list')
     def test_prepare_variables_without_agg_method(self, get_mock, _validate_bq_operations_mock):
-        _validate_bq_operations_mock.return_value = True
+        _validate_bq_operations_mock.return_value = ({}, {})
 
         variable_id = 'project.dataset.table.variable'
         variable = Variable({
@@ -278,7 +525,7 @@ class TestEnrichmentService(object):
             'agg_method': None
         })
 
-        get_mock.return_value = variable
+        get_mock.return_value = [variable]
 
         credentials = Credentials('fake_user', '1234')
 
@@ -297,8 +544,8 @@ class TestEnrichmentService(object):
 
             assert result == []
 
-    @patch.object(EntityRepository, 'get_by_id')
-    @patch.object(Variable, 'get')
+    @patch.object(EntityRepository, 'get_by_id_list')
+    @patch.object(Variable, 'get_list')
     def test_prepare_variables_raises_if_not_available_in_bq_even_public(self, get_mock, entity_repo):
         dataset = Dataset({
             'id': 'id',
@@ -310,17 +557,24 @@ class TestEnrichmentService(object):
             'is_public_data': True
         })
 
-        # mock dataset
-        entity_repo.return_value = dataset
+        geography = Geography({
+            'id': 'geography',
+            'slug': 'geography_slug',
+            'available_in': [],
+            'is_public_data': True
+        })
+
+        # mock dataset and geography
+        entity_repo.side_effect = [CatalogList([dataset]), CatalogList([geography])]
 
         variable = Variable({
             'id': 'id',
             'column_name': 'column',
-            'dataset_id': 'fake_name',
+            'dataset_id': 'id',
             'slug': 'slug'
         })
 
-        get_mock.return_value = variable
+        get_mock.return_value = [variable]
 
         credentials = Credentials('fake_user', '1234')
 
@@ -332,10 +586,10 @@ class TestEnrichmentService(object):
         """.format(dataset)
         assert str(e.value) == error
 
-    @patch.object(DatasetRepository, 'get_all')
-    @patch.object(EntityRepository, 'get_by_id')
-    @patch.object(Variable, 'get')
-    def test_prepare_variables_raises_if_not_available_in_bq(self, get_mock, entity_repo, get_all_mock):
+    @patch('cartoframes.data.observatory.enrichment.enrichment_service.fetch_subscriptions')
+    @patch.object(EntityRepository, 'get_by_id_list')
+    @patch.object(Variable, 'get_list')
+    def test_prepare_variables_raises_if_not_available_in_bq(self, get_mock, entity_repo, fetch_subscriptions_mock):
         dataset = Dataset({
             'id': 'id',
             'slug': 'slug',
@@ -346,20 +600,27 @@ class TestEnrichmentService(object):
             'is_public_data': False
         })
 
-        # mock dataset
-        entity_repo.return_value = dataset
+        geography = Geography({
+            'id': 'geography',
+            'slug': 'geography_slug',
+            'available_in': [],
+            'is_public_data': False
+        })
+
+        # mock dataset and geography
+        entity_repo.side_effect = [CatalogList([dataset]), CatalogList([geography])]
 
         # mock subscriptions
-        get_all_mock.return_value = [dataset]
+        fetch_subscriptions_mock.return_value = [Mock(id=dataset.id), Mock(id=geography.id)]
 
         variable = Variable({
             'id': 'id',
             'column_name': 'column',
-            'dataset_id': 'fake_name',
+            'dataset_id': 'id',
             'slug': 'slug'
         })
 
-        get_mock.return_value = variable
+        get_mock.return_value = [variable]
 
         credentials = Credentials('fake_user', '1234')
 
@@ -371,10 +632,10 @@ class TestEnrichmentService(object):
         """.format(dataset)
         assert str(e.value) == error
 
-    @patch.object(DatasetRepository, 'get_all')
-    @patch.object(EntityRepository, 'get_by_id')
-    @patch.object(Variable, 'get')
-    def test_prepare_variables_works_with_public_dataset(self, get_mock, entity_repo, get_all_mock):
+    @patch('cartoframes.data.observatory.enrichment.enrichment_service.fetch_subscriptions')
+    @patch.object(EntityRepository, 'get_by_id_list')
+    @patch.object(Variable, 'get_list')
+    def test_prepare_variables_works_with_public_dataset(self, get_mock, entity_repo, fetch_subscriptions_mock):
         dataset = Dataset({
             'id': 'id',
             'slug': 'slug',
@@ -385,30 +646,37 @@ class TestEnrichmentService(object):
             'is_public_data': True
         })
 
-        # mock dataset
-        entity_repo.return_value = dataset
+        geography = Geography({
+            'id': 'geography',
+            'slug': 'geography_slug',
+            'available_in': ['bq'],
+            'is_public_data': True
+        })
+
+        # mock dataset and geography
+        entity_repo.side_effect = [CatalogList([dataset]), CatalogList([geography])]
 
         # mock subscriptions
-        get_all_mock.return_value = []
+        fetch_subscriptions_mock.return_value = []
 
         variable = Variable({
             'id': 'id',
             'column_name': 'column',
-            'dataset_id': 'fake_name',
+            'dataset_id': 'id',
             'slug': 'slug'
         })
 
-        get_mock.return_value = variable
+        get_mock.return_value = [variable]
 
         credentials = Credentials('fake_user', '1234')
 
         result = prepare_variables(variable, credentials)
         assert result == [variable]
 
-    @patch.object(DatasetRepository, 'get_all')
-    @patch.object(EntityRepository, 'get_by_id')
-    @patch.object(Variable, 'get')
-    def test_prepare_variables_fails_with_private(self, get_mock, entity_repo, get_all_mock):
+    @patch('cartoframes.data.observatory.enrichment.enrichment_service.fetch_subscriptions')
+    @patch.object(EntityRepository, 'get_by_id_list')
+    @patch.object(Variable, 'get_list')
+    def test_prepare_variables_fails_with_private(self, get_mock, entity_repo, fetch_subscriptions_mock):
         dataset = Dataset({
             'id': 'id',
             'slug': 'slug',
@@ -419,20 +687,27 @@ class TestEnrichmentService(object):
             'is_public_data': False
         })
 
-        # mock dataset
-        entity_repo.return_value = dataset
+        geography = Geography({
+            'id': 'geography',
+            'slug': 'geography_slug',
+            'available_in': ['bq'],
+            'is_public_data': False
+        })
+
+        # mock dataset and geography
+        entity_repo.side_effect = [CatalogList([dataset]), CatalogList([geography])]
 
         # mock subscriptions
-        get_all_mock.return_value = []
+        fetch_subscriptions_mock.return_value = []
 
         variable = Variable({
             'id': 'id',
             'column_name': 'column',
-            'dataset_id': 'fake_name',
+            'dataset_id': 'id',
             'slug': 'slug'
         })
 
-        get_mock.return_value = variable
+        get_mock.return_value = [variable]
 
         credentials = Credentials('fake_user', '1234')
 
@@ -444,10 +719,10 @@ class TestEnrichmentService(object):
         """.format(dataset.id)
         assert str(e.value) == error
 
-    @patch.object(DatasetRepository, 'get_all')
-    @patch.object(EntityRepository, 'get_by_id')
-    @patch.object(Variable, 'get')
-    def test_prepare_variables_works_with_private_and_subscribed(self, get_mock, entity_repo, get_all_mock):
+    @patch('cartoframes.data.observatory.enrichment.enrichment_service.fetch_subscriptions')
+    @patch.object(EntityRepository, 'get_by_id_list')
+    @patch.object(Variable, 'get_list')
+    def test_prepare_variables_works_with_private_and_subscribed(self, get_mock, entity_repo, fetch_subscriptions_mock):
         dataset = Dataset({
             'id': 'id',
             'slug': 'slug',
@@ -458,20 +733,27 @@ class TestEnrichmentService(object):
             'is_public_data': False
         })
 
-        # mock dataset
-        entity_repo.return_value = dataset
+        geography = Geography({
+            'id': 'geography',
+            'slug': 'geography_slug',
+            'available_in': ['bq'],
+            'is_public_data': False
+        })
+
+        # mock dataset and geography
+        entity_repo.side_effect = [CatalogList([dataset]), CatalogList([geography])]
 
         # mock subscriptions
-        get_all_mock.return_value = [dataset]
+        fetch_subscriptions_mock.return_value = [Mock(id=dataset.id), Mock(id=geography.id)]
 
         variable = Variable({
             'id': 'id',
             'column_name': 'column',
-            'dataset_id': 'fake_name',
+            'dataset_id': 'id',
             'slug': 'slug'
         })
 
-        get_mock.return_value = variable
+        get_mock.return_value = [variable]
 
         credentials = Credentials('fake_user', '1234')
 
@@ -479,9 +761,9 @@ class TestEnrichmentService(object):
         assert result == [variable]
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._validate_bq_operations')
-    @patch.object(Variable, 'get')
+    @patch.object(Variable, 'get_list')
     def test_prepare_variables_without_agg_method_and_custom_agg(self, get_mock, _validate_bq_operations_mock):
-        _validate_bq_operations_mock.return_value = True
+        _validate_bq_operations_mock.return_value = ({}, {})
 
         variable_id = 'project.dataset.table.variable'
         variable = Variable({
@@ -491,7 +773,7 @@ class TestEnrichmentService(object):
             'agg_method': None
         })
 
-        get_mock.return_value = variable
+        get_mock.return_value = [variable]
 
         credentials = Credentials('fake_user', '1234')
 
@@ -515,6 +797,49 @@ class TestEnrichmentService(object):
 
             assert result == [variable]
 
+    @patch('cartoframes.data.observatory.enrichment.enrichment_service.fetch_subscriptions')
+    @patch.object(Geography, 'get_list')
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Variable, 'get_list')
+    def test_prepare_variables_batched_lookups(self, variable_get_list_mock, dataset_get_list_mock,
+                                               geography_get_list_mock, fetch_subscriptions_mock):
+        datasets = [Dataset({'id': 'project.schema.table{}'.format(i), 'geography_id': 'project.schema.geo',
+                             'available_in': ['bq'], 'is_public_data': False}) for i in range(2)]
+        geography = Geography({'id': 'project.schema.geo', 'available_in': ['bq'], 'is_public_data': False})
+        variables = [Variable({'id': '{}.column{}'.format(datasets[i % 2].id, i), 'slug': 'slug{}'.format(i),
+                               'column_name': 'column{}'.format(i), 'dataset_id': datasets[i % 2].id})
+                     for i in range(4)]
+
+        variable_get_list_mock.side_effect = [variables[:2], variables[2:]]
+        dataset_get_list_mock.return_value = CatalogList(datasets)
+        geography_get_list_mock.return_value = CatalogList([geography])
+        fetch_subscriptions_mock.return_value = [Mock(id=datasets[0].id), Mock(id=datasets[1].id),
+                                                 Mock(id=geography.id)]
+
+        credentials = Credentials('fake_user', '1234')
+        result = prepare_variables([variables[0].id, variables[1].id, 'slug2', 'slug3', variables[0].id], credentials)
+
+        assert result == variables + [variables[0]]
+        assert variable_get_list_mock.call_count == 2
+        variable_get_list_mock.assert_any_call([variables[0].id, variables[1].id])
+        variable_get_list_mock.assert_any_call(['slug2', 'slug3'])
+        dataset_get_list_mock.assert_called_once_with([datasets[0].id, datasets[1].id])
+        geography_get_list_mock.assert_called_once_with([geography.id])
+        assert fetch_subscriptions_mock.call_count == 1
+
+        # Not subscribed to the geography
+        variable_get_list_mock.side_effect = None
+        variable_get_list_mock.return_value = variables[:1]
+        fetch_subscriptions_mock.return_value = [Mock(id=datasets[0].id)]
+        with pytest.raises(EnrichmentError) as e:
+            prepare_variables(variables[0].id, credentials)
+        assert "You are not subscribed to the Geography '{}'".format(geography.id) in str(e.value)
+
+        # Not found in the catalog
+        variable_get_list_mock.return_value = None
+        with pytest.raises(CatalogError):
+            prepare_variables('project.schema.table.missing', credentials)
+
     def test_get_aggregation(self):
         variable_agg = Variable({
             'id': 'id',
@@ -671,36 +996,18 @@ class TestEnrichmentService(object):
         })
 
         aggregation = 'sum'
-        expected_sql = """
-            sum(
-                enrichment_table.{column} * (
-                    ST_AREA(ST_INTERSECTION(enrichment_geo_table.geom, data_table.{geo_column}))
-                    /
-                    NULLIF(ST_AREA(enrichment_geo_table.geom), 0)
-                )
-            ) AS {column_name}
-            """.format(
-                column=variable.column_name,
-                column_name=variable.column_name,
-                geo_column=_GEOM_COLUMN)
+        expected_sql = 'sum(enrichment_table.{column} * intersections.intersection_ratio) AS {column_name}'.format(
+            column=variable.column_name,
+            column_name=variable.column_name)
         sql = _build_polygons_column_with_aggregation(variable, aggregation)
-        assert sql == expected_sql
+        assert sql.strip() == expected_sql
 
         aggregation = 'sum'
-        expected_sql = """
-            sum(
-                enrichment_table.{column} * (
-                    ST_AREA(ST_INTERSECTION(enrichment_geo_table.geom, data_table.{geo_column}))
-                    /
-                    NULLIF(ST_AREA(enrichment_geo_table.geom), 0)
-                )
-            ) AS {column_name}
-            """.format(
-                column=variable.column_name,
-                column_name='sum_{}'.format(variable.column_name),
-                geo_column=_GEOM_COLUMN)
+        expected_sql = 'sum(enrichment_table.{column} * intersections.intersection_ratio) AS {column_name}'.format(
+            column=variable.column_name,
+            column_name='sum_{}'.format(variable.column_name))
         sql = _build_polygons_column_with_aggregation(variable, aggregation, True)
-        assert sql == expected_sql
+        assert sql.strip() == expected_sql
 
         aggregation = 'avg'
         expected_sql = 'avg(enrichment_table.{column}) AS {column_name}'.format(
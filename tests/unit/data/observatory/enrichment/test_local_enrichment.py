@@ -0,0 +1,208 @@
+import pytest
+import numpy as np
+
+from pandas import DataFrame
+from unittest.mock import Mock, patch
+from shapely.geometry import Point, box
+from google.cloud import bigquery, storage
+
+from cartoframes.auth import Credentials
+from cartoframes.data.observatory import Enrichment, Variable, Dataset, Geography
+from cartoframes.data.observatory.enrichment import local_enrichment
+from cartoframes.data.observatory.enrichment.local_enrichment import geodesic_areas
+from cartoframes.exceptions import EnrichmentError
+from cartoframes.utils.cache import QueryCache
+
+
+class DoCredentials:
+    def __init__(self):
+        self.access_token = 'access_token'
+        self.gcp_execution_project = 'execution_project'
+        self.bq_public_project = 'carto-do-public-data'
+        self.bq_project = 'carto-do-customers'
+        self.bq_dataset = 'username'
+        self.gcs_bucket = 'bucket'
+        self.instant_licensing = False
+
+
+class EntityMock:
+    def __init__(self, id_, data, geography=None):
+        self.id = id_
+        self.version = '1'
+        self.geography = geography
+        self._download = Mock(return_value=data)
+
+
+GEOGRAPHY = EntityMock('carto-do-public-data.dataset.geography', DataFrame({
+    'geoid': ['a', 'b'],
+    'geom': [box(0, 0, 1, 1).wkt, box(1, 0, 2, 1).wkt]
+}))
+DATASET = EntityMock('carto-do-public-data.dataset.table', DataFrame({
+    'geoid': ['a', 'b'],
+    'population': [10, 20],
+    'income': [100, 200]
+}), geography=GEOGRAPHY.id)
+VARIABLE = Variable({
+    'id': '{}.population'.format(DATASET.id),
+    'column_name': 'population',
+    'dataset_id': DATASET.id,
+    'agg_method': 'SUM'
+})
+INCOME_VARIABLE = Variable({
+    'id': '{}.income'.format(DATASET.id),
+    'column_name': 'income',
+    'dataset_id': DATASET.id,
+    'agg_method': 'AVG'
+})
+
+
+class TestLocalEnrichment(object):
+    def setup_method(self):
+        self.original_bigquery_Client = bigquery.Client
+        bigquery.Client = Mock(return_value=True)
+        self.original_storage_Client = storage.Client
+        storage.Client = Mock(return_value=True)
+        self.original_get_do_credentials = Credentials.get_do_credentials
+        Credentials.get_do_credentials = Mock(return_value=DoCredentials())
+        self.credentials = Credentials('username', 'apikey')
+
+    def teardown_method(self):
+        bigquery.Client = self.original_bigquery_Client
+        storage.Client = self.original_storage_Client
+        Credentials.get_do_credentials = self.original_get_do_credentials
+
+    def test_geodesic_areas(self):
+        areas = geodesic_areas(np.array([box(0, 0, 1, 1), None], dtype=object))
+
+        assert areas[0] == pytest.approx(1.2364e10, rel=1e-3)
+        assert areas[1] == 0
+
+    @patch('cartoframes.data.observatory.enrichment.enrichment._prepare_variables')
+    @patch.object(Geography, 'get', return_value=GEOGRAPHY)
+    @patch.object(Dataset, 'get', return_value=DATASET)
+    def test_enrich_points_local(self, dataset_get_mock, geography_get_mock, prepare_variables_mock, tmp_path):
+        prepare_variables_mock.return_value = ([VARIABLE], {}, {})
+        query_cache = QueryCache(path=str(tmp_path))
+        df = DataFrame({
+            'id': [1, 2, 3, 4, 5],
+            # The last point is on the edge of a tile of the spatial join
+            'the_geom': [Point(0.5, 0.5), Point(1.5, 0.5), Point(5, 5), Point(0.5, 0.5), Point(1.40625, 0.5)]
+        })
+
+        with patch.object(local_enrichment, 'get_enrichment_cache', return_value=query_cache):
+            result = Enrichment(self.credentials).enrich_points(df, [VARIABLE], 'the_geom', engine='local')
+            second_result = Enrichment(self.credentials).enrich_points(df, [VARIABLE], 'the_geom', engine='local')
+
+        assert list(result.columns) == ['id', 'the_geom', 'population', 'do_area']
+        assert result['id'].tolist() == [1, 2, 3, 4, 5]
+        assert result['population'].tolist()[:2] == [10, 20]
+        assert np.isnan(result['population'][2])
+        assert result['population'].tolist()[3:] == [10, 20]
+        assert result['do_area'][0] == pytest.approx(1.2364e10, rel=1e-3)
+        assert second_result.equals(result)
+        assert GEOGRAPHY._download.call_count == 1
+        assert DATASET._download.call_count == 1
+
+    @patch('cartoframes.data.observatory.enrichment.enrichment._prepare_variables')
+    @patch.object(Geography, 'get', return_value=GEOGRAPHY)
+    @patch.object(Dataset, 'get', return_value=DATASET)
+    def test_enrich_polygons_local(self, dataset_get_mock, geography_get_mock, prepare_variables_mock, tmp_path):
+        variables = [VARIABLE, INCOME_VARIABLE]
+        prepare_variables_mock.return_value = (variables, {}, {})
+        df = DataFrame({
+            'id': [1, 2, 3],
+            'the_geom': [box(0.5, 0, 1.5, 1), box(0.25, 0.25, 0.75, 0.75), box(5, 5, 6, 6)]
+        })
+
+        with patch.object(local_enrichment, 'get_enrichment_cache', return_value=QueryCache(path=str(tmp_path))):
+            result = Enrichment(self.credentials).enrich_polygons(df, variables, 'the_geom', engine='local')
+            result_aggs = Enrichment(self.credentials).enrich_polygons(
+                df, variables, 'the_geom', aggregation={VARIABLE.id: ['MIN', 'MAX', 'COUNT']}, engine='local')
+
+        assert list(result.columns) == ['id', 'the_geom', 'population', 'income']
+        # SUM weighted by the fraction of the geodesic areas of the geographies
+        weights = geodesic_areas([box(0.5, 0, 1, 1), box(1, 0, 1.5, 1), box(0.25, 0.25, 0.75, 0.75)]) / \
+            geodesic_areas([box(0, 0, 1, 1)])[0]
+        assert result['population'].tolist()[:2] == pytest.approx([10 * weights[0] + 20 * weights[1],
+                                                                   10 * weights[2]])
+        assert result['income'].tolist()[:2] == pytest.approx([150, 100])
+        assert result[['population', 'income']].iloc[2].isnull().all()
+        assert list(result_aggs.columns) == ['id', 'the_geom', 'min_population', 'max_population',
+                                             'count_population', 'income']
+        assert result_aggs['min_population'].tolist()[:2] == [10, 10]
+        assert result_aggs['max_population'].tolist()[:2] == [20, 10]
+        assert result_aggs['count_population'].tolist()[:2] == [2, 1]
+
+    @patch('cartoframes.data.observatory.enrichment.enrichment._prepare_variables')
+    def test_enrich_polygons_local_geodesic_weights(self, prepare_variables_mock, tmp_path):
+        geography = EntityMock('carto-do-public-data.dataset.tall_geography', DataFrame({
+            'geoid': ['a'],
+            'geom': [box(0, 0, 1, 60).wkt]
+        }))
+        dataset = EntityMock('carto-do-public-data.dataset.tall_table', DataFrame({
+            'geoid': ['a'],
+            'population': [100]
+        }), geography=geography.id)
+        variable = Variable({
+            'id': '{}.population'.format(dataset.id),
+            'column_name': 'population',
+            'dataset_id': dataset.id,
+            'agg_method': 'SUM'
+        })
+        prepare_variables_mock.return_value = ([variable], {}, {})
+        df = DataFrame({'id': [1], 'the_geom': [box(0, 30, 1, 60)]})
+
+        with patch.object(Geography, 'get', return_value=geography), \
+                patch.object(Dataset, 'get', return_value=dataset), \
+                patch.object(local_enrichment, 'get_enrichment_cache', return_value=QueryCache(path=str(tmp_path))):
+            result = Enrichment(self.credentials).enrich_polygons(df, [variable], 'the_geom', engine='local')
+
+        # The northern half of the geography has less area than the southern one
+        assert result['population'][0] == pytest.approx(42.3, abs=0.1)
+
+    @patch('cartoframes.data.observatory.enrichment.enrichment._prepare_variables')
+    @patch.object(Geography, 'get', return_value=GEOGRAPHY)
+    @patch.object(Dataset, 'get', return_value=DATASET)
+    def test_enrich_polygons_local_no_aggregation(self, dataset_get_mock, geography_get_mock,
+                                                  prepare_variables_mock, tmp_path):
+        prepare_variables_mock.return_value = ([VARIABLE], {}, {})
+        df = DataFrame({'id': [1], 'the_geom': [box(0.5, 0, 1.5, 1)]})
+
+        with patch.object(local_enrichment, 'get_enrichment_cache', return_value=QueryCache(path=str(tmp_path))):
+            result = Enrichment(self.credentials).enrich_polygons(
+                df, [VARIABLE], 'the_geom', aggregation=None, engine='local', workers=2)
+
+        assert list(result.columns) == ['id', 'the_geom', 'population', 'intersected_area', 'do_area', 'user_area',
+                                        'do_geoid']
+        assert sorted(result['do_geoid']) == ['a', 'b']
+        assert result['intersected_area'].tolist() == pytest.approx([6.182e9, 6.182e9], rel=1e-3)
+        assert result['user_area'].tolist() == pytest.approx([1.2364e10, 1.2364e10], rel=1e-3)
+
+    @patch('cartoframes.data.observatory.enrichment.enrichment._prepare_variables')
+    @patch.object(Geography, 'get', return_value=GEOGRAPHY)
+    @patch.object(Dataset, 'get', return_value=DATASET)
+    def test_enrich_polygons_local_wrong_aggregation(self, dataset_get_mock, geography_get_mock,
+                                                     prepare_variables_mock):
+        prepare_variables_mock.return_value = ([VARIABLE], {}, {})
+        df = DataFrame({'id': [1], 'the_geom': [box(0.5, 0, 1.5, 1)]})
+
+        with pytest.raises(EnrichmentError):
+            Enrichment(self.credentials).enrich_polygons(df, [VARIABLE], 'the_geom', aggregation='ARRAY_AGG',
+                                                         engine='local')
+
+    @patch('cartoframes.data.observatory.enrichment.enrichment._prepare_variables')
+    def test_enrich_points_local_wrong_params(self, prepare_variables_mock):
+        prepare_variables_mock.return_value = ([VARIABLE], {}, {})
+        df = DataFrame({'the_geom': [Point(0.5, 0.5)]})
+        enrichment = Enrichment(self.credentials)
+
+        with pytest.raises(ValueError) as e:
+            enrichment.enrich_points(df, [VARIABLE], 'the_geom', engine='wrong')
+        assert str(e.value) == "Wrong engine. You should provide one of ['bigquery', 'local']."
+
+        with pytest.raises(ValueError) as e:
+            enrichment.enrich_points(df, [VARIABLE], 'the_geom', chunksize=10, engine='local')
+        assert str(e.value) == 'Wrong chunksize. The local engine does not support chunksize.'
+
+        with pytest.raises(EnrichmentError):
+            enrichment.enrich_points(df, [VARIABLE], 'the_geom', filters={VARIABLE.id: '> 1'}, engine='local')
@@ -1,10 +1,12 @@
+from pandas import DataFrame
 from unittest.mock import Mock, patch
 from google.cloud import bigquery, storage
+from shapely.geometry import Point
 
 from cartoframes.auth import Credentials
 from cartoframes.data.observatory import Enrichment, Variable, Dataset, Geography
 from cartoframes.data.observatory.enrichment.enrichment_service import _GEOM_COLUMN
-from enrichment_mock import CatalogEntityWithGeographyMock, GeographyMock
+from enrichment_mock import CatalogEntityWithGeographyMock, GeographyMock, get_list_mock
 
 _WORKING_PROJECT = 'carto-do-customers'
 _PUBLIC_PROJECT = 'carto-do-public-data'
@@ -39,9 +41,9 @@ class TestPointsEnrichment(object):
         storage.Client = self.original_storage_Client
         Credentials.get_do_credentials = self.original_get_do_credentials
 
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_points_one_variable(self, geography_get_mock, dataset_get_mock):
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_points_one_variable(self, geography_get_list_mock, dataset_get_list_mock):
         enrichment = Enrichment(credentials=self.credentials)
 
         temp_table_name = 'test_table'
@@ -62,8 +64,8 @@ class TestPointsEnrichment(object):
         variables = [variable]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_points_enrichment_sql(
             temp_table_name, variables, []
@@ -78,9 +80,9 @@ class TestPointsEnrichment(object):
 
         assert actual == expected
 
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_points_two_variables(self, geography_get_mock, dataset_get_mock):
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_points_two_variables(self, geography_get_list_mock, dataset_get_list_mock):
         enrichment = Enrichment(credentials=self.credentials)
 
         temp_table_name = 'test_table'
@@ -108,8 +110,8 @@ class TestPointsEnrichment(object):
         variables = [variable1, variable2]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_points_enrichment_sql(
             temp_table_name, variables, []
@@ -124,9 +126,10 @@ class TestPointsEnrichment(object):
 
         assert actual == expected
 
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_points_two_variables_different_tables(self, geography_get_mock, dataset_get_mock):
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_points_two_variables_different_tables(self, geography_get_list_mock,
+                                                                       dataset_get_list_mock):
         enrichment = Enrichment(credentials=self.credentials)
 
         temp_table_name = 'test_table'
@@ -156,8 +159,8 @@ class TestPointsEnrichment(object):
         variables = [variable1, variable2]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_points_enrichment_sql(
             temp_table_name, variables, []
@@ -173,9 +176,10 @@ class TestPointsEnrichment(object):
 
         assert actual == expected
 
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_points_two_variables_different_datasets(self, geography_get_mock, dataset_get_mock):
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_points_two_variables_different_datasets(self, geography_get_list_mock,
+                                                                         dataset_get_list_mock):
         enrichment = Enrichment(credentials=self.credentials)
 
         temp_table_name = 'test_table'
@@ -206,8 +210,8 @@ class TestPointsEnrichment(object):
         variables = [variable1, variable2]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset1, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_points_enrichment_sql(
             temp_table_name, variables, []
@@ -224,9 +228,9 @@ class TestPointsEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_points_with_filters(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_points_with_filters(self, geography_get_list_mock, dataset_get_list_mock,
                                                      _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -253,8 +257,8 @@ class TestPointsEnrichment(object):
         expected_filters = ["{} = 'a string'".format(variable.column_name)]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_points_enrichment_sql(
             temp_table_name, variables, filters
@@ -269,6 +273,45 @@ class TestPointsEnrichment(object):
 
         assert actual == expected
 
+    @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
+    @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_subscribed')
+    @patch('cartoframes.data.observatory.enrichment.enrichment_service.fetch_subscriptions')
+    @patch.object(Enrichment, '_upload_data')
+    @patch.object(Dataset, 'get')
+    @patch.object(Geography, 'get')
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrich_points_chunks_catalog_queries_once(self, geography_get_list_mock, dataset_get_list_mock,
+                                                       geography_get_mock, dataset_get_mock, upload_data_mock,
+                                                       fetch_subscriptions_mock, _is_subscribed_mock,
+                                                       _is_available_in_bq_mock):
+        variable = Variable({
+            'id': 'project.dataset.table.variable1',
+            'column_name': 'column1',
+            'dataset_id': 'fake_name'
+        })
+        dataset_get_list_mock.side_effect = get_list_mock(CatalogEntityWithGeographyMock('project.dataset.geo_table'))
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
+        fetch_subscriptions_mock.return_value = []
+
+        df = DataFrame({'value': range(3), 'the_geom': [Point(i, i) for i in range(3)]})
+        enrichment = Enrichment(credentials=self.credentials)
+        enrichment._execute_enrichment = Mock(side_effect=lambda queries, gdf: gdf)
+
+        enrichment.enrich_points(df, [variable], geom_col='the_geom', chunksize=1, workers=2)
+
+        assert enrichment._execute_enrichment.call_count == 3
+        # The catalog entities are fetched once for the validation and the queries of all the chunks
+        dataset_get_list_mock.assert_called_once_with([variable.dataset])
+        geography_get_list_mock.assert_called_once_with(['project.dataset.geo_table'])
+        dataset_get_mock.assert_not_called()
+        geography_get_mock.assert_not_called()
+        actual = sorted(_clean_query(call[0][0][0]) for call in enrichment._execute_enrichment.call_args_list)
+        expected = sorted(_clean_query(get_query(['column1'], self.username, 'view_dataset_table',
+                                                 'view_dataset_geo_table', call[0][0]))
+                          for call in upload_data_mock.call_args_list)
+        assert actual == expected
+
 
 def _clean_queries(queries):
     return [_clean_query(query) for query in queries]
@@ -3,10 +3,11 @@ from google.cloud import bigquery, storage
 
 from cartoframes.auth import Credentials
 from cartoframes.data.observatory import Enrichment, Variable, Dataset, Geography
-from enrichment_mock import CatalogEntityWithGeographyMock, GeographyMock
+from enrichment_mock import CatalogEntityWithGeographyMock, GeographyMock, get_list_mock
 from cartoframes.data.observatory.enrichment.enrichment_service import AGGREGATION_DEFAULT, AGGREGATION_NONE, \
     prepare_variables, _GEOM_COLUMN, _build_polygons_query_variables_without_aggregation, \
-    _build_polygons_query_variables_with_aggregation, _build_where_clausule, _build_where_condition
+    _build_polygons_query_variables_with_aggregation, _build_where_clausule, _build_where_condition, \
+    _get_polygons_aggregations
 
 _WORKING_PROJECT = 'carto-do-customers'
 _PUBLIC_PROJECT = 'carto-do-public-data'
@@ -43,9 +44,9 @@ class TestPolygonEnrichment(object):
         self.credentials = None
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_one_variable(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_one_variable(self, geography_get_list_mock, dataset_get_list_mock,
                                                        _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -71,8 +72,8 @@ class TestPolygonEnrichment(object):
         variables = [variable]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], AGGREGATION_DEFAULT
@@ -88,11 +89,11 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._validate_bq_operations')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_two_variables(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_two_variables(self, geography_get_list_mock, dataset_get_list_mock,
                                                         _validate_bq_operations_mock):
-        _validate_bq_operations_mock.return_value = True
+        _validate_bq_operations_mock.return_value = ({}, {})
 
         enrichment = Enrichment(credentials=self.credentials)
 
@@ -126,8 +127,8 @@ class TestPolygonEnrichment(object):
         variables = prepare_variables(variables, self.credentials, aggregation)
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], AGGREGATION_DEFAULT
@@ -143,11 +144,11 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._validate_bq_operations')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_two_variables_agg_none(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_two_variables_agg_none(self, geography_get_list_mock, dataset_get_list_mock,
                                                                  _validate_bq_operations_mock):
-        _validate_bq_operations_mock.return_value = True
+        _validate_bq_operations_mock.return_value = ({}, {})
 
         enrichment = Enrichment(credentials=self.credentials)
 
@@ -181,8 +182,8 @@ class TestPolygonEnrichment(object):
         variables = prepare_variables(variables, self.credentials, aggregation)
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], aggregation
@@ -198,11 +199,11 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._validate_bq_operations')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_two_vars_agg_none_custom(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_two_vars_agg_none_custom(self, geography_get_list_mock, dataset_get_list_mock,
                                                                    _validate_bq_ops_mock):
-        _validate_bq_ops_mock.return_value = True
+        _validate_bq_ops_mock.return_value = ({}, {})
 
         enrichment = Enrichment(credentials=self.credentials)
 
@@ -236,8 +237,8 @@ class TestPolygonEnrichment(object):
         variables = prepare_variables(variables, self.credentials, aggregation)
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], aggregation
@@ -253,11 +254,12 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._validate_bq_operations')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_two_vars_agg_none_custom2(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_two_vars_agg_none_custom2(self, geography_get_list_mock,
+                                                                    dataset_get_list_mock,
                                                                     _validate_bq_ops_mock):
-        _validate_bq_ops_mock.return_value = True
+        _validate_bq_ops_mock.return_value = ({}, {})
 
         enrichment = Enrichment(credentials=self.credentials)
 
@@ -291,8 +293,8 @@ class TestPolygonEnrichment(object):
         variables = prepare_variables(variables, self.credentials, aggregation)
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], aggregation
@@ -308,9 +310,9 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_polygons_2_vars_different_tables(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_polygons_2_vars_different_tables(self, geography_get_list_mock, dataset_get_list_mock,
                                                                _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -346,16 +348,16 @@ class TestPolygonEnrichment(object):
         variables = [variable1, variable2]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], AGGREGATION_DEFAULT
         )
 
         expected_queries = [
-            _get_query(agg, [variable1], self.username, view1, geo_view, temp_table_name),
-            _get_query(agg, [variable2], self.username, view2, geo_view, temp_table_name)
+            _get_geography_query([(agg, [variable1], view1, []), (agg, [variable2], view2, [])],
+                                 self.username, geo_view, temp_table_name)
         ]
 
         actual = sorted(_clean_queries(actual_queries))
@@ -364,9 +366,9 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_polygons_2_vars_different_datasets(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_polygons_2_vars_different_datasets(self, geography_get_list_mock, dataset_get_list_mock,
                                                                  _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -403,16 +405,16 @@ class TestPolygonEnrichment(object):
         variables = [variable1, variable2]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset1, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], AGGREGATION_DEFAULT
         )
 
         expected_queries = [
-            _get_query(agg, [variable1], self.username, view1, geo_view, temp_table_name),
-            _get_query(agg, [variable2], self.username, view2, geo_view, temp_table_name)
+            _get_geography_query([(agg, [variable1], view1, []), (agg, [variable2], view2, [])],
+                                 self.username, geo_view, temp_table_name)
         ]
 
         actual = sorted(_clean_queries(actual_queries))
@@ -421,9 +423,10 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_agg_empty_uses_variable_one(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_agg_empty_uses_variable_one(self, geography_get_list_mock,
+                                                                      dataset_get_list_mock,
                                                                       _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -450,8 +453,8 @@ class TestPolygonEnrichment(object):
         variables = [variable]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], aggregation
@@ -467,9 +470,9 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_agg_as_string(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_agg_as_string(self, geography_get_list_mock, dataset_get_list_mock,
                                                         _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -496,8 +499,8 @@ class TestPolygonEnrichment(object):
         variables = [variable]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], aggregation
@@ -513,9 +516,9 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_agg_none(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_agg_none(self, geography_get_list_mock, dataset_get_list_mock,
                                                    _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -540,8 +543,8 @@ class TestPolygonEnrichment(object):
         variables = [variable]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], AGGREGATION_NONE
@@ -557,9 +560,9 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_agg_custom(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_agg_custom(self, geography_get_list_mock, dataset_get_list_mock,
                                                      _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -598,16 +601,16 @@ class TestPolygonEnrichment(object):
         aggregation = {variable2.id: agg2}
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset1, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], aggregation
         )
 
         expected_queries = [
-            _get_query(agg1, [variable1], self.username, view1, geo_view, temp_table_name),
-            _get_query(agg2, [variable2], self.username, view2, geo_view, temp_table_name)
+            _get_geography_query([(agg1, [variable1], view1, []), (agg2, [variable2], view2, [])],
+                                 self.username, geo_view, temp_table_name)
         ]
 
         actual = sorted(_clean_queries(actual_queries))
@@ -616,9 +619,9 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_agg_custom_list(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_agg_custom_list(self, geography_get_list_mock, dataset_get_list_mock,
                                                           _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -657,16 +660,16 @@ class TestPolygonEnrichment(object):
         aggregation = {variable2.id: [agg1, agg2]}
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset1, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], aggregation
         )
 
         expected_queries = [
-            _get_query(agg1, [variable1], self.username, view1, geo_view, temp_table_name),
-            _get_query(aggregation, [variable2], self.username, view2, geo_view, temp_table_name)
+            _get_geography_query([(agg1, [variable1], view1, []), (aggregation, [variable2], view2, [])],
+                                 self.username, geo_view, temp_table_name)
         ]
 
         actual = sorted(_clean_queries(actual_queries))
@@ -675,9 +678,9 @@ class TestPolygonEnrichment(object):
         assert actual == expected
 
     @patch('cartoframes.data.observatory.enrichment.enrichment_service._is_available_in_bq')
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_by_polygons_with_filters(self, geography_get_mock, dataset_get_mock,
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_with_filters(self, geography_get_list_mock, dataset_get_list_mock,
                                                        _is_available_in_bq_mock):
         _is_available_in_bq_mock.return_value = True
 
@@ -706,8 +709,8 @@ class TestPolygonEnrichment(object):
         expected_filters = [_build_where_condition(variable.column_name, filters[variable.id])]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock()
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, filters, AGGREGATION_DEFAULT
@@ -722,9 +725,9 @@ class TestPolygonEnrichment(object):
 
         assert actual == expected
 
-    @patch.object(Dataset, 'get')
-    @patch.object(Geography, 'get')
-    def test_enrichment_query_using_public_project(self, geography_get_mock, dataset_get_mock):
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_using_public_project(self, geography_get_list_mock, dataset_get_list_mock):
         enrichment = Enrichment(credentials=self.credentials)
 
         temp_table_name = 'test_table'
@@ -745,8 +748,8 @@ class TestPolygonEnrichment(object):
         variables = [variable]
 
         catalog = CatalogEntityWithGeographyMock('{}.{}.{}'.format(project, dataset, geo_table))
-        dataset_get_mock.return_value = catalog
-        geography_get_mock.return_value = GeographyMock(is_public_data=True)
+        dataset_get_list_mock.side_effect = get_list_mock(catalog)
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock(is_public_data=True))
 
         actual_queries = enrichment._get_polygon_enrichment_sql(
             temp_table_name, variables, [], AGGREGATION_DEFAULT
@@ -761,6 +764,39 @@ class TestPolygonEnrichment(object):
 
         assert actual == expected
 
+    @patch.object(Dataset, 'get_list')
+    @patch.object(Geography, 'get_list')
+    def test_enrichment_query_by_polygons_shared_geography(self, geography_get_list_mock, dataset_get_list_mock):
+        enrichment = Enrichment(credentials=self.credentials)
+
+        temp_table_name = 'test_table'
+        geo_view = 'view_dataset_geo_table'
+        variables = [
+            Variable({
+                'id': 'project.dataset.{}.{}'.format(table, column),
+                'column_name': column,
+                'agg_method': 'SUM',
+                'dataset_id': 'fake_name'
+            }) for table, column in [('table1', 'column1'), ('table1', 'column2'), ('table2', 'column3'),
+                                     ('table3', 'column1')]
+        ]
+
+        dataset_get_list_mock.side_effect = get_list_mock(CatalogEntityWithGeographyMock('project.dataset.geo_table'))
+        geography_get_list_mock.side_effect = get_list_mock(GeographyMock())
+
+        actual_queries = enrichment._get_polygon_enrichment_sql(temp_table_name, variables, [], AGGREGATION_DEFAULT)
+
+        # table3 goes into another query because its column name collides with table1 ones
+        expected_queries = [
+            _get_geography_query([('SUM', variables[:2], 'view_dataset_table1', []),
+                                  ('SUM', variables[2:3], 'view_dataset_table2', [])],
+                                 self.username, geo_view, temp_table_name),
+            _get_query('SUM', variables[3:], self.username, 'view_dataset_table3', geo_view, temp_table_name)
+        ]
+
+        assert _clean_queries(actual_queries) == _clean_queries(expected_queries)
+        assert [query.count('ST_INTERSECTION') for query in actual_queries] == [1, 1]
+
 
 def _clean_queries(queries):
     return [_clean_query(query) for query in queries]
@@ -772,11 +808,9 @@ def _clean_query(query):
 
 def _get_query(agg, variables, username, view, geo_table, temp_table_name, filters=[]):
     if agg:
-        columns = _build_polygons_query_variables_with_aggregation(variables, agg)
-        group = 'group by data_table.enrichment_id'
-    else:
-        columns = _build_polygons_query_variables_without_aggregation(variables)
-        group = ''
+        return _get_geography_query([(agg, variables, view, filters)], username, geo_table, temp_table_name)
+
+    columns = _build_polygons_query_variables_without_aggregation(variables)
 
     return '''
         SELECT data_table.enrichment_id, {columns}
@@ -785,8 +819,7 @@ def _get_query(agg, variables, username, view, geo_table, temp_table_name, filte
         ON enrichment_table.geoid = enrichment_geo_table.geoid
         JOIN `{project}.{username}.{temp_table_name}` data_table
         ON ST_Intersects(data_table.{data_geom_column}, enrichment_geo_table.geom)
-        {where}
-        {group};
+        {where};
         '''.format(
             columns=columns,
             project=_WORKING_PROJECT,
@@ -795,53 +828,61 @@ def _get_query(agg, variables, username, view, geo_table, temp_table_name, filte
             geo_table=geo_table,
             temp_table_name=temp_table_name,
             data_geom_column=_GEOM_COLUMN,
-            where=_build_where_clausule(filters),
-            group=group)
-
-
-def _get_column_sql(agg, column):
-    agg = agg.lower()
-    if (agg == 'sum'):
-        return """
-            {aggregation}(
-                enrichment_table.{column} * (
-                    ST_AREA(ST_INTERSECTION(enrichment_geo_table.geom, data_table.{geo_column}))
-                    /
-                    ST_AREA(data_table.{geo_column})
-                )
-            ) AS {column}
-            """.format(
-                column=column,
-                geo_column=_GEOM_COLUMN,
-                aggregation=agg)
-    else:
-        return """
-            {aggregation}(enrichment_table.{column}) AS {column}
-            """.format(
-                column=column,
-                aggregation=agg)
+            where=_build_where_clausule(filters))
 
 
-def _get_public_query(agg, columns, username, dataset, table, geo_table, temp_table_name, filters=[]):
-    columns = ', '.join(_get_column_sql(agg, column) for column in columns)
+def _get_geography_query(tables, username, geo_table, temp_table_name, project=_WORKING_PROJECT):
+    """tables: list of (aggregation, variables, table, filters) sharing the geography"""
+    has_sum = any(variable_agg == 'sum' for agg, variables, _, _ in tables
+                  for _, variable_agg, _ in _get_polygons_aggregations(variables, agg))
+    intersection_ratio = ''',
+        ST_AREA(ST_INTERSECTION(enrichment_geo_table.geom, data_table.{data_geom_column}))
+        /
+        NULLIF(ST_AREA(enrichment_geo_table.geom), 0) AS intersection_ratio
+        '''.format(data_geom_column=_GEOM_COLUMN) if has_sum else ''
+
+    tables_queries = ['''
+        enrichment_{index} AS (
+            SELECT intersections.enrichment_id, {columns}
+            FROM intersections
+            JOIN `{table}` enrichment_table
+            ON enrichment_table.geoid = intersections.geoid
+            {where}
+            GROUP BY intersections.enrichment_id
+        )
+        '''.format(
+            index=index,
+            columns=_build_polygons_query_variables_with_aggregation(variables, agg),
+            table=table if project == _PUBLIC_PROJECT else '{}.{}.{}'.format(_WORKING_PROJECT, username, table),
+            where=_build_where_clausule(filters)
+        ) for index, (agg, variables, table, filters) in enumerate(tables)]
+
+    joins = ' '.join('FULL OUTER JOIN enrichment_{} USING (enrichment_id)'.format(index)
+                     for index in range(1, len(tables)))
 
     return '''
-        SELECT data_table.enrichment_id, {columns}
-        FROM `{public_project}.{dataset}.{table}` enrichment_table
-        JOIN `{public_project}.{dataset}.{geo_table}` enrichment_geo_table
-        ON enrichment_table.geoid = enrichment_geo_table.geoid
-        JOIN `{project}.{username}.{temp_table_name}` data_table
-        ON ST_Intersects(data_table.{data_geom_column}, enrichment_geo_table.geom)
-        {where}
-        group by data_table.enrichment_id;
+        WITH intersections AS (
+            SELECT data_table.enrichment_id, enrichment_geo_table.geoid{intersection_ratio}
+            FROM `{geo_table}` enrichment_geo_table
+            JOIN `{working_project}.{username}.{temp_table_name}` data_table
+            ON ST_Intersects(data_table.{data_geom_column}, enrichment_geo_table.geom)
+        ),
+        {tables_queries}
+        SELECT * FROM enrichment_0 {joins};
         '''.format(
-            columns=columns,
-            public_project=_PUBLIC_PROJECT,
-            project=_WORKING_PROJECT,
-            dataset=dataset,
+            intersection_ratio=intersection_ratio,
+            geo_table=geo_table if project == _PUBLIC_PROJECT else '{}.{}.{}'.format(project, username, geo_table),
+            working_project=_WORKING_PROJECT,
             username=username,
-            table=table,
-            geo_table=geo_table,
             temp_table_name=temp_table_name,
             data_geom_column=_GEOM_COLUMN,
-            where=_build_where_clausule(filters))
+            tables_queries=','.join(tables_queries),
+            joins=joins)
+
+
+def _get_public_query(agg, columns, username, dataset, table, geo_table, temp_table_name, filters=[]):
+    variables = [Variable({'id': column, 'column_name': column, 'dataset_id': 'fake_name'}) for column in columns]
+
+    return _get_geography_query(
+        [(agg, variables, '{}.{}.{}'.format(_PUBLIC_PROJECT, dataset, table), filters)],
+        username, '{}.{}.{}'.format(_PUBLIC_PROJECT, dataset, geo_table), temp_table_name, project=_PUBLIC_PROJECT)
@@ -0,0 +1,70 @@
+"""Unit tests for cartoframes.data.services.Geocoding"""
+
+from carto.sql import SQLClient
+from pandas import DataFrame
+
+from cartoframes.auth import Credentials
+from cartoframes.data.services import Geocoding
+from cartoframes.data.services.utils.geocoding_constants import GEOCODED_ROW_BYTES
+from cartoframes.io.carto import estimate_to_carto
+from cartoframes.io.managers.context_manager import Estimate
+
+# Requests of a geocoding from a table without any extra step
+BASE_ROUND_TRIPS = 14
+
+
+def fake_send(query, *args, **kwargs):
+    if query == 'SELECT current_schema()':
+        return {'rows': [{'current_schema': 'public'}]}
+    if 'FROM pg_class' in query:
+        return {'rows': [{'rows': 1000, 'bytes': 65536}]}
+    if query.startswith('EXPLAIN (FORMAT JSON)'):
+        return {'rows': [{'QUERY PLAN': '[{"Plan": {"Plan Rows": 500, "Plan Width": 40}}]'}]}
+    raise ValueError('Unexpected query: {}'.format(query))
+
+
+class TestGeocoding(object):
+
+    def setup_method(self):
+        self.credentials = Credentials('fake_user', 'fake_api')
+
+    def test_estimate_geocode_table(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(SQLClient, 'send', side_effect=fake_send)
+
+        # When
+        result = Geocoding(self.credentials).estimate_geocode('table_name')
+
+        # Then
+        assert result == Estimate(rows=1000, bytes=65536 + 1000 * GEOCODED_ROW_BYTES,
+                                  round_trips=BASE_ROUND_TRIPS + 1, quota=1000)
+        assert not any(call[0][0].startswith('EXPLAIN') for call in mock.call_args_list)
+
+    def test_estimate_geocode_query(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(SQLClient, 'send', side_effect=fake_send)
+
+        # When
+        result = Geocoding(self.credentials).estimate_geocode('SELECT * FROM table_name')
+
+        # Then
+        assert result == Estimate(rows=500, bytes=500 * 40 + 500 * GEOCODED_ROW_BYTES,
+                                  round_trips=BASE_ROUND_TRIPS + 5, quota=500)
+        mock.assert_called_once_with('EXPLAIN (FORMAT JSON) SELECT * FROM table_name', True, False, None)
+
+    def test_estimate_geocode_dataframe(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(SQLClient, 'send', side_effect=fake_send)
+        df = DataFrame({'address': ['Gran Vía 46', 'Calle Alcalá 1', 'Calle Mayor 5']})
+        upload = estimate_to_carto(df)
+
+        # When
+        result = Geocoding(self.credentials).estimate_geocode(df)
+
+        # Then
+        assert result == Estimate(rows=3, bytes=2 * upload.bytes + 3 * GEOCODED_ROW_BYTES,
+                                  round_trips=BASE_ROUND_TRIPS + upload.round_trips + 1, quota=3)
+        mock.assert_not_called()
@@ -0,0 +1,70 @@
+"""Unit tests for cartoframes.data.services.Isolines"""
+
+from carto.sql import SQLClient
+from geopandas import GeoDataFrame
+from shapely.geometry import Point
+
+from cartoframes.auth import Credentials
+from cartoframes.data.services import Isolines
+from cartoframes.data.services.isolines import ISOLINE_AREA_BYTES
+from cartoframes.io.carto import estimate_to_carto
+from cartoframes.io.managers.context_manager import Estimate
+
+# Requests of an isolines computation from a query without any extra step
+BASE_ROUND_TRIPS = 4
+
+
+def fake_send(query, *args, **kwargs):
+    if query == 'SELECT current_schema()':
+        return {'rows': [{'current_schema': 'public'}]}
+    if 'FROM pg_class' in query:
+        return {'rows': [{'rows': 1000, 'bytes': 65536}]}
+    if query.startswith('EXPLAIN (FORMAT JSON)'):
+        return {'rows': [{'QUERY PLAN': '[{"Plan": {"Plan Rows": 500, "Plan Width": 40}}]'}]}
+    raise ValueError('Unexpected query: {}'.format(query))
+
+
+class TestIsolines(object):
+
+    def setup_method(self):
+        self.credentials = Credentials('fake_user', 'fake_api')
+
+    def test_estimate_isochrones_table(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(SQLClient, 'send', side_effect=fake_send)
+
+        # When
+        result = Isolines(self.credentials).estimate_isochrones('table_name', [100, 200])
+
+        # Then
+        assert result == Estimate(rows=2000, bytes=2000 * ISOLINE_AREA_BYTES,
+                                  round_trips=BASE_ROUND_TRIPS + 1, quota=2000)
+
+    def test_estimate_isodistances_query(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(SQLClient, 'send', side_effect=fake_send)
+
+        # When
+        result = Isolines(self.credentials).estimate_isodistances('SELECT * FROM table_name', [100, 200, 300])
+
+        # Then
+        assert result == Estimate(rows=1500, bytes=1500 * ISOLINE_AREA_BYTES,
+                                  round_trips=BASE_ROUND_TRIPS, quota=1500)
+        mock.assert_called_once_with('EXPLAIN (FORMAT JSON) SELECT * FROM table_name', True, False, None)
+
+    def test_estimate_isochrones_dataframe(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(SQLClient, 'send', side_effect=fake_send)
+        gdf = GeoDataFrame({'geometry': [Point(0, 0), Point(1, 1), Point(2, 2)]})
+        upload = estimate_to_carto(gdf, index=True, index_label='cartodb_id')
+
+        # When
+        result = Isolines(self.credentials).estimate_isochrones(gdf, [100, 200])
+
+        # Then
+        assert result == Estimate(rows=6, bytes=upload.bytes + 6 * ISOLINE_AREA_BYTES,
+                                  round_trips=BASE_ROUND_TRIPS + upload.round_trips + 1, quota=6)
+        mock.assert_not_called()
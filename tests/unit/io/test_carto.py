@@ -5,8 +5,9 @@ from geopandas import GeoDataFrame
 from shapely.geometry import Point
 
 from cartoframes.auth import Credentials
-from cartoframes.io.managers.context_manager import ContextManager
-from cartoframes.io.carto import read_carto, to_carto, copy_table, create_table_from_query
+from cartoframes.io.managers.context_manager import ContextManager, Estimate
+from cartoframes.io.carto import read_carto, to_carto, estimate_read_carto, estimate_to_carto, copy_table, \
+                                 create_table_from_query
 
 
 CREDENTIALS = Credentials('fake_user', 'fake_api_key')
@@ -36,7 +37,7 @@ def test_read_carto(mocker):
     gdf = read_carto('__source__', CREDENTIALS)
 
     # Then
-    cm_mock.assert_called_once_with('__source__', None, None, 3)
+    cm_mock.assert_called_once_with('__source__', None, None, 3, None, None, True)
     assert expected.equals(gdf)
     assert gdf.crs == 'epsg:4326'
 
@@ -69,7 +70,7 @@ def test_read_carto_limit(mocker):
     read_carto('__source__', CREDENTIALS, limit=1)
 
     # Then
-    cm_mock.assert_called_once_with('__source__', None, 1, 3)
+    cm_mock.assert_called_once_with('__source__', None, 1, 3, None, None, True)
 
 
 def test_read_carto_retry_times(mocker):
@@ -81,7 +82,7 @@ def test_read_carto_retry_times(mocker):
     read_carto('__source__', CREDENTIALS, retry_times=1)
 
     # Then
-    cm_mock.assert_called_once_with('__source__', None, None, 1)
+    cm_mock.assert_called_once_with('__source__', None, None, 1, None, None, True)
 
 
 def test_read_carto_schema(mocker):
@@ -93,7 +94,57 @@ def test_read_carto_schema(mocker):
     read_carto('__source__', CREDENTIALS, schema='__schema__')
 
     # Then
-    cm_mock.assert_called_once_with('__source__', '__schema__', None, 3)
+    cm_mock.assert_called_once_with('__source__', '__schema__', None, 3, None, None, True)
+
+
+def test_read_carto_dtype_backend(mocker):
+    # Given
+    mocker.patch('cartoframes.utils.geom_utils.set_geometry')
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to')
+
+    # When
+    read_carto('__source__', CREDENTIALS, dtype_backend='compact')
+
+    # Then
+    cm_mock.assert_called_once_with('__source__', None, None, 3, 'compact', None, True)
+
+
+def test_read_carto_chunksize(mocker):
+    # Given
+    mocker.patch('cartoframes.utils.geom_utils.set_geometry')
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to')
+
+    # When
+    read_carto('__source__', CREDENTIALS, chunksize=1000, decode_geom=False)
+
+    # Then
+    cm_mock.assert_called_once_with('__source__', None, None, 3, None, 1000, False)
+
+
+def test_read_carto_cache(mocker):
+    # Given
+    mocker.patch('cartoframes.utils.geom_utils.set_geometry')
+    mocker.patch.object(ContextManager, 'get_tables_updated_at', return_value='2020-01-01T00:00:00')
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to')
+    cache_mock = mocker.patch('cartoframes.utils.cache.QueryCache.read')
+
+    # When
+    read_carto('__source__', CREDENTIALS, cache=True)
+
+    # Then
+    assert cache_mock.call_args[0][0]['query'] == '__source__'
+    assert cache_mock.call_args[0][1] == '2020-01-01T00:00:00'
+    cache_mock.call_args[0][2]()
+    cm_mock.assert_called_once_with('__source__', None, None, 3, None, None, True)
+
+
+def test_read_carto_wrong_dtype_backend(mocker):
+    # When
+    with pytest.raises(ValueError) as e:
+        read_carto('__source__', CREDENTIALS, dtype_backend='tiny')
+
+    # Then
+    assert str(e.value) == 'Wrong option for the `dtype_backend` param. You should provide: compact.'
 
 
 def test_read_carto_index_col_exists(mocker):
@@ -176,6 +227,51 @@ def test_read_carto_decode_geom_false(mocker):
     assert expected.equals(gdf)
 
 
+def test_estimate_read_carto(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'estimate_copy_to')
+    cm_mock.return_value = Estimate(rows=10, bytes=100, round_trips=2, quota=0)
+
+    # When
+    result = estimate_read_carto('__source__', CREDENTIALS, limit=10)
+
+    # Then
+    cm_mock.assert_called_once_with('__source__', None, 10)
+    assert result == Estimate(rows=10, bytes=100, round_trips=2, quota=0)
+
+
+def test_estimate_read_carto_wrong_source(mocker):
+    # When
+    with pytest.raises(ValueError) as e:
+        estimate_read_carto(1234)
+
+    # Then
+    assert str(e.value) == 'Wrong source. You should provide a valid table_name or SQL query.'
+
+
+def test_estimate_to_carto(mocker):
+    # Given
+    df = GeoDataFrame({'geometry': [Point([0, 0]), Point([1, 1])]})
+
+    # When
+    result = estimate_to_carto(df)
+
+    # Then
+    assert result == Estimate(rows=2, bytes=102, round_trips=5, quota=0)
+
+
+def test_estimate_to_carto_wrong_if_exists(mocker):
+    # Given
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    with pytest.raises(ValueError) as e:
+        estimate_to_carto(df, if_exists='keep_calm')
+
+    # Then
+    assert str(e.value) == 'Wrong option for the `if_exists` param. You should provide: fail, replace, append.'
+
+
 def test_to_carto(mocker):
     # Given
     cm_mock = mocker.patch.object(ContextManager, 'copy_from')
@@ -190,6 +286,57 @@ def test_to_carto(mocker):
     assert cm_mock.call_args[0][3] is True
 
 
+def test_to_carto_workers(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_from')
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    to_carto(df, '__table_name__', CREDENTIALS, workers=4)
+
+    # Then
+    assert cm_mock.call_args[0][4] == 4
+
+
+def test_to_carto_bulk_load(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_from')
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    to_carto(df, '__table_name__', CREDENTIALS, bulk_load=True, cluster=True)
+
+    # Then
+    assert cm_mock.call_args[0][5] is True
+    assert cm_mock.call_args[0][6] is True
+
+
+def test_to_carto_cluster_without_bulk_load(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_from')
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    with pytest.raises(ValueError) as e:
+        to_carto(df, '__table_name__', CREDENTIALS, cluster=True)
+
+    # Then
+    assert str(e.value) == 'Wrong option for the `cluster` param. cluster requires bulk_load=True.'
+    cm_mock.assert_not_called()
+
+
+def test_to_carto_wrong_workers(mocker):
+    # Given
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    with pytest.raises(ValueError) as e:
+        to_carto(df, '__table_name__', CREDENTIALS, workers=0)
+
+    # Then
+    assert str(e.value) == 'Wrong number of workers. You should provide an integer >= 1.'
+
+
 def test_to_carto_wrong_dataframe(mocker):
     # When
     with pytest.raises(ValueError) as e:
@@ -0,0 +1,116 @@
+import pytest
+
+from threading import Event, current_thread
+
+from carto.exceptions import CartoException
+
+from cartoframes.io.managers.batch_job_manager import BatchJobManager
+
+
+class FakeBatchSQLClient(object):
+
+    def __init__(self, reads=1, status='done'):
+        self.reads = reads
+        self.status = status
+        self.jobs = {}
+        self.running = 0
+        self.max_running = 0
+        self.created = Event()
+
+    def create(self, query):
+        job_id = 'job_{}'.format(len(self.jobs))
+        self.jobs[job_id] = self.reads
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.thread = current_thread()
+        self.created.set()
+        return {'job_id': job_id, 'status': 'pending', 'query': query}
+
+    def read(self, job_id):
+        self.jobs[job_id] -= 1
+        if self.jobs[job_id] > 0:
+            return {'job_id': job_id, 'status': 'running'}
+        self.running -= 1
+        return {'job_id': job_id, 'status': self.status}
+
+
+class TestBatchJobManager(object):
+
+    def setup_method(self):
+        self.manager = BatchJobManager(max_jobs=3)
+
+    def test_submit(self):
+        # Given
+        client = FakeBatchSQLClient(reads=2)
+
+        # When
+        futures = [self.manager.submit(client, 'query_{}'.format(i)) for i in range(10)]
+        results = [future.result(timeout=30) for future in futures]
+
+        # Then
+        assert sorted(result['job_id'] for result in results) == sorted(client.jobs.keys())
+        assert len(results) == 10
+        assert client.max_running <= 3
+
+    def test_submit_callback(self):
+        # Given
+        client = FakeBatchSQLClient()
+        finished = []
+        called = Event()
+
+        def callback(future):
+            finished.append((future, current_thread()))
+            called.set()
+
+        # When
+        future = self.manager.submit(client, 'query', callback=callback)
+        future.result(timeout=30)
+        called.wait(timeout=30)
+
+        # Then
+        assert len(finished) == 1
+        assert finished[0][0] is future
+        assert finished[0][1] is not client.thread
+
+    def test_submit_from_callback(self):
+        # Given
+        client = FakeBatchSQLClient()
+        results = []
+        called = Event()
+
+        def callback(future):
+            results.append(self.manager.submit(client, 'nested_query').result(timeout=30))
+            called.set()
+
+        # When
+        self.manager.submit(client, 'query', callback=callback)
+
+        # Then
+        assert called.wait(timeout=30)
+        assert results[0]['status'] == 'done'
+
+    def test_submit_wakes_up_loop(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.batch_job_manager.MIN_POLL_INTERVAL', 5)
+        running_client = FakeBatchSQLClient()
+        client = FakeBatchSQLClient()
+        self.manager.submit(running_client, 'running_query')
+        running_client.created.wait(timeout=30)
+
+        # When
+        self.manager.submit(client, 'query')
+
+        # Then
+        assert client.created.wait(timeout=1)
+
+    def test_submit_failed(self):
+        # Given
+        client = FakeBatchSQLClient(status='failed')
+
+        # When
+        future = self.manager.submit(client, 'query')
+        with pytest.raises(CartoException) as e:
+            future.result(timeout=30)
+
+        # Then
+        assert str(e.value).startswith('Batch SQL job failed with result:')
@@ -5,7 +5,7 @@ from carto.sql import SQLClient, BatchSQLClient, CopySQLClient
 from pandas import DataFrame
 from geopandas import GeoDataFrame
 from cartoframes.auth import Credentials
-from cartoframes.io.managers.context_manager import ContextManager
+from cartoframes.io.managers.context_manager import ContextManager, Estimate, estimate_copy_from
 from cartoframes.utils.columns import ColumnInfo
 
 
@@ -29,14 +29,15 @@ class TestContextManager(object):
     def test_execute_long_running_query(self, mocker):
         # Given
         mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
-        mock = mocker.patch.object(BatchSQLClient, 'create_and_wait_for_completion')
+        mock = mocker.patch.object(BatchSQLClient, 'create', return_value={'job_id': 'id', 'status': 'done'})
 
         # When
         cm = ContextManager(self.credentials)
-        cm.execute_long_running_query('query')
+        result = cm.execute_long_running_query('query')
 
         # Then
         mock.assert_called_once_with('query')
+        assert result == {'job_id': 'id', 'status': 'done'}
 
     def test_copy_from(self, mocker):
         # Given
@@ -51,7 +52,7 @@ class TestContextManager(object):
         cm.copy_from(df, 'TABLE NAME')
 
         # Then
-        mock.assert_called_once_with(df, 'table_name', columns)
+        mock.assert_called_once_with(df, 'table_name', columns, None)
 
     def test_copy_from_exists_fail(self, mocker):
         # Given
@@ -86,6 +87,73 @@ class TestContextManager(object):
         # Then
         mock.assert_called_once_with('table_name', columns, 'schema', True)
 
+    def test_copy_from_bulk_load(self, mocker):
+        # Given
+        from shapely.geometry import Point
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'has_table', return_value=False)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, '_copy_from')
+        create_mock = mocker.patch.object(ContextManager, '_create_table_from_columns')
+        query_mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        gdf = GeoDataFrame({'A': [1], 'the_geom': [Point(0, 0)]}, geometry='the_geom')
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(gdf, 'table_name', bulk_load=True, cluster=True)
+
+        # Then
+        assert create_mock.call_args[0][3] is False
+        query_mock.assert_called_once_with(
+            'BEGIN; SELECT CDB_CartodbfyTable(\'schema\', \'table_name\'); '
+            'CREATE INDEX IF NOT EXISTS table_name_the_geom_idx ON table_name USING GIST (the_geom); '
+            'CLUSTER table_name USING table_name_the_geom_idx; '
+            'ANALYZE table_name; COMMIT;')
+
+    def test_copy_from_bulk_load_append(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'has_table', return_value=True)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, '_copy_from')
+        query_mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        df = DataFrame({'A': [1]})
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(df, 'table_name', 'append', bulk_load=True)
+
+        # Then
+        query_mock.assert_called_once_with('BEGIN; ; ; ; ANALYZE table_name; COMMIT;')
+
+    def test_get_tables_updated_at(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query')
+        mock.return_value = {'rows': [{'num_tables': 2, 'num_updated': 2, 'updated_at': '2020-01-01T00:00:00'}]}
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.get_tables_updated_at("SELECT * FROM table_name WHERE name = 'a'")
+
+        # Then
+        assert result == '2020-01-01T00:00:00'
+        assert "CDB_QueryTablesText('SELECT * FROM table_name WHERE name = ''a''')" in mock.call_args[0][0]
+
+    def test_get_tables_updated_at_without_metadata(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query')
+        mock.return_value = {'rows': [{'num_tables': 2, 'num_updated': 1, 'updated_at': '2020-01-01T00:00:00'}]}
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.get_tables_updated_at('table_name')
+
+        # Then
+        assert result is None
+        assert 'CDB_QueryTablesText(\'SELECT * FROM "table_name"\')' in mock.call_args[0][0]
+
     def test_internal_copy_from(self, mocker):
         # Given
         from shapely.geometry import Point
@@ -110,6 +178,139 @@ class TestContextManager(object):
             b'2|0101000020E6100000000000000000F03F000000000000F03F\n'
         ]
 
+    def test_estimate_size_table(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query')
+        mock.return_value = {'rows': [{'rows': 1000, 'bytes': 65536}]}
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.estimate_size('table_name', 'schema')
+
+        # Then
+        assert result == (1000, 65536)
+        assert 'FROM pg_class' in mock.call_args[0][0]
+        assert '\'"schema"."table_name"\'::regclass' in mock.call_args[0][0]
+
+    def test_estimate_size_query(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query')
+        mock.return_value = {'rows': [{'QUERY PLAN': [{'Plan': {'Plan Rows': 500, 'Plan Width': 40}}]}]}
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.estimate_size('SELECT * FROM table_name')
+
+        # Then
+        assert result == (500, 20000)
+        mock.assert_called_once_with('EXPLAIN (FORMAT JSON) SELECT * FROM table_name', do_post=False)
+
+    def test_estimate_size_table_without_stats(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, '_get_table_stats', return_value={'rows': 0, 'bytes': 0})
+        mock = mocker.patch.object(ContextManager, '_explain_plan')
+        mock.return_value = {'Plan Rows': 10, 'Plan Width': 8}
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.estimate_size('table_name', 'schema')
+
+        # Then
+        assert result == (10, 80)
+        mock.assert_called_once_with('SELECT * FROM "schema"."table_name"')
+
+    def test_estimate_copy_to(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, 'estimate_size', return_value=(1000, 65536))
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.estimate_copy_to('table_name', None, limit=100)
+
+        # Then
+        assert result == Estimate(rows=100, bytes=6553, round_trips=3, quota=0)
+
+    def test_estimate_size_table_current_schema(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(SQLClient, 'send', side_effect=fake_estimation_send)
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.estimate_size('table_name')
+
+        # Then
+        assert result == (1000, 65536)
+        queries = [call[0][0] for call in mock.call_args_list]
+        assert len(queries) == 2
+        assert '"public"."table_name"\'::regclass' in queries[1]
+
+    def test_estimate_size_table_without_stats_explain_json(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(SQLClient, 'send', side_effect=fake_estimation_send)
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.estimate_size('empty_table')
+
+        # Then
+        assert result == (500, 20000)
+        assert mock.call_args[0][0] == 'EXPLAIN (FORMAT JSON) SELECT * FROM "public"."empty_table"'
+
+    def test_estimate_size_query_explain_json(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(SQLClient, 'send', side_effect=fake_estimation_send)
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.estimate_size('SELECT * FROM table_name WHERE value > 1')
+
+        # Then
+        assert result == (500, 20000)
+        mock.assert_called_once_with('EXPLAIN (FORMAT JSON) SELECT * FROM table_name WHERE value > 1',
+                                     True, False, None)
+
+    def test_estimate_copy_from(self):
+        # Given
+        from shapely.geometry import Point
+        gdf = GeoDataFrame({'A': [1, 2], 'B': [Point(0, 0), Point(1, 1)]}, geometry='B')
+
+        # When
+        result = estimate_copy_from(gdf, 'replace')
+
+        # Then
+        assert result == Estimate(rows=2, bytes=106, round_trips=4, quota=0)
+
+    def test_internal_copy_from_workers(self, mocker):
+        # Given
+        from shapely.geometry import Point
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(CopySQLClient, 'copyfrom')
+        gdf = GeoDataFrame({'A': [1, 2, 3], 'B': [Point(0, 0), Point(1, 1), Point(0, 0)]})
+        columns = [
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('B', 'b', 'geometry', True)
+        ]
+        mocker.patch('cartoframes.io.managers.copy_pipeline.ENCODE_BLOCK_SIZE', 2)
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm._copy_from(gdf, 'table_name', columns, workers=2)
+
+        # Then
+        assert b''.join(mock.call_args[0][1]) == (
+            b'1|0101000020E610000000000000000000000000000000000000\n'
+            b'2|0101000020E6100000000000000000F03F000000000000F03F\n'
+            b'3|0101000020E610000000000000000000000000000000000000\n'
+        )
+
     def test_rename_table(self, mocker):
         # Given
         def has_table(table_name):
@@ -192,3 +393,16 @@ class TestContextManager(object):
         # Then
         mock.assert_called_once_with('table_name', 'new_table_name')
         assert result == 'new_table_name'
+
+
+def fake_estimation_send(query, *args, **kwargs):
+    """SQL API responses of the estimations: the table statistics of `table_name`, no statistics
+    for the rest of tables and the same `EXPLAIN` plan for all the queries"""
+    if query == 'SELECT current_schema()':
+        return {'rows': [{'current_schema': 'public'}]}
+    if 'FROM pg_class' in query:
+        rows = 1000 if '"table_name"' in query else 0
+        return {'rows': [{'rows': rows, 'bytes': 65536 if rows else 8192}]}
+    if query.startswith('EXPLAIN (FORMAT JSON)'):
+        return {'rows': [{'QUERY PLAN': '[{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 500, "Plan Width": 40}}]'}]}
+    raise ValueError('Unexpected query: {}'.format(query))
@@ -0,0 +1,54 @@
+import pytest
+
+from io import BytesIO
+from shapely.geometry import Point
+
+from cartoframes.io.managers.copy_pipeline import BufferedStream, read_csv_pipelined
+
+
+class FailingStream(object):
+    def read(self, size):
+        raise Exception('Connection lost')
+
+
+class TestCopyPipeline(object):
+
+    def test_buffered_stream(self):
+        # Given
+        data = b'a,b\n' + b''.join('{0},{0}\n'.format(i).encode() for i in range(10000))
+
+        # When
+        stream = BufferedStream(BytesIO(data), max_blocks=2)
+        result = stream.read()
+
+        # Then
+        assert result == data
+
+    def test_buffered_stream_error(self):
+        # When
+        with pytest.raises(Exception) as e:
+            BufferedStream(FailingStream()).read()
+
+        # Then
+        assert str(e.value) == 'Connection lost'
+
+    def test_read_csv_pipelined(self):
+        # Given
+        data = b'cartodb_id,the_geom\n' + b''.join(
+            '{},0101000000000000000000F03F000000000000F03F\n'.format(i).encode() for i in range(10))
+
+        # When
+        df = read_csv_pipelined(BytesIO(data), 3, geom_col='the_geom')
+
+        # Then
+        assert list(df.index) == list(range(10))
+        assert list(df['cartodb_id']) == list(range(10))
+        assert all(geom.equals(Point(1, 1)) for geom in df['the_geom'])
+
+    def test_read_csv_pipelined_empty(self):
+        # When
+        df = read_csv_pipelined(BytesIO(b'cartodb_id,the_geom\n'), 3, geom_col='the_geom')
+
+        # Then
+        assert list(df.columns) == ['cartodb_id', 'the_geom']
+        assert len(df) == 0
@@ -0,0 +1,115 @@
+from pandas import DataFrame
+from shapely.geometry import Point
+
+from cartoframes.utils.cache import QueryCache, cache_key, normalize_query, get_query_cache, get_enrichment_cache
+
+KEY_PARAMS = {'base_url': 'https://fake_user.carto.com', 'query': 'SELECT * FROM table_name', 'limit': None}
+
+
+class TestQueryCache(object):
+
+    def setup_method(self):
+        self.df = DataFrame({
+            'cartodb_id': [1, 2],
+            'the_geom': [Point(0, 0), Point(1, 1)]
+        })
+
+    def fetch(self):
+        self.fetched += 1
+        return self.df
+
+    def test_read(self, tmp_path):
+        # Given
+        self.fetched = 0
+        query_cache = QueryCache(path=str(tmp_path))
+
+        # When
+        first = query_cache.read(KEY_PARAMS, '2020-01-01T00:00:00', self.fetch)
+        second = query_cache.read(KEY_PARAMS, '2020-01-01T00:00:00', self.fetch)
+
+        # Then
+        assert self.fetched == 1
+        assert first is self.df
+        assert list(second['cartodb_id']) == [1, 2]
+        assert second['the_geom'][1].equals(Point(1, 1))
+        assert query_cache.stats()['hits'] == 1
+        assert query_cache.stats()['misses'] == 1
+        assert query_cache.stats()['entries'] == 1
+
+    def test_read_updated(self, tmp_path):
+        # Given
+        self.fetched = 0
+        query_cache = QueryCache(path=str(tmp_path))
+
+        # When
+        query_cache.read(KEY_PARAMS, '2020-01-01T00:00:00', self.fetch)
+        query_cache.read(KEY_PARAMS, '2020-01-02T00:00:00', self.fetch)
+
+        # Then
+        assert self.fetched == 2
+        assert query_cache.stats()['entries'] == 1
+
+    def test_read_not_cacheable(self, tmp_path):
+        # Given
+        self.fetched = 0
+        query_cache = QueryCache(path=str(tmp_path))
+
+        # When
+        query_cache.read(KEY_PARAMS, None, self.fetch)
+        query_cache.read(KEY_PARAMS, None, self.fetch)
+
+        # Then
+        assert self.fetched == 2
+        assert query_cache.stats()['entries'] == 0
+
+    def test_read_evicts_lru(self, tmp_path):
+        # Given
+        self.fetched = 0
+        query_cache = QueryCache(path=str(tmp_path))
+        query_cache.read(dict(KEY_PARAMS, limit=1), '2020', self.fetch)
+        entry_size = query_cache.stats()['size']
+        query_cache.max_size = entry_size * 2
+
+        # When
+        query_cache.read(dict(KEY_PARAMS, limit=2), '2020', self.fetch)
+        query_cache.read(dict(KEY_PARAMS, limit=1), '2020', self.fetch)
+        query_cache.read(dict(KEY_PARAMS, limit=3), '2020', self.fetch)
+        query_cache.read(dict(KEY_PARAMS, limit=1), '2020', self.fetch)
+
+        # Then
+        assert self.fetched == 3
+        assert query_cache.stats()['entries'] == 2
+
+    def test_clear(self, tmp_path):
+        # Given
+        self.fetched = 0
+        query_cache = QueryCache(path=str(tmp_path))
+        query_cache.read(KEY_PARAMS, '2020', self.fetch)
+
+        # When
+        query_cache.clear()
+
+        # Then
+        assert query_cache.stats()['entries'] == 0
+        assert [f.name for f in tmp_path.iterdir()] == ['index.json']
+
+    def test_enrichment_cache(self):
+        # When
+        query_cache = get_query_cache()
+        enrichment_cache = get_enrichment_cache()
+
+        # Then
+        assert enrichment_cache is get_enrichment_cache()
+        assert enrichment_cache is not query_cache
+        assert enrichment_cache.path != query_cache.path
+
+    def test_cache_key(self):
+        assert cache_key(KEY_PARAMS) == cache_key(dict(KEY_PARAMS, query='  SELECT *\n FROM table_name;'))
+        assert cache_key(KEY_PARAMS) != cache_key(dict(KEY_PARAMS, limit=10))
+
+    def test_normalize_query(self):
+        assert normalize_query('\n  SELECT *\n  FROM table_name ;\n') == 'SELECT * FROM table_name'
+        assert normalize_query("SELECT * FROM t  WHERE name = 'a  b' ") == "SELECT * FROM t WHERE name = 'a  b'"
+        assert normalize_query("SELECT  'it''s  ',  \"a  b\" FROM t") == "SELECT 'it''s  ', \"a  b\" FROM t"
+        assert normalize_query('SELECT 1 -- a  comment\n, 2') == 'SELECT 1 -- a  comment\n, 2'
+        assert normalize_query("SELECT 'a  b'") != normalize_query("SELECT 'a b'")
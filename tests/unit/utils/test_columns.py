@@ -6,7 +6,8 @@ from pandas import DataFrame
 from geopandas import GeoDataFrame
 
 from cartoframes.utils.geom_utils import set_geometry
-from cartoframes.utils.columns import Column, ColumnInfo, get_dataframe_columns_info, normalize_names
+from cartoframes.utils.columns import Column, ColumnInfo, get_dataframe_columns_info, normalize_names, \
+                                     compact_dtypes
 
 
 class TestColumns(object):
@@ -73,6 +74,19 @@ class TestColumns(object):
     def test_normalize_names_unchanged(self):
         assert normalize_names(self.cols_ans) == self.cols_ans
 
+    def test_normalize_names_repeated(self):
+        assert normalize_names(['x_1', 'x', 'x', 'x_1', 'x', 'x']) == \
+            ['x_1', 'x', 'x_1_2', 'x_1_1', 'x_1_2_3', 'x_1_2_3_4']
+
+    def test_normalize_names_wide(self):
+        names = ['Value {}'.format(i) for i in range(5000)] + ['value'] * 5000
+        result = normalize_names(names)
+
+        assert len(set(result)) == len(names)
+        assert result[4999] == 'value_4999'
+        assert result[5000] == 'value'
+        assert result[5001] == 'value_1_2'
+
     def test_column_info_with_geom(self):
         gdf = GeoDataFrame(
             [['Gran Vía 46', 'Madrid', 'POINT (0 0)'], ['Ebro 1', 'Sevilla', 'POINT (1 1)']],
@@ -126,3 +140,52 @@ class TestColumns(object):
             ColumnInfo('the_geom', 'the_geom', 'geometry(Point, 4326)', True),
             ColumnInfo('g-e-o-m-e-t-r-y', 'g_e_o_m_e_t_r_y', 'text', False)
         ]
+
+    def test_compact_dtypes(self):
+        df = DataFrame({
+            'cartodb_id': [1, 2, 3, 4],
+            'amount': [1.5, None, 2.25, 3.0],
+            'total': [1.0, 2.0, 300.0, 4.0],
+            'ratio': [0.1, 0.2, 0.3, 0.4],
+            'status': ['on', 'off', 'on', 'on'],
+            'name': ['a', 'b', 'c', None],
+            'the_geom': ['0101', '0101', '0101', '0101']
+        })
+        columns = [
+            Column('cartodb_id', normalize=False, pgtype='integer'),
+            Column('amount', normalize=False, pgtype='numeric'),
+            Column('total', normalize=False, pgtype='numeric'),
+            Column('ratio', normalize=False, pgtype='double precision'),
+            Column('status', normalize=False, pgtype='text'),
+            Column('name', normalize=False, pgtype='text'),
+            Column('the_geom', normalize=False, pgtype='geometry')
+        ]
+
+        compact_dtypes(df, columns)
+
+        assert str(df['cartodb_id'].dtype) == 'int8'
+        assert str(df['amount'].dtype) == 'float32'
+        assert str(df['total'].dtype) == 'int16'
+        assert str(df['ratio'].dtype) == 'float64'
+        assert str(df['status'].dtype) == 'category'
+        assert str(df['name'].dtype) in ['string', 'object']
+        assert str(df['the_geom'].dtype) == 'object'
+
+    def test_compact_dtypes_float_integral_values(self):
+        df = DataFrame({
+            'real': [1.0, 2.0, 3.0],
+            'double': [1.0, 2.0, 1e10],
+            'big_double': [1.0, 2.0, 16777217.0]
+        })
+        columns = [
+            Column('real', normalize=False, pgtype='real'),
+            Column('double', normalize=False, pgtype='double precision'),
+            Column('big_double', normalize=False, pgtype='double precision')
+        ]
+
+        compact_dtypes(df, columns)
+
+        assert str(df['real'].dtype) == 'float32'
+        assert str(df['double'].dtype) == 'float32'
+        assert str(df['big_double'].dtype) == 'float64'
+        assert df['real'].tolist() == [1.0, 2.0, 3.0]
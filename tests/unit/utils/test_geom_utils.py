@@ -8,7 +8,8 @@ from shapely.geometry import Point, base
 
 from cartoframes.utils.geom_utils import (ENC_EWKT, ENC_SHAPELY, ENC_WKB,
                                           ENC_WKB_BHEX, ENC_WKB_HEX, ENC_WKT,
-                                          decode_geometry, decode_geometry_item, detect_encoding_type)
+                                          decode_geometry, decode_geometry_item, detect_encoding_type,
+                                          set_geometry, to_wkb_hex)
 
 
 class TestGeomUtils(object):
@@ -49,6 +50,23 @@ class TestGeomUtils(object):
         decoded_geom = decode_geometry(geom_none)
         assert str(decoded_geom) == str(expected_decoded_geom)
 
+    def test_set_geometry_decoded_column(self, mocker):
+        gdf = gpd.GeoDataFrame({'the_geom': gpd.GeoSeries([Point([0, 0]), Point([1, 1])])})
+        decode_mock = mocker.patch('cartoframes.utils.geom_utils.decode_geometry')
+
+        set_geometry(gdf, 'the_geom', inplace=True)
+
+        decode_mock.assert_not_called()
+        assert gdf.geometry.name == 'the_geom'
+        assert gdf.geometry.equals(gpd.GeoSeries([Point([0, 0]), Point([1, 1])]))
+
+    def test_set_geometry_encoded_column(self):
+        gdf = gpd.GeoDataFrame({'the_geom': pd.Series(['POINT(0 0)', 'POINT(1 1)'])})
+
+        set_geometry(gdf, 'the_geom', inplace=True)
+
+        assert gdf.geometry.equals(gpd.GeoSeries([Point([0, 0]), Point([1, 1])]))
+
     def test_detect_encoding_type_shapely(self):
         enc_type = detect_encoding_type(Point(1234, 5789))
         assert enc_type == ENC_SHAPELY
@@ -127,3 +145,10 @@ class TestGeomUtils(object):
         geom = decode_geometry_item('SRID=4326;POINT (1234 5789)', ENC_EWKT)  # ext
         assert lgeos.GEOSGetSRID(geom._geom) == 4326
         assert geom.wkt == 'POINT (1234 5789)'
+
+    def test_to_wkb_hex(self):
+        result = to_wkb_hex(gpd.GeoSeries([Point(1234, 5789), None, Point()]).values)
+
+        assert result[0].upper() == '0101000000000000000048934000000000009DB640'
+        assert result[1] is None
+        assert result[2] is None